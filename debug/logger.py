@@ -1,25 +1,118 @@
-import tkinter as tk
+from collections import deque
 from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Iterator
+import logging
+
+
+class LogBuffer:
+    """
+    Bounded buffer of debug log messages. Messages can be written from any thread: they are appended to a bounded queue
+    (collections.deque appends are atomic, so no lock is needed) and moved into a ring buffer that keeps the most recent
+    'max_lines' messages when the buffer is drained on the Tk main thread. Messages can also be written to a rotating
+    log file; if more than 'max_lines' messages are written between drains, only the most recent are written.
+    """
+    def __init__(self,
+                 max_lines: int = 5000,
+                 log_file: str = None,
+                 max_bytes: int = 5_000_000,
+                 backup_count: int = 3):
+        """
+        Parameters
+        ----------
+        max_lines: int (default = 5000)
+            Maximum number of messages kept in memory. The oldest messages are discarded first.
+        log_file: str (default = None)
+            Path to a log file that all messages are written to. If None, messages are only kept in memory.
+        max_bytes: int (default = 5_000_000)
+            Size of the log file (bytes) at which it is rotated.
+        backup_count: int (default = 3)
+            Number of rotated log files that are kept.
+        """
+        # (tag, message) written since the last drain. The queue has the same limit as the ring buffer, so messages
+        # that would be pushed out of the ring buffer by the next drain are discarded as they are written
+        self._pending = deque(maxlen=max_lines)
+        self._lines = deque(maxlen=max_lines)  # (tag, message) ring buffer
+        self.max_lines = max_lines
+
+        self._file_handler = None
+        if log_file is not None:
+            self._file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                                     encoding='utf-8')
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        """
+        Iterates over the (tag, message) pairs in the ring buffer, oldest first.
+        """
+        return iter(list(self._lines))
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def put(self,
+            tag: str,
+            message: str) -> None:
+        """
+        Adds a message to the buffer. Can be called from any thread.
+        """
+        self._pending.append((tag, message))
+
+    def drain(self) -> list[tuple[str, str]]:
+        """
+        Moves the pending messages into the ring buffer (and the log file) and returns them.
+        """
+        messages = []
+        while self._pending:
+            messages.append(self._pending.popleft())
+
+        self._lines.extend(messages)
+        if self._file_handler is not None:
+            for _, message in messages:
+                self._file_handler.handle(logging.makeLogRecord({'msg': message.rstrip('\n')}))
+
+        return messages
+
+    def clear(self) -> None:
+        """
+        Removes all messages from the ring buffer.
+        """
+        self.drain()
+        self._lines.clear()
+
+    def save(self, path: str) -> int:
+        """
+        Writes the messages in the ring buffer to a file.
+
+        Returns
+        -------
+        n_lines: int
+            Number of messages that were written.
+        """
+        self.drain()
+        lines = list(self._lines)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(message for _, message in lines)
+        return len(lines)
 
 
 class DebugLogger:
     """
-    Custom object that sends debug information to a DebugLog instance.
+    Custom object that sends debug information to a LogBuffer, which is displayed by a DebugLog instance.
     """
-    def __init__(self, debug_log, tag: str):
+    def __init__(self, log_buffer: LogBuffer, tag: str):
         """
-        debug_log: widgets.debug.DebugLog instance
+        log_buffer: debug.logger.LogBuffer instance shared with the DebugLog widget
         tag: text identifier
         """
-        self.debug_log = debug_log
+        self.log_buffer = log_buffer
         self.tag = tag
 
     def write(self, string: str) -> None:
-        self.debug_log.configure(state="normal")  # allow DebugLog object to be edited
-        self.debug_log.insert(tk.END, f'{self._get_current_timestring()}: {string}\n', (self.tag,))  # insert log message
-        self.debug_log.see(tk.END)  # force the target DebugLog object to scroll to the end when new text is added
-        self.debug_log.configure(state="disabled")  # make DebugLog object read-only
+        self.log_buffer.put(self.tag, f'{self._get_current_timestring()}: {string}\n')
+
+    def flush(self) -> None:
+        pass
 
     @staticmethod
     def _get_current_timestring() -> str:
-        return str(datetime.utcnow())
\ No newline at end of file
+        return str(datetime.utcnow())
@@ -21,28 +21,21 @@ class DebugFileMenu(tk.Menu):
         """
         Clear the debug log.
         """
-        log = self._get_debug_log()
-        log.config(state='normal')
-        log.delete("1.0", tk.END)
-        log.config(state='disabled')
+        self._get_debug_log().clear()
         sys.stdout.write('Cleared debug log')
     
     def _save_log(self) -> None:
         """
-        Save the debug log.
+        Save the debug log. The messages are written directly from the log buffer instead of being copied out of the
+        text widget.
         """
         # generate filename and printout debug log path
         fname = self._generate_log_fname()
         full_path = f'logs/{fname}.txt'
         sys.stdout.write(f'Saving debug log to: {full_path}')
         
-        # get debug log contents
-        log = self._get_debug_log()
-        content = log.get("1.0", "end-1c")
-        
         # save the debug log
-        with open(full_path, 'w') as f:
-            f.write(content)
+        self._get_debug_log().log_buffer.save(full_path)
     
     @staticmethod
     def _generate_log_fname() -> str:
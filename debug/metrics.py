@@ -0,0 +1,110 @@
+"""
+Timing and counter instrumentation for the NOAA feeds.
+"""
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from threading import Lock
+from typing import Iterator
+import numpy as np
+import sys
+import time
+
+
+class Metrics:
+    """
+    Thread-safe collection of stage timings (spans) and counters. The most recent timings of every stage are kept in
+    memory for percentile summaries, and every timing is written to the debug log as a structured line:
+        [Metrics] stage=NWSAlerts.fetch ms=153.2
+    """
+    def __init__(self,
+                 max_samples: int = 1000,
+                 log: bool = True):
+        """
+        max_samples: int (default = 1000)
+            Number of timings kept for each stage.
+        log: bool (default = True)
+            Write every timing to the debug log.
+        """
+        self._lock = Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=max_samples))  # {stage: recent timings (ms)}
+        self._counts = defaultdict(int)  # {stage: number of timings recorded}
+        self._counters = defaultdict(int)  # {counter name: value}
+        self.max_samples = max_samples
+        self.log = log
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        """
+        Times the code inside a 'with' block and records it for a stage. The timing is recorded even if the block
+        raises an exception.
+
+        stage: str
+            Name of the stage, prefixed with the feed (e.g., 'NWSAlerts.decode').
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, 1000 * (time.perf_counter() - start))
+
+    def record(self,
+               stage: str,
+               elapsed_ms: float,
+               log: bool = None) -> None:
+        """
+        Records a timing (milliseconds) for a stage. 'log' overrides Metrics.log for this timing (e.g., for timings
+        recorded every frame).
+        """
+        with self._lock:
+            self._samples[stage].append(elapsed_ms)
+            self._counts[stage] += 1
+        if log if log is not None else self.log:
+            sys.stdout.write(f'[Metrics] stage={stage} ms={elapsed_ms:.1f}')
+
+    def increment(self,
+                  counter: str,
+                  value: int = 1) -> None:
+        """
+        Increments a counter (e.g., 'NWSAlerts.not_modified').
+        """
+        with self._lock:
+            self._counters[counter] += value
+
+    def counters(self) -> dict[str, int]:
+        """
+        Returns a copy of all counters.
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def summary(self) -> list[tuple[str, int, float, float, float]]:
+        """
+        Summarizes the recent timings of every stage.
+
+        Returns
+        -------
+        summary: list[tuple[str, int, float, float, float]]
+            (stage, number of timings recorded, p50 (ms), p95 (ms), max (ms)) for each stage, sorted by stage name. The
+            percentiles and maximum only use the most recent 'max_samples' timings.
+        """
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            counts = dict(self._counts)
+
+        summary = []
+        for stage in sorted(samples):
+            p50, p95 = np.percentile(samples[stage], [50, 95])
+            summary.append((stage, counts[stage], float(p50), float(p95), float(samples[stage].max())))
+        return summary
+
+    def reset(self) -> None:
+        """
+        Removes all timings and counters.
+        """
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._counters.clear()
+
+
+metrics = Metrics()  # shared by all feeds and the performance window
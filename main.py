@@ -1,30 +1,40 @@
 """
 TODO
     * HIGH priority
-        - allow selection of polygons that are on top of each other
         - creating warning list widget
         - allow toggling of offline tiles
         - fix warning popup text (some text is missing and level of detail is not consistent between warnings)
         - allow customizable warning polygon colors
     * MEDIUM priority
-        - customizable warning view options (e.g., only show tornado warnings)
         - mesoscale discussions
         - WPC precipitation outlooks
         - only allow a maximum of one warning popup per polygon
-        - add user option for warning update frequency
     * LOW priority
         - create config files for app settings and user-defined markers
         - figure out realtime clock placement
 """
-from debug.logger import DebugLogger
+from debug.logger import DebugLogger, LogBuffer
+from mapping.culling import ViewportCuller
+from mapping.layers import LayerManager
+from mapping.render import RenderQueue
+from mapping.spatial import SpatialIndex
+from mapping.zorder import ZOrderManager
 from menu.file import FileMenu
 from menu.gis import GISMenu
 from menu.windows import WindowsMenu
 from menu.help import HelpMenu
-from noaa.nws.alerts import NWSAlerts
+from menu.view import ViewMenu
+from noaa.aio import AsyncScheduler
+from noaa.engine import FeedEngine
+from noaa.events import ChangeEvent
+from noaa.ingest import ProcessIngest
+from noaa.nws.alerts import ALERT_Z_LEVELS, NWSAlerts
+from noaa.snapshot import SnapshotStore
+from noaa.spc.outlooks import SPCOutlook, get_outlook_polygons
 from noaa.spc.reports import SPCReports
 from tkvideo import tkvideo
 from widgets.debug import DebugLog
+import argparse
 import customtkinter as ctk
 import os
 import pyautogui
@@ -37,7 +47,11 @@ import tkintermapview as tkmap
 
 class AlertDashboard(ctk.CTk):
     
-    def __init__(self):
+    def __init__(self, ingest_processes: int = 0):
+        """
+        ingest_processes: number of worker processes used to decode the alerts and reports (see noaa.ingest). If 0,
+            they are decoded on the scheduler's worker threads.
+        """
         super().__init__()
 
         screen_width = self.winfo_screenwidth()
@@ -53,11 +67,15 @@ class AlertDashboard(ctk.CTk):
         
         self.bind('<B1-Motion>', self._map_motion)
 
-        self.debug_log = DebugLog(self)  # initialize the debug log
+        self.render_queue = RenderQueue(self)  # canvas/widget changes from background threads are applied here
+
+        # bounded buffer of debug messages, also written to a rotating log file if the 'logs' folder exists
+        self.log_buffer = LogBuffer(log_file='logs/warningnav.log' if os.path.isdir('logs') else None)
+        self.debug_log = DebugLog(self, self.log_buffer)  # initialize the debug log
 
         ### reroute all stdout and stderr printouts to the debug log ###
-        self.debug_logger_out = DebugLogger(self.debug_log, 'stdout')
-        self.debug_logger_err = DebugLogger(self.debug_log, 'stderr')
+        self.debug_logger_out = DebugLogger(self.log_buffer, 'stdout')
+        self.debug_logger_err = DebugLogger(self.log_buffer, 'stderr')
         sys.stdout = self.debug_logger_out
         sys.stderr = self.debug_logger_err
 
@@ -98,6 +116,7 @@ class AlertDashboard(ctk.CTk):
         
         menubar.add_cascade(label='File', menu=FileMenu(self))
         menubar.add_cascade(label='GIS', menu=GISMenu(self))
+        menubar.add_cascade(label='View', menu=ViewMenu(self))
         menubar.add_cascade(label='Windows', menu=WindowsMenu(self))
         menubar.add_cascade(label='Help', menu=HelpMenu(self))
         
@@ -109,15 +128,58 @@ class AlertDashboard(ctk.CTk):
         ctk.set_widget_scaling(1)
         ctk.set_window_scaling(1)
         
+        # bounding-box index of alert and outlook polygons, used for selecting polygons that are on top of each other
+        self.spatial_index = SpatialIndex()
+        self.map_widget.add_left_click_map_command(self._map_click)
+        
+        # alert and outlook polygons are only drawn while they intersect the visible map
+        self.culler = ViewportCuller(self.map_widget)
+        
+        # polygons are stacked with outlooks at the bottom and alerts above them in order of priority
+        self.z_order = ZOrderManager(self.map_widget.canvas, ['outlooks', *ALERT_Z_LEVELS])
+        
+        # all NOAA feeds are polled concurrently on an asyncio event loop thread with shared connection pools
+        self.scheduler = AsyncScheduler()
+        
+        # last known alerts, reports, and outlook, drawn as stale data until the first updates finish
+        self.snapshots = SnapshotStore()
+        
+        # CPU-bound decoding can be moved out of the GUI process so that it does not hold up the Tk event loop
+        self.ingest = ProcessIngest(ingest_processes) if ingest_processes > 0 else None
+        
+        # headless engine that polls the feeds; the dashboard draws the changes that it emits
+        self.engine = FeedEngine(self.scheduler, self.snapshots, self.ingest)
+        
         # NWS alerts
-        self.alerts = NWSAlerts(self.map_widget)
-        self.alerts.start_thread()
+        self.alerts = NWSAlerts(self.map_widget, self.render_queue, self.spatial_index, self.culler, self.z_order)
+        self.engine.subscribe(self.alerts.on_change, feeds=['nws-alerts'])
         
         # SPC storm reports
-        self.spc_reports = SPCReports(self.map_widget)
-        self.spc_reports.start_thread()
+        self.spc_reports = SPCReports(self.map_widget, self.render_queue)
+        self.engine.subscribe(self.spc_reports.on_change, feeds=['spc-reports'])
+        
+        # loaded SPC outlook products are kept as layers that can be hidden and shown again
+        self.layers = LayerManager(self.map_widget, self.culler, self.spatial_index, self.z_order)
+        
+        # SPC outlooks are cached so that switching between products does not require new requests, and the polygons
+        # of downloaded (or prefetched) products are created before the products are selected
+        self.outlook_cache = self.engine.outlooks
+        self.engine.subscribe(self._prepare_outlook_polygons, feeds=['spc-outlook'])
+        
+        self.engine.start()
+        
+        # SPC outlook that was selected when the app was last closed
+        outlook_snapshot = self.snapshots.load('spc-outlook', max_age=86400)
+        if outlook_snapshot is not None:
+            (url, features), _ = outlook_snapshot
+            SPCOutlook(self, url, features=features)
 
         self.mainloop()
+        
+        self.engine.stop()
+        self.scheduler.stop()
+        if self.ingest is not None:
+            self.ingest.shutdown()
     
     def _define_map_bounds(self):
         """
@@ -166,14 +228,24 @@ class AlertDashboard(ctk.CTk):
             self.map_widget.config(width=event.width, height=event.height)
             self.map_widget.pack(anchor='nw')
 
-    def destroy_all_outlook_polygons(self):
+    def hide_outlook_layers(self):
+        """
+        Hides all SPC outlook layers. The layers stay loaded so that they can be shown again without any requests.
+        """
+        n_hidden = self.layers.hide_group('outlooks')
+        sys.stdout.write(f'Hid {n_hidden} outlook layer(s)')
+    
+    def _prepare_outlook_polygons(self, event: ChangeEvent) -> None:
         """
-        dashboard: main.AlertDashboard instance
+        Creates the polygons of SPC outlook products that were downloaded by the outlook cache.
+        
+        Parameters
+        ----------
+        event: noaa.events.ChangeEvent
+            New or modified noaa.spc.cache.CachedOutlook products.
         """
-        outlook_polygons = [p for p in self.canvas_polygon_list() if 'Risk' in p.name]
-        for polygon in outlook_polygons:
-            polygon.delete()
-        sys.stdout.write(f'Removed {len(outlook_polygons)} outlook polygons')
+        for outlook in event.added + event.modified:
+            get_outlook_polygons(self.map_widget, outlook)
     
     def _map_motion(self, event: tk.Event) -> None:
         """
@@ -204,6 +276,17 @@ class AlertDashboard(ctk.CTk):
         elif y < bottom:
             self.map_widget.set_position(bottom, x)
     
+    def _map_click(self, coordinates: tuple[float, float]) -> None:
+        """
+        Method that is called whenever the map is clicked without being moved.
+        
+        Parameters
+        ----------
+        coordinates: tuple[float, float]
+            (lat, lon) of the clicked point.
+        """
+        self.alerts.show_alerts_at(*coordinates)
+    
     def canvas_polygon_list(self) -> list[tkmap.map_widget.CanvasPolygon]:
         """
         Returns a list of all polygons currently shown on the map.
@@ -233,4 +316,9 @@ if __name__ == '__main__':
     # loading_screen_root.after(random.randint(4600, 9200), start_application)
     # loading_screen_root.mainloop()
 
-    AlertDashboard()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='WarningNav')
+    parser.add_argument('--ingest-processes', type=int, default=0,
+                        help='number of worker processes used to decode the NOAA feeds (default: 0, decode on threads)')
+    args = parser.parse_args()
+
+    AlertDashboard(ingest_processes=args.ingest_processes)
\ No newline at end of file
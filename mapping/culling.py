@@ -0,0 +1,253 @@
+from mapping.spatial import SpatialIndex
+from typing import Callable
+import sys
+import tkintermapview as tkmap
+
+
+class CulledPolygon:
+    """
+    Polygon registered with a ViewportCuller.
+    """
+    def __init__(self,
+                 polygon: tkmap.map_widget.CanvasPolygon,
+                 layer: str,
+                 on_draw: Callable = None):
+        """
+        polygon: polygon that is drawn on the map while it intersects the visible map.
+        layer: name of the layer that the polygon belongs to (e.g., 'alerts' or 'outlooks').
+        on_draw: function called with the polygon every time a canvas item is created for it.
+        """
+        self.polygon = polygon
+        self.layer = layer
+        self.on_draw = on_draw
+        self.visible = False
+        self.bbox = None  # (min lat, min lon, max lat, max lon)
+
+
+class ViewportCuller:
+    """
+    Keeps only the polygons that intersect the visible part of the map as canvas items. tkintermapview redraws every
+    polygon in the map widget's polygon list whenever the map is moved or zoomed, so polygons outside of the visible
+    map are removed from the list and drawn again once the user pans or zooms towards them.
+    """
+    def __init__(self,
+                 map_widget: tkmap.TkinterMapView,
+                 padding: float = 0.5,
+                 check_interval_ms: int = 100):
+        """
+        Parameters
+        ----------
+        map_widget: tkmap.TkinterMapView
+            Map widget containing the polygons.
+        padding: float (default = 0.5)
+            Fraction of the visible map's width/height added to each side of the visible bounds, so that small pans do
+            not require any polygons to be drawn.
+        check_interval_ms: int (default = 100)
+            Time between checks for changes in the visible map (milliseconds). Checks are needed to catch movement that
+            does not generate any events (e.g., the map 'fading' to a stop after it is dragged).
+        """
+        self._map_widget = map_widget
+        self._index = SpatialIndex(cell_size=2.0)
+        self._polygons = {}  # {key: CulledPolygon}
+        self._positions = {}  # {id(polygon): index in the map widget's polygon list} for visible polygons
+        self._last_view = None
+        self._bounds = None
+        self.padding = padding
+        self.check_interval_ms = check_interval_ms
+
+        self._map_widget.after(self.check_interval_ms, self._check_viewport)
+
+    def add(self,
+            key,
+            polygon: tkmap.map_widget.CanvasPolygon,
+            layer: str = 'alerts',
+            on_draw: Callable = None) -> None:
+        """
+        Registers a polygon. The polygon is drawn immediately if it intersects the visible map. Registering a polygon
+        with an existing key replaces the old polygon (or updates its geometry if it is the same polygon).
+
+        Parameters
+        ----------
+        key: Any
+            Unique identifier of the polygon.
+        polygon: tkmap.map_widget.CanvasPolygon
+            Polygon that has not been drawn yet.
+        layer: str (default = 'alerts')
+            Name of the layer that the polygon belongs to.
+        on_draw: Callable (default = None)
+            Function called with the polygon every time a canvas item is created for it.
+        """
+        existing = self._polygons.get(key)
+        if existing is not None and existing.polygon is not polygon:
+            self.remove(key)
+            existing = None
+
+        if existing is None:
+            culled = CulledPolygon(polygon, layer, on_draw)
+            self._polygons[key] = culled
+        else:
+            culled = existing
+
+        self._index.insert(key, polygon.position_list, key, layer=layer)
+        culled.bbox = self._index.get_bbox(key)
+
+        if self._intersects_viewport(culled):
+            self._show(culled)
+        elif culled.visible:
+            self._hide(culled)
+
+    def remove(self, key) -> None:
+        """
+        Unregisters a polygon and deletes its canvas item. Nothing happens if the key is not registered.
+        """
+        culled = self._polygons.pop(key, None)
+        if culled is None:
+            return
+
+        self._index.remove(key)
+        self._hide(culled)
+        culled.polygon.deleted = True
+
+    def remove_many(self, keys) -> int:
+        """
+        Unregisters several polygons.
+
+        Returns
+        -------
+        removed: int
+            Number of polygons that were unregistered.
+        """
+        removed = 0
+        for key in keys:
+            culled = self._polygons.pop(key, None)
+            if culled is None:
+                continue
+            self._index.remove(key)
+            self._hide(culled)
+            culled.polygon.deleted = True
+            removed += 1
+
+        return removed
+
+    def clear(self, layer: str) -> int:
+        """
+        Unregisters all polygons in a layer.
+
+        Returns
+        -------
+        removed: int
+            Number of polygons that were unregistered.
+        """
+        return self.remove_many([key for key, culled in self._polygons.items() if culled.layer == layer])
+
+    def refresh(self) -> None:
+        """
+        Draws polygons that moved into the visible map and removes canvas items for polygons that left it.
+        """
+        self._bounds = self._visible_bounds()
+        visible_keys = set(self._index.query_bbox(self._bounds))
+
+        shown = hidden = 0
+        for key, culled in self._polygons.items():
+            if key in visible_keys and not culled.visible:
+                self._show(culled)
+                shown += 1
+            elif key not in visible_keys and culled.visible:
+                self._hide(culled)
+                hidden += 1
+
+        if shown or hidden:
+            sys.stdout.write(f'[ViewportCuller] {shown} polygon(s) drawn, {hidden} polygon(s) culled, '
+                             f'{len(visible_keys)}/{len(self._polygons)} visible')
+
+    def _check_viewport(self) -> None:
+        """
+        Refreshes the visible polygons if the map was moved or zoomed since the last check.
+        """
+        view = (round(self._map_widget.zoom), self._map_widget.upper_left_tile_pos,
+                self._map_widget.lower_right_tile_pos)
+        if view != self._last_view:
+            self._last_view = view
+            self.refresh()
+
+        self._map_widget.after(self.check_interval_ms, self._check_viewport)
+
+    def _visible_bounds(self) -> tuple[float, float, float, float]:
+        """
+        Returns the bounds of the visible map (with padding) as (min lat, min lon, max lat, max lon).
+        """
+        zoom = round(self._map_widget.zoom)
+        top, left = tkmap.utility_functions.osm_to_decimal(*self._map_widget.upper_left_tile_pos, zoom)
+        bottom, right = tkmap.utility_functions.osm_to_decimal(*self._map_widget.lower_right_tile_pos, zoom)
+
+        pad_lat = (top - bottom) * self.padding
+        pad_lon = (right - left) * self.padding
+        return bottom - pad_lat, left - pad_lon, top + pad_lat, right + pad_lon
+
+    def _intersects_viewport(self, culled: CulledPolygon) -> bool:
+        """
+        Checks whether the bounding box of a registered polygon intersects the visible map. Only the polygon's own
+        bounding box is compared, so registering many polygons does not query the index for every polygon.
+        """
+        if self._bounds is None:
+            self._bounds = self._visible_bounds()
+        min_lat, min_lon, max_lat, max_lon = self._bounds
+        polygon_min_lat, polygon_min_lon, polygon_max_lat, polygon_max_lon = culled.bbox
+        return polygon_min_lat <= max_lat and polygon_max_lat >= min_lat and \
+            polygon_min_lon <= max_lon and polygon_max_lon >= min_lon
+
+    def _show(self, culled: CulledPolygon) -> None:
+        """
+        Draws a polygon and adds it to the map widget's polygon list.
+        """
+        had_item = culled.polygon.canvas_polygon is not None
+        culled.polygon.draw()
+        if not had_item and culled.on_draw is not None:
+            culled.on_draw(culled.polygon)
+
+        if not culled.visible:
+            culled.visible = True
+            polygons = self._map_widget.canvas_polygon_list
+            self._positions[id(culled.polygon)] = len(polygons)
+            polygons.append(culled.polygon)
+
+    def _hide(self, culled: CulledPolygon) -> None:
+        """
+        Deletes the canvas item of a polygon and removes it from the map widget's polygon list without unregistering
+        it.
+        """
+        self._delete_canvas_item(culled.polygon)
+        if culled.visible:
+            culled.visible = False
+            self._unlist(culled.polygon)
+
+    def _unlist(self, polygon: tkmap.map_widget.CanvasPolygon) -> None:
+        """
+        Removes a polygon from the map widget's polygon list using its saved position. The last polygon in the list
+        is moved into the empty position, so the list is never scanned (tkintermapview redraws the polygons in any
+        order; stacking is handled with canvas tags).
+        """
+        polygons = self._map_widget.canvas_polygon_list
+        index = self._positions.pop(id(polygon), None)
+        if index is None:
+            return
+        if index >= len(polygons) or polygons[index] is not polygon:
+            # the list was changed outside of the culler (e.g., by CanvasPolygon.delete), so the position is stale
+            try:
+                index = polygons.index(polygon)
+            except ValueError:
+                return
+
+        last = polygons.pop()
+        if last is not polygon:
+            polygons[index] = last
+            if id(last) in self._positions:
+                self._positions[id(last)] = index
+
+    def _delete_canvas_item(self, polygon: tkmap.map_widget.CanvasPolygon) -> None:
+        """
+        Deletes the canvas item of a polygon. The polygon can be drawn again later.
+        """
+        if polygon.canvas_polygon is not None:
+            self._map_widget.canvas.delete(polygon.canvas_polygon)
+            polygon.canvas_polygon = None
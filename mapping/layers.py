@@ -0,0 +1,201 @@
+from collections import OrderedDict
+from itertools import count
+from mapping.culling import ViewportCuller
+from mapping.spatial import SpatialIndex
+from mapping.zorder import ZOrderManager
+import sys
+import tkintermapview as tkmap
+
+
+class Layer:
+    """
+    Named group of polygons that are shown and hidden together (e.g., one SPC outlook product).
+    """
+    def __init__(self,
+                 name: str,
+                 polygons: list[tkmap.map_widget.CanvasPolygon],
+                 group: str,
+                 tag: str,
+                 visible_state: str = 'normal'):
+        """
+        name: unique name of the layer (e.g., the URL of an outlook product).
+        polygons: polygons in the layer.
+        group: name of the group that the layer belongs to (e.g., 'outlooks'). Only one layer in a group is shown at a
+            time.
+        tag: canvas tag added to the canvas items of the layer's polygons.
+        visible_state: canvas item state used while the layer is shown ('normal' or 'disabled').
+        """
+        self.name = name
+        self.polygons = polygons
+        self.group = group
+        self.tag = tag
+        self.visible_state = visible_state
+        self.visible = False
+
+
+class LayerManager:
+    """
+    Keeps loaded products as layers of canvas items. Layers are shown and hidden by changing the state of their canvas
+    items ('hidden'), which is a single Tk call for the whole layer, so switching between loaded products does not
+    require creating or projecting any polygons. Hidden layers stay registered with the viewport culler, and the state
+    of every canvas item that the culler (re)creates is set from its layer, so layers are restored correctly when the
+    map is redrawn.
+    """
+    def __init__(self,
+                 map_widget: tkmap.TkinterMapView,
+                 culler: ViewportCuller,
+                 spatial_index: SpatialIndex,
+                 z_order: ZOrderManager = None,
+                 max_hidden_layers: int = 8):
+        """
+        Parameters
+        ----------
+        map_widget: tkmap.TkinterMapView
+            Map widget containing the layers.
+        culler: mapping.culling.ViewportCuller
+            Viewport culler that creates and deletes the canvas items of the layers' polygons.
+        spatial_index: mapping.spatial.SpatialIndex
+            Spatial index containing the polygons of the visible layers.
+        z_order: mapping.zorder.ZOrderManager (default = None)
+            If provided, new canvas items are moved to the level named after their layer's group.
+        max_hidden_layers: int (default = 8)
+            Maximum number of hidden layers that are kept. The layer that was hidden first is removed when the limit is
+            exceeded.
+        """
+        self._map_widget = map_widget
+        self._culler = culler
+        self._spatial_index = spatial_index
+        self._z_order = z_order
+        self._layers = OrderedDict()  # {name: Layer}, ordered from least to most recently shown
+        self._polygon_layers = {}  # {id(polygon): Layer}
+        self._tags = count()
+        self.max_hidden_layers = max_hidden_layers
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._layers
+
+    def get_polygons(self, name: str) -> list[tkmap.map_widget.CanvasPolygon]:
+        """
+        Returns the polygons in a layer. The list is empty if the layer does not exist.
+        """
+        layer = self._layers.get(name)
+        return layer.polygons if layer is not None else []
+
+    def add_layer(self,
+                  name: str,
+                  polygons: list[tkmap.map_widget.CanvasPolygon],
+                  group: str,
+                  visible_state: str = 'normal') -> Layer:
+        """
+        Adds a hidden layer. An existing layer with the same name is replaced.
+
+        Parameters
+        ----------
+        name: str
+            Unique name of the layer.
+        polygons: list[tkmap.map_widget.CanvasPolygon]
+            Polygons in the layer.
+        group: str
+            Name of the group that the layer belongs to. The group is also used as the layer in the viewport culler and
+            spatial index.
+        visible_state: str (default = 'normal')
+            Canvas item state used while the layer is shown. Use 'disabled' for layers that should not receive clicks.
+        """
+        if name in self._layers:
+            self.remove_layer(name)
+
+        layer = Layer(name, polygons, group, f'layer{next(self._tags)}', visible_state)
+        self._layers[name] = layer
+        for polygon in polygons:
+            polygon.deleted = False  # polygons can be reused after their layer was removed
+            self._polygon_layers[id(polygon)] = layer
+            self._culler.add(polygon, polygon, layer=group, on_draw=self._on_draw)
+
+        return layer
+
+    def remove_layer(self, name: str) -> None:
+        """
+        Removes a layer and deletes the canvas items of its polygons. Nothing happens if the layer does not exist.
+        """
+        layer = self._layers.pop(name, None)
+        if layer is None:
+            return
+
+        for polygon in layer.polygons:
+            self._polygon_layers.pop(id(polygon), None)
+            self._spatial_index.remove(polygon)
+        self._culler.remove_many(layer.polygons)
+
+    def show(self, name: str) -> None:
+        """
+        Shows a layer and hides the other layers in its group.
+        """
+        layer = self._layers[name]
+        for other in self._layers.values():
+            if other is not layer and other.group == layer.group and other.visible:
+                self._set_visible(other, False)
+
+        self._set_visible(layer, True)
+        self._layers.move_to_end(name)
+        self._evict_hidden_layers()
+
+    def hide(self, name: str) -> None:
+        """
+        Hides a layer. Nothing happens if the layer does not exist.
+        """
+        layer = self._layers.get(name)
+        if layer is not None and layer.visible:
+            self._set_visible(layer, False)
+
+    def hide_group(self, group: str) -> int:
+        """
+        Hides all layers in a group.
+
+        Returns
+        -------
+        hidden: int
+            Number of layers that were hidden.
+        """
+        layers = [layer for layer in self._layers.values() if layer.group == group and layer.visible]
+        for layer in layers:
+            self._set_visible(layer, False)
+        return len(layers)
+
+    def _set_visible(self,
+                     layer: Layer,
+                     visible: bool) -> None:
+        """
+        Changes the state of all canvas items in a layer and adds/removes the layer's polygons in the spatial index.
+        """
+        layer.visible = visible
+        self._map_widget.canvas.itemconfig(layer.tag, state=layer.visible_state if visible else 'hidden')
+
+        for polygon in layer.polygons:
+            if visible:
+                self._spatial_index.insert(polygon, polygon.full_position_list, polygon, layer=layer.group)
+            else:
+                self._spatial_index.remove(polygon)
+
+        sys.stdout.write(f'[LayerManager] {"Showing" if visible else "Hiding"} layer: {layer.name}')
+
+    def _on_draw(self, polygon: tkmap.map_widget.CanvasPolygon) -> None:
+        """
+        Tags a new canvas item with its layer, sets its state from the layer's visibility, and moves it to its group's
+        stacking level.
+        """
+        layer = self._polygon_layers.get(id(polygon))
+        if layer is None:
+            return
+        if self._z_order is not None:
+            self._z_order.place(polygon.canvas_polygon, layer.group)
+        self._map_widget.canvas.addtag_withtag(layer.tag, polygon.canvas_polygon)
+        self._map_widget.canvas.itemconfig(polygon.canvas_polygon,
+                                           state=layer.visible_state if layer.visible else 'hidden')
+
+    def _evict_hidden_layers(self) -> None:
+        """
+        Removes the hidden layers that were shown least recently until at most 'max_hidden_layers' remain.
+        """
+        hidden = [name for name, layer in self._layers.items() if not layer.visible]
+        for name in hidden[:max(len(hidden) - self.max_hidden_layers, 0)]:
+            self.remove_layer(name)
@@ -0,0 +1,126 @@
+from collections import deque
+from debug.metrics import metrics
+from typing import Callable, Iterable
+import sys
+import threading
+import time
+
+
+class RenderBatch:
+    """
+    Group of canvas operations that were submitted together (e.g., all polygon changes from one alert update).
+    """
+    def __init__(self,
+                 operations: Iterable[Callable],
+                 name: str = None):
+        """
+        operations: Iterable[Callable]
+            Functions that are called on the main thread. Each function takes no arguments.
+        name: str (default = None)
+            Name of the batch. If provided, the time spent on the batch is written to the debug log once it is finished.
+        """
+        self.operations = deque(operations)
+        self.name = name
+        self.size = len(self.operations)
+        self.elapsed = 0  # time spent running the operations (seconds)
+        self.frames = 0  # number of frames that the batch was spread across
+
+
+class RenderQueue:
+    """
+    Thread-safe queue of canvas operations. Background threads submit operations, which are then run in batches on the
+    Tk main thread with a time budget for each frame so that the interface stays responsive.
+    """
+    def __init__(self,
+                 widget,
+                 frame_budget_ms: float = 12,
+                 interval_ms: int = 16):
+        """
+        Parameters
+        ----------
+        widget: tk.Widget
+            Widget used to schedule the queue on the Tk main thread (usually main.AlertDashboard).
+        frame_budget_ms: float (default = 12)
+            Maximum time (milliseconds) that can be spent running operations in a single frame. A batch that is not
+            finished within the budget is continued in the next frame.
+        interval_ms: int (default = 16)
+            Time between frames in milliseconds.
+        """
+        self._widget = widget
+        self._main_thread = threading.current_thread()
+        self._batches = deque()
+        self.frame_budget = frame_budget_ms / 1000
+        self.interval_ms = interval_ms
+        self._scheduled_at = None  # time.perf_counter() when the next frame was scheduled
+
+        self._widget.after(self.interval_ms, self._drain)
+
+    def is_main_thread(self) -> bool:
+        """
+        Returns True if called from the Tk main thread.
+        """
+        return threading.current_thread() is self._main_thread
+
+    def submit(self,
+               operations: Iterable[Callable],
+               name: str = None) -> None:
+        """
+        Adds a batch of operations to the queue. This method can be called from any thread.
+
+        Parameters
+        ----------
+        operations: Iterable[Callable]
+            Functions that will be called on the main thread. Each function takes no arguments.
+        name: str (default = None)
+            Name of the batch. If provided, the time spent on the batch is written to the debug log once it is finished.
+        """
+        batch = RenderBatch(operations, name)
+        if batch.size > 0:
+            self._batches.append(batch)
+
+    def flush(self) -> None:
+        """
+        Runs all queued operations immediately, ignoring the frame budget. This method must be called from the main
+        thread; it is used where there is no Tk event loop to drain the queue (e.g., headless replays).
+        """
+        self._run(float('inf'))
+
+    def _drain(self) -> None:
+        """
+        Runs queued operations until the queue is empty or the frame budget is used up, then schedules the next frame.
+        The delay of every frame (time past the scheduled interval, e.g., while the GIL is held by a feed update) is
+        recorded as 'RenderQueue.frame_delay'.
+        """
+        now = time.perf_counter()
+        if self._scheduled_at is not None:
+            metrics.record('RenderQueue.frame_delay', max(1000 * (now - self._scheduled_at) - self.interval_ms, 0),
+                           log=False)
+
+        self._run(now + self.frame_budget)
+        self._scheduled_at = time.perf_counter()
+        self._widget.after(self.interval_ms, self._drain)
+
+    def _run(self, deadline: float) -> None:
+        """
+        Runs queued operations until the queue is empty or the deadline (time.perf_counter()) is reached.
+        """
+        while self._batches and time.perf_counter() < deadline:
+            batch = self._batches[0]
+            batch.frames += 1
+            start = time.perf_counter()
+
+            while batch.operations and time.perf_counter() < deadline:
+                operation = batch.operations.popleft()
+                try:
+                    operation()
+                except Exception as e:
+                    sys.stderr.write(f'[RenderQueue] Error encountered while running {operation!r}: {e!r}')
+
+            batch.elapsed += time.perf_counter() - start
+
+            if not batch.operations:
+                self._batches.popleft()
+                if batch.name is not None:
+                    metrics.record(f'{batch.name}.draw', 1000 * batch.elapsed)
+                    sys.stdout.write(f'[RenderQueue] {batch.name}: {batch.size} operation(s) took '
+                                     f'{1000 * batch.elapsed:.1f} ms over {batch.frames} frame(s)')
@@ -0,0 +1,139 @@
+import numpy as np
+import tkintermapview as tkmap
+
+
+MIN_ZOOM = 6  # levels of detail are built for zoom levels MIN_ZOOM to MAX_ZOOM (same limits as the map widget)
+MAX_ZOOM = 12
+
+
+def zoom_tolerance(zoom: int,
+                   pixel_tolerance: float = 0.5,
+                   tile_size: int = 256) -> float:
+    """
+    Returns the simplification tolerance (degrees) for a zoom level.
+
+    Parameters
+    ----------
+    zoom: int
+        Map zoom level.
+    pixel_tolerance: float (default = 0.5)
+        Maximum distance (pixels) that a simplified polygon edge can be from the removed vertices.
+    tile_size: int (default = 256)
+        Size of the map tiles in pixels.
+    """
+    return pixel_tolerance * 360 / (tile_size * 2 ** zoom)
+
+
+def douglas_peucker_importance(coordinates) -> np.ndarray:
+    """
+    Runs the Douglas-Peucker algorithm once over an entire polygon ring and returns the 'importance' of every vertex,
+    which is the largest tolerance at which the vertex is kept. The splits are processed one at a time in a Python loop
+    (only the point-to-baseline distances of each split are computed with numpy), but the loop runs once per ring
+    instead of once per zoom level: simplifying the ring with any tolerance is then a single vectorized comparison
+    (importance >= tolerance).
+
+    coordinates: array-like with shape (N, 2)
+        Polygon vertices as (lat, lon) pairs.
+    """
+    points = np.asarray(coordinates, dtype=np.float64)
+    n_points = len(points)
+    importance = np.full(n_points, np.inf)
+    if n_points <= 4:
+        return importance
+
+    importance[1:-1] = 0
+
+    if np.array_equal(points[0], points[-1]):
+        # closed ring: split at the vertex farthest from the first vertex so that both halves have a proper baseline
+        farthest = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        importance[farthest] = np.inf
+        stack = [(0, farthest, np.inf), (farthest, n_points - 1, np.inf)]
+    else:
+        stack = [(0, n_points - 1, np.inf)]
+
+    while stack:
+        start, end, parent_importance = stack.pop()
+        if end - start < 2:
+            continue
+
+        segment = points[start + 1:end]
+        baseline = points[end] - points[start]
+        offsets = segment - points[start]
+        baseline_length = np.hypot(*baseline)
+        if baseline_length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(baseline[0] * offsets[:, 1] - baseline[1] * offsets[:, 0]) / baseline_length
+
+        farthest = int(np.argmax(distances))
+        index = start + 1 + farthest
+        vertex_importance = min(distances[farthest], parent_importance)  # a vertex cannot outlive its parent segment
+        importance[index] = vertex_importance
+
+        stack.append((start, index, vertex_importance))
+        stack.append((index, end, vertex_importance))
+
+    return importance
+
+
+class SimplifiedPolygon(tkmap.map_widget.CanvasPolygon):
+    """
+    Canvas polygon that is drawn with a level of detail matched to the current zoom. The Douglas-Peucker importance of
+    every vertex is computed once per polygon and the simplified vertex list for each zoom level is cached, so zooming
+    only re-projects the vertices that are visible at that zoom.
+    """
+    def __init__(self,
+                 map_widget: tkmap.TkinterMapView,
+                 position_list: list,
+                 pixel_tolerance: float = 0.5,
+                 **kwargs):
+        """
+        Parameters
+        ----------
+        map_widget: tkmap.TkinterMapView
+            Map widget that the polygon is drawn on.
+        position_list: list
+            Full-resolution polygon vertices as (lat, lon) pairs.
+        pixel_tolerance: float (default = 0.5)
+            Maximum distance (pixels) that a simplified polygon edge can be from the removed vertices.
+        **kwargs
+            Keyword arguments passed to tkintermapview.map_widget.CanvasPolygon.
+        """
+        super().__init__(map_widget, position_list, **kwargs)
+        self.pixel_tolerance = pixel_tolerance
+        self.set_position_list(position_list)
+
+    def set_position_list(self, position_list: list) -> None:
+        """
+        Replaces the full-resolution vertices of the polygon and clears the cached levels of detail. The polygon is not
+        redrawn.
+        """
+        self.full_position_list = position_list
+        self.position_list = position_list
+        self._importance = None
+        self._levels = {}  # {zoom: simplified vertex list}
+
+    def level_of_detail(self, zoom: int) -> list:
+        """
+        Returns the simplified vertices of the polygon for a zoom level.
+        """
+        zoom = min(max(round(zoom), MIN_ZOOM), MAX_ZOOM)
+        if zoom not in self._levels:
+            if self._importance is None:
+                self._importance = douglas_peucker_importance(self.full_position_list)
+
+            keep = self._importance >= zoom_tolerance(zoom, self.pixel_tolerance, self.map_widget.tile_size)
+            if np.count_nonzero(keep) < 4:
+                keep = np.zeros(len(self._importance), dtype=bool)
+                keep[np.sort(np.argsort(self._importance)[-4:])] = True
+
+            self._levels[zoom] = np.asarray(self.full_position_list, dtype=np.float64)[keep].tolist()
+
+        return self._levels[zoom]
+
+    def draw(self, move: bool = False) -> None:
+        """
+        Draws the polygon using the level of detail for the current zoom.
+        """
+        self.position_list = self.level_of_detail(self.map_widget.zoom)
+        super().draw(move=move)
@@ -0,0 +1,254 @@
+from collections import defaultdict
+import math
+import numpy as np
+
+
+def bounding_box(coordinates) -> tuple[float, float, float, float]:
+    """
+    Returns the bounding box of a polygon.
+
+    coordinates: array-like with shape (N, 2)
+        Polygon vertices as (lat, lon) pairs.
+
+    Returns
+    -------
+    bbox: tuple[float, float, float, float]
+        (min lat, min lon, max lat, max lon)
+    """
+    ring = np.asarray(coordinates, dtype=np.float64)
+    min_lat, min_lon = ring.min(axis=0)
+    max_lat, max_lon = ring.max(axis=0)
+    return float(min_lat), float(min_lon), float(max_lat), float(max_lon)
+
+
+def point_in_polygon(lat: float,
+                     lon: float,
+                     coordinates,
+                     ring_offsets=None) -> bool:
+    """
+    Vectorized even-odd (ray casting) test that checks whether a point is inside a polygon. All polygon edges are
+    tested at once. Because the even-odd rule is used, points inside holes are correctly treated as outside of the
+    polygon.
+
+    Parameters
+    ----------
+    lat: float
+        Latitude of the point.
+    lon: float
+        Longitude of the point.
+    coordinates: array-like with shape (N, 2)
+        Polygon vertices as (lat, lon) pairs. Rings do not need to be closed.
+    ring_offsets: array-like (default = None)
+        Start index of every ring in 'coordinates', followed by N. If None, the coordinates are a single ring.
+    """
+    ring = np.asarray(coordinates, dtype=np.float64)
+    y1, x1 = ring[:, 0], ring[:, 1]
+    if ring_offsets is None:
+        y2, x2 = np.roll(y1, -1), np.roll(x1, -1)
+    else:
+        ring_offsets = np.asarray(ring_offsets)
+        next_vertex = np.arange(1, len(ring) + 1)
+        next_vertex[ring_offsets[1:] - 1] = ring_offsets[:-1]  # the last vertex of each ring connects to its first
+        y2, x2 = y1[next_vertex], x1[next_vertex]
+
+    crosses = (y1 > lat) != (y2 > lat)  # edges that cross the horizontal line through the point
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_intersect = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+
+    return bool(np.count_nonzero(crosses & (lon < x_intersect)) % 2)
+
+
+class SpatialIndexEntry:
+    """
+    Polygon saved in a SpatialIndex.
+    """
+    def __init__(self,
+                 key,
+                 coordinates,
+                 item,
+                 layer: str,
+                 ring_offsets=None):
+        """
+        key: unique identifier of the polygon.
+        coordinates: polygon vertices as (lat, lon) pairs.
+        item: object returned when the polygon is found by a query (e.g., noaa.nws.alerts.NWSAlert).
+        layer: name of the layer that the polygon belongs to (e.g., 'alerts' or 'outlooks').
+        ring_offsets: start index of every ring in 'coordinates' followed by the number of vertices, for polygons with
+            holes. If None, the coordinates are a single ring.
+        """
+        self.key = key
+        self.ring = np.asarray(coordinates, dtype=np.float64)
+        self.ring_offsets = ring_offsets
+        self.bbox = bounding_box(self.ring)
+        self.item = item
+        self.layer = layer
+
+
+class SpatialIndex:
+    """
+    Grid-bucket spatial index over polygon bounding boxes. Each polygon is saved in every grid cell that its bounding
+    box touches, so a point query only needs to check the polygons in a single cell.
+    """
+    def __init__(self, cell_size: float = 1.0):
+        """
+        cell_size: float (default = 1.0)
+            Size of the grid cells in degrees.
+        """
+        self.cell_size = cell_size
+        self._entries = {}  # {key: SpatialIndexEntry}
+        self._cells = defaultdict(set)  # {(lat cell, lon cell): set of keys}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def insert(self,
+               key,
+               coordinates,
+               item=None,
+               layer: str = 'alerts',
+               ring_offsets=None) -> None:
+        """
+        Adds a polygon to the index. A polygon that already exists with the same key is replaced.
+
+        Parameters
+        ----------
+        key: Any
+            Unique identifier of the polygon.
+        coordinates: array-like with shape (N, 2)
+            Polygon vertices as (lat, lon) pairs.
+        item: Any (default = None)
+            Object returned when the polygon is found by a query.
+        layer: str (default = 'alerts')
+            Name of the layer that the polygon belongs to.
+        ring_offsets: array-like (default = None)
+            Start index of every ring in 'coordinates' followed by the number of vertices, for polygons with holes. If
+            None, the coordinates are a single ring.
+        """
+        if key in self._entries:
+            self.remove(key)
+
+        entry = SpatialIndexEntry(key, coordinates, item, layer, ring_offsets)
+        self._entries[key] = entry
+        for cell in self._cells_in_bbox(entry.bbox):
+            self._cells[cell].add(key)
+
+    def remove(self, key) -> None:
+        """
+        Removes a polygon from the index. Nothing happens if the key is not in the index.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for cell in self._cells_in_bbox(entry.bbox):
+            keys = self._cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._cells[cell]
+
+    def clear(self, layer: str = None) -> None:
+        """
+        Removes all polygons from the index.
+
+        layer: str (default = None)
+            If provided, only polygons in this layer are removed.
+        """
+        if layer is None:
+            self._entries.clear()
+            self._cells.clear()
+        else:
+            for key in [key for key, entry in self._entries.items() if entry.layer == layer]:
+                self.remove(key)
+
+    def query_point(self,
+                    lat: float,
+                    lon: float,
+                    layer: str = None) -> list:
+        """
+        Finds all polygons that contain a point.
+
+        Parameters
+        ----------
+        lat: float
+            Latitude of the point.
+        lon: float
+            Longitude of the point.
+        layer: str (default = None)
+            If provided, only polygons in this layer are returned.
+
+        Returns
+        -------
+        items: list
+            Items of the polygons that contain the point.
+        """
+        cell = (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+        items = []
+        for key in self._cells.get(cell, ()):
+            entry = self._entries[key]
+            min_lat, min_lon, max_lat, max_lon = entry.bbox
+            if layer is not None and entry.layer != layer:
+                continue
+            if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                continue
+            if point_in_polygon(lat, lon, entry.ring, entry.ring_offsets):
+                items.append(entry.item)
+
+        return items
+
+    def get_bbox(self, key) -> tuple[float, float, float, float] | None:
+        """
+        Returns the bounding box of a polygon as (min lat, min lon, max lat, max lon), or None if the key is not in the
+        index.
+        """
+        entry = self._entries.get(key)
+        return entry.bbox if entry is not None else None
+
+    def query_bbox(self,
+                   bbox: tuple[float, float, float, float],
+                   layer: str = None) -> list:
+        """
+        Finds all polygons whose bounding boxes intersect a bounding box.
+
+        Parameters
+        ----------
+        bbox: tuple[float, float, float, float]
+            (min lat, min lon, max lat, max lon)
+        layer: str (default = None)
+            If provided, only polygons in this layer are returned.
+
+        Returns
+        -------
+        items: list
+            Items of the polygons that intersect the bounding box.
+        """
+        min_lat, min_lon, max_lat, max_lon = bbox
+
+        keys = set()
+        for cell in self._cells_in_bbox(bbox):
+            keys.update(self._cells.get(cell, ()))
+
+        items = []
+        for key in keys:
+            entry = self._entries[key]
+            if layer is not None and entry.layer != layer:
+                continue
+            entry_min_lat, entry_min_lon, entry_max_lat, entry_max_lon = entry.bbox
+            if entry_min_lat <= max_lat and entry_max_lat >= min_lat and \
+                    entry_min_lon <= max_lon and entry_max_lon >= min_lon:
+                items.append(entry.item)
+
+        return items
+
+    def _cells_in_bbox(self, bbox: tuple[float, float, float, float]) -> list[tuple[int, int]]:
+        """
+        Returns the grid cells touched by a bounding box.
+        """
+        min_lat, min_lon, max_lat, max_lon = bbox
+        lat_cells = range(math.floor(min_lat / self.cell_size), math.floor(max_lat / self.cell_size) + 1)
+        lon_cells = range(math.floor(min_lon / self.cell_size), math.floor(max_lon / self.cell_size) + 1)
+        return [(i, j) for i in lat_cells for j in lon_cells]
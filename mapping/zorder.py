@@ -0,0 +1,44 @@
+import tkinter as tk
+
+
+class ZOrderManager:
+    """
+    Keeps canvas items stacked by level (e.g., alert priority). Every level has a hidden sentinel item with its own
+    tag, and the sentinels are stacked in level order. A new item is moved just below the sentinel of its level with a
+    single tag_lower call, which places it above all items of less important levels and below all items of more
+    important levels, no matter when it was created. The sentinels are tagged 'polygon' so that tkintermapview's
+    manage_z_order (which lifts all 'polygon' items) keeps them in the same relative order as the polygons.
+    """
+    def __init__(self,
+                 canvas: tk.Canvas,
+                 levels: list):
+        """
+        canvas: tk.Canvas
+            Canvas containing the items.
+        levels: list
+            Levels ordered from the bottom of the stack to the top (e.g., ['outlooks', 101, 39, 5, 4, 2]).
+        """
+        self._canvas = canvas
+        self._tags = {}  # {level: tag of the level's sentinel}
+        for index, level in enumerate(levels):
+            tag = f'zorder{index}'
+            self._canvas.create_line(0, 0, 0, 0, state='hidden', tags=('polygon', tag))
+            self._tags[level] = tag
+
+    def __contains__(self, level) -> bool:
+        return level in self._tags
+
+    def place(self, item, level) -> None:
+        """
+        Moves a canvas item to the top of its level. Nothing happens if the level is unknown.
+
+        Parameters
+        ----------
+        item: int or str
+            Canvas item ID or tag.
+        level: Any
+            Level of the item.
+        """
+        tag = self._tags.get(level)
+        if tag is not None:
+            self._canvas.tag_lower(item, tag)
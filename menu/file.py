@@ -1,5 +1,14 @@
-import tkinter as tk
+from noaa.engine import ALERT_INTERVAL_BOUNDS
+from noaa.nws.feed import AlertFeed
 from widgets.settings import SettingsWidget
+import tkinter as tk
+
+
+# warning update frequency options: {label: (shortest, longest) interval in seconds}
+ALERT_UPDATE_FREQUENCIES = {'Adaptive': ALERT_INTERVAL_BOUNDS,
+                            'Every 10 Seconds': (10, 10),
+                            'Every 30 Seconds': (30, 30),
+                            'Every 60 Seconds': (60, 60)}
 
 
 class FileMenu(tk.Menu):
@@ -13,4 +22,19 @@ class FileMenu(tk.Menu):
         super().__init__(master=dashboard, tearoff=False)
         self.dashboard = dashboard
         self.add_command(label="Exit", command=lambda: self.dashboard.destroy())
-        self.add_command(label="Settings", command=lambda: SettingsWidget(self.dashboard))
\ No newline at end of file
+        self.add_command(label="Settings", command=lambda: SettingsWidget(self.dashboard))
+
+        # warning updates are adaptive by default, but can be set to a fixed frequency
+        self._frequency_variable = tk.StringVar(master=dashboard, value='Adaptive')
+        frequency_menu = tk.Menu(self, tearoff=False)
+        for label in ALERT_UPDATE_FREQUENCIES:
+            frequency_menu.add_radiobutton(label=label, value=label, variable=self._frequency_variable,
+                                           command=self._set_alert_update_frequency)
+        self.add_cascade(label="Warning Update Frequency", menu=frequency_menu)
+
+    def _set_alert_update_frequency(self):
+        """
+        Internal method that applies the selected warning update frequency.
+        """
+        min_interval, max_interval = ALERT_UPDATE_FREQUENCIES[self._frequency_variable.get()]
+        self.dashboard.engine.set_interval_bounds(AlertFeed.name, min_interval, max_interval)
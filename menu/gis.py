@@ -17,7 +17,15 @@ class GISMenu(tk.Menu):
         self._fire_outlook_cascade()
 
         self.add_separator()
-        self.add_command(label='Clear Outlook Polygons', command=lambda: self.dashboard.destroy_all_outlook_polygons())
+        self.add_command(label='Clear Outlook Polygons', command=self._clear_outlook_polygons)
+
+    def _clear_outlook_polygons(self):
+        """
+        Internal method that removes the outlook polygons from the map, including the saved outlook that is drawn on
+        startup.
+        """
+        self.dashboard.hide_outlook_layers()
+        self.dashboard.snapshots.delete('spc-outlook')
 
     def _convective_outlook_cascade(self):
         """
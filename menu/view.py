@@ -0,0 +1,40 @@
+from noaa.nws.alerts import DEFAULT_ALERT_PROPERTIES
+from noaa.nws.filter import AlertFilter
+import tkinter as tk
+
+
+class ViewMenu(tk.Menu):
+    """
+    Menu that gives options for choosing which alerts are shown on the map.
+    """
+    def __init__(self, dashboard):
+        """
+        dashboard: main.AlertDashboard instance
+        """
+        super().__init__(master=dashboard, tearoff=False)
+        self.dashboard = dashboard
+
+        # one checkbutton for each alert type, ordered by priority
+        self._type_variables = {}
+        for alert_type in sorted(DEFAULT_ALERT_PROPERTIES, key=lambda name: DEFAULT_ALERT_PROPERTIES[name][0]):
+            variable = tk.BooleanVar(master=dashboard, value=True)
+            self._type_variables[alert_type] = variable
+            self.add_checkbutton(label=alert_type, variable=variable, command=self._apply_filter)
+
+        self.add_separator()
+        self.add_command(label='Show All Alerts', command=self._show_all_alerts)
+
+    def _apply_filter(self):
+        """
+        Internal method that shows only the alert types that are checked.
+        """
+        types = {alert_type for alert_type, variable in self._type_variables.items() if variable.get()}
+        self.dashboard.alerts.set_filter(AlertFilter(types=types if len(types) < len(self._type_variables) else None))
+
+    def _show_all_alerts(self):
+        """
+        Internal method that checks all alert types and removes the alert filter.
+        """
+        for variable in self._type_variables.values():
+            variable.set(True)
+        self.dashboard.alerts.set_filter(AlertFilter())
@@ -1,3 +1,4 @@
+from widgets.performance import PerformanceWidget
 import tkinter as tk
 
 
@@ -10,4 +11,7 @@ class WindowsMenu(tk.Menu):
         dashboard: main.AlertDashboard instance
         """
         super().__init__(master=dashboard, tearoff=False)
-        self.add_command(label="Show Warnings Window")
\ No newline at end of file
+        self.dashboard = dashboard
+        self.performance_window = PerformanceWidget(dashboard)
+        self.add_command(label="Show Warnings Window")
+        self.add_command(label="Show Performance Window", command=self.performance_window.show)
@@ -0,0 +1,272 @@
+"""
+asyncio polling for the NOAA feeds. AsyncScheduler runs every feed as a task on an event loop in a dedicated thread,
+so the feeds are polled concurrently without a thread for each feed, and can be cancelled at any time.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from noaa.fetch import AsyncConditionalFetcher
+from noaa.polling import AdaptiveInterval
+from noaa.scheduler import ScheduledFeed
+from requests.adapters import HTTPAdapter
+from threading import Thread
+from typing import Callable
+import asyncio
+import concurrent.futures
+import math
+import requests
+import sys
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncScheduler:
+    """
+    Runs the updates for all NOAA feeds as tasks on an asyncio event loop. The scheduler has the same interface as
+    noaa.scheduler.FetchScheduler, so it can be used by noaa.engine.FeedEngine and noaa.spc.cache.OutlookCache.
+
+    Requests are sent with aiohttp when it is installed (see noaa.fetch.AsyncConditionalFetcher), otherwise with a
+    shared requests session on the loop's worker threads. Updates that are not coroutine functions (and the CPU-bound
+    parts of the feed updates) also run on the worker threads, so the event loop is never blocked.
+
+    Feeds are scheduled without drift: update n of a feed is due 'interval * n' seconds after its first update, no
+    matter how long the previous updates took. If an update takes longer than the interval, the updates that were
+    missed are skipped instead of being run back to back. With an adaptive interval (noaa.polling.AdaptiveInterval),
+    each update is due one (adjusted) interval after the time the previous update was due. Feeds update until they
+    are removed or the scheduler is stopped, unless a maximum number of updates is given.
+    """
+    def __init__(self,
+                 max_workers: int = 4,
+                 max_backoff: float = 300,
+                 pool_maxsize: int = 4):
+        """
+        Parameters
+        ----------
+        max_workers: int (default = 4)
+            Number of worker threads used for blocking requests and for decoding the feeds.
+        max_backoff: float (default = 300)
+            Maximum delay between updates (seconds) for a feed that keeps failing.
+        pool_maxsize: int (default = 4)
+            Maximum number of keep-alive connections saved for each host.
+        """
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='noaa-fetch')
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(self._executor)
+        self._tasks = {}  # {ScheduledFeed: asyncio.Task}, only used on the loop thread
+        self._stopped = False
+
+        self._thread = Thread(target=self._run_loop, name='noaa-asyncio-thread', daemon=True)
+        self._thread.start()
+
+        # the aiohttp session must be created on the event loop
+        self.client = asyncio.run_coroutine_threadsafe(self._create_client(pool_maxsize), self.loop).result() \
+            if aiohttp is not None else None
+
+    def create_fetcher(self, name: str) -> AsyncConditionalFetcher:
+        """
+        Returns a conditional fetcher that uses the shared sessions.
+
+        name: str
+            Identifier used by the fetcher when writing to the debug log.
+        """
+        return AsyncConditionalFetcher(name=name, session=self.session, client=self.client)
+
+    def add_feed(self,
+                 name: str,
+                 callback: Callable,
+                 interval: float,
+                 timeout: float = 30,
+                 max_runs: int = None,
+                 delay: float = 0,
+                 polling: AdaptiveInterval = None) -> ScheduledFeed:
+        """
+        Adds a feed that is updated periodically on the event loop.
+
+        Parameters
+        ----------
+        name: str
+            Name of the feed.
+        callback: Callable
+            Function or coroutine function that performs a single update of the feed. The feed's timeout (seconds) is
+            passed as the only argument. Functions are run on a worker thread.
+        interval: float
+            Time between updates in seconds.
+        timeout: float (default = 30)
+            Request timeout in seconds.
+        max_runs: int (default = None)
+            Maximum number of updates. If None, the feed will update until it is removed or the scheduler is stopped.
+        delay: float (default = 0)
+            Delay before the first update in seconds.
+        polling: noaa.polling.AdaptiveInterval (default = None)
+            Policy that adjusts the interval after every update (see noaa.scheduler.ScheduledFeed). If provided,
+            'interval' is replaced by the policy's interval.
+
+        Returns
+        -------
+        feed: noaa.scheduler.ScheduledFeed
+            The scheduled feed, which can be passed to AsyncScheduler.remove_feed.
+        """
+        feed = ScheduledFeed(name, callback, interval, timeout, max_runs, polling)
+        sys.stdout.write(f'[AsyncScheduler] Adding feed: {name}. interval={feed.interval}, timeout={timeout}, '
+                         f'max_runs={max_runs}, adaptive={polling is not None}')
+        self.loop.call_soon_threadsafe(self._start_feed, feed, delay)
+        return feed
+
+    def remove_feed(self, feed: ScheduledFeed) -> None:
+        """
+        Stops future updates of a feed. An update that is waiting for a response is cancelled; work that is already
+        running on a worker thread (e.g., decoding) is finished, but its result is discarded.
+        """
+        feed.cancelled = True
+        if not self._stopped:
+            self.loop.call_soon_threadsafe(self._cancel_feed, feed)
+
+    def submit(self,
+               name: str,
+               callback: Callable,
+               timeout: float = 30) -> Future:
+        """
+        Runs a one-time task on the event loop.
+
+        Parameters
+        ----------
+        name: str
+            Name of the task.
+        callback: Callable
+            Function or coroutine function to run. The timeout is passed as the only argument.
+        timeout: float (default = 30)
+            Request timeout in seconds.
+        """
+        return asyncio.run_coroutine_threadsafe(self._run_task(name, callback, timeout), self.loop)
+
+    def stop(self) -> None:
+        """
+        Cancels all feeds, closes the sessions, and stops the event loop.
+        """
+        if self._stopped:
+            return
+        self._stopped = True
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5)
+        except concurrent.futures.TimeoutError:
+            sys.stderr.write('[AsyncScheduler] Timed out while cancelling the feeds.')
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+
+    def _run_loop(self) -> None:
+        """
+        Event loop thread.
+        """
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def _start_feed(self,
+                    feed: ScheduledFeed,
+                    delay: float) -> None:
+        """
+        Creates the task that polls a feed (called on the loop thread).
+        """
+        if feed.cancelled or self._stopped:
+            return
+        task = self.loop.create_task(self._poll(feed, delay), name=f'noaa-feed-{feed.name}')
+        self._tasks[feed] = task
+        task.add_done_callback(lambda _: self._tasks.pop(feed, None))
+
+    def _cancel_feed(self, feed: ScheduledFeed) -> None:
+        """
+        Cancels the task that polls a feed (called on the loop thread).
+        """
+        task = self._tasks.get(feed)
+        if task is not None:
+            task.cancel()
+
+    async def _poll(self,
+                    feed: ScheduledFeed,
+                    delay: float) -> None:
+        """
+        Updates a feed until it is cancelled or has reached its maximum number of updates. Failed updates are retried
+        after the delay requested by the server (Retry-After) or with a jittered exponential backoff.
+        """
+        next_update = self.loop.time() + delay
+        while True:
+            await asyncio.sleep(max(next_update - self.loop.time(), 0))
+            if feed.cancelled:
+                return
+
+            feed.running = True
+            error = result = None
+            try:
+                result = await self._run_task(feed.name, feed.callback, feed.timeout)
+            except Exception as e:
+                error = e
+                feed.failures += 1
+            else:
+                feed.failures = 0
+            finally:
+                feed.running = False
+            feed.runs += 1
+
+            if feed.max_runs is not None and feed.runs >= feed.max_runs:
+                sys.stdout.write(f'[AsyncScheduler] {feed.name} stopped after {feed.runs} update(s).')
+                return
+
+            now = self.loop.time()
+            if error is not None:
+                retry_delay = feed.retry_delay(error, self.max_backoff)
+                sys.stderr.write(f'[AsyncScheduler] {feed.name} update failed ({feed.failures} in a row). '
+                                 f'Retrying in {retry_delay:.1f} seconds.')
+                next_update = now + retry_delay
+            else:
+                interval = feed.next_interval(result)
+                next_update += interval
+                if next_update < now:
+                    # the update took longer than the interval, so the updates that were missed are skipped
+                    next_update += math.ceil((now - next_update) / interval) * interval
+
+    async def _shutdown(self) -> None:
+        """
+        Cancels all feeds and tasks and closes the aiohttp session (called on the loop thread).
+        """
+        tasks = [task for task in asyncio.all_tasks(self.loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self.client is not None:
+            await self.client.close()
+
+    @staticmethod
+    async def _create_client(pool_maxsize: int):
+        """
+        Creates the aiohttp session used by the fetchers (called on the loop thread).
+        """
+        return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit_per_host=pool_maxsize))
+
+    @staticmethod
+    async def _run_task(name: str,
+                        callback: Callable,
+                        timeout: float):
+        """
+        Runs a feed update, writing any error to the debug log before re-raising it.
+        """
+        try:
+            if asyncio.iscoroutinefunction(callback):
+                return await callback(timeout)
+            return await asyncio.to_thread(callback, timeout)
+        except Exception as e:
+            sys.stderr.write(f'[AsyncScheduler] Error encountered while updating {name}: {e!r}')
+            raise
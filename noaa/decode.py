@@ -0,0 +1,146 @@
+"""
+JSON decoding for the NOAA feeds. The fastest available decoder is used:
+    - msgspec: typed decoding into a schema containing only the fields that are used, so unused properties are never
+      converted into Python objects
+    - orjson: fast decoding of the full document
+    - json (standard library)
+"""
+import json
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if msgspec is not None:
+    DECODER = 'msgspec'
+elif orjson is not None:
+    DECODER = 'orjson'
+else:
+    DECODER = 'json'
+
+
+# NWSAlert keyword arguments and the alert properties that they are read from
+ALERT_PROPERTIES = {'alert_type': 'event',
+                    'time_sent': 'sent',
+                    'time_effective': 'effective',
+                    'time_onset': 'onset',
+                    'time_expires': 'expires',
+                    'parameters': 'parameters',
+                    'sender': 'senderName',
+                    'headline': 'headline',
+                    'description': 'description'}
+
+# SPCOutlookPolygon arguments and the outlook properties that they are read from
+OUTLOOK_PROPERTIES = {'label': 'LABEL',
+                      'name': 'LABEL2',
+                      'valid_time': 'VALID',
+                      'expire_time': 'EXPIRE',
+                      'issue_time': 'ISSUE',
+                      'stroke': 'stroke'}
+
+
+if msgspec is not None:
+
+    class _AlertProperties(msgspec.Struct):
+        event: str
+        eventCode: dict
+        sent: str | None = None
+        effective: str | None = None
+        onset: str | None = None
+        expires: str | None = None
+        parameters: dict = {}
+        senderName: str | None = None
+        headline: str | None = None
+        description: str | None = None
+
+    class _AlertFeature(msgspec.Struct):
+        id: str
+        properties: _AlertProperties
+        geometry: dict | None = None
+
+    class _AlertCollection(msgspec.Struct):
+        features: list[_AlertFeature]
+
+    class _OutlookProperties(msgspec.Struct):
+        LABEL: str | None = None
+        LABEL2: str | None = None
+        VALID: str | None = None
+        EXPIRE: str | None = None
+        ISSUE: str | None = None
+        stroke: str | None = None
+
+    class _OutlookFeature(msgspec.Struct):
+        properties: _OutlookProperties
+        geometry: dict | None = None
+
+    class _OutlookCollection(msgspec.Struct):
+        features: list[_OutlookFeature]
+
+    _alert_decoder = msgspec.json.Decoder(_AlertCollection)
+    _outlook_decoder = msgspec.json.Decoder(_OutlookCollection)
+
+
+def loads(content: bytes):
+    """
+    Decodes a JSON document with the fastest available decoder.
+    """
+    if msgspec is not None:
+        return msgspec.json.decode(content)
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def decode_alerts(content: bytes) -> list[dict]:
+    """
+    Decodes the response from the NWS 'alerts/active' endpoint.
+
+    content: bytes
+        Raw response content.
+
+    Returns
+    -------
+    alerts: list[dict]
+        Keyword arguments for noaa.nws.alerts.NWSAlert, one dictionary for each alert.
+    """
+    if msgspec is not None:
+        return [{'alert_id': feature.id,
+                 'alert_code': feature.properties.eventCode['NationalWeatherService'][0],
+                 'geometry': feature.geometry,
+                 **{kwarg: getattr(feature.properties, prop) for kwarg, prop in ALERT_PROPERTIES.items()}}
+                for feature in _alert_decoder.decode(content).features]
+
+    return [{'alert_id': feature['id'],
+             'alert_code': feature['properties']['eventCode']['NationalWeatherService'][0],
+             'geometry': feature['geometry'],
+             **{kwarg: feature['properties'].get(prop) for kwarg, prop in ALERT_PROPERTIES.items()}}
+            for feature in loads(content)['features']]
+
+
+def decode_outlook(content: bytes) -> list[dict]:
+    """
+    Decodes an SPC outlook GeoJSON file.
+
+    content: bytes
+        Raw response content.
+
+    Returns
+    -------
+    features: list[dict]
+        One dictionary for each outlook feature, containing the keys in OUTLOOK_PROPERTIES and 'geometry'.
+    """
+    if msgspec is not None:
+        return [{'geometry': feature.geometry,
+                 **{key: getattr(feature.properties, prop) for key, prop in OUTLOOK_PROPERTIES.items()}}
+                for feature in _outlook_decoder.decode(content).features]
+
+    return [{'geometry': feature['geometry'],
+             **{key: feature['properties'].get(prop) for key, prop in OUTLOOK_PROPERTIES.items()}}
+            for feature in loads(content)['features']]
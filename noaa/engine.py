@@ -0,0 +1,211 @@
+"""
+Headless processing core for the NOAA feeds. The engine polls the feeds (fetch, parse, and diff) and emits every change
+as a noaa.events.ChangeEvent to its subscribers. It does not use Tk or the map widget, so it can run without a display
+(e.g., for benchmarks or in a separate process) and a single engine can drive several front-ends.
+
+Usage (prints the events of a headless engine until interrupted):
+    python -m noaa.engine
+"""
+from noaa.aio import AsyncScheduler
+from noaa.events import ChangeEvent
+from noaa.ingest import ProcessIngest
+from noaa.nws.feed import AlertFeed
+from noaa.polling import AdaptiveInterval
+from noaa.scheduler import FetchScheduler
+from noaa.snapshot import SnapshotStore
+from noaa.spc.cache import OutlookCache
+from noaa.spc.feed import ReportFeed
+from threading import Lock
+from typing import Callable
+import os
+import sys
+import time
+
+
+# (shortest, longest) intervals in seconds of the adaptive alert and report updates
+ALERT_INTERVAL_BOUNDS = (5, 60)
+REPORT_INTERVAL_BOUNDS = (30, 300)
+
+
+class FeedEngine:
+    """
+    Polls the NWS alerts and SPC storm reports, caches the SPC outlooks, and passes the changes to subscribers.
+
+    Subscribers are called on the scheduler's worker threads, also when the feeds are polled by a
+    noaa.aio.AsyncScheduler (or on the calling thread for snapshots restored by FeedEngine.start), so front-ends that
+    draw on a Tk canvas must hand the changes to the main thread (e.g., with a mapping.render.RenderQueue).
+    """
+    def __init__(self,
+                 scheduler: FetchScheduler = None,
+                 snapshots: SnapshotStore = None,
+                 ingest: ProcessIngest = None):
+        """
+        scheduler: noaa.scheduler.FetchScheduler or noaa.aio.AsyncScheduler instance that runs the updates. If None, a
+            new FetchScheduler is created.
+        snapshots: noaa.snapshot.SnapshotStore instance. If None, alerts and reports are not saved between sessions.
+        ingest: noaa.ingest.ProcessIngest instance that decodes the alerts and reports in worker processes. If None,
+            they are decoded on the scheduler's worker threads.
+        """
+        self.scheduler = scheduler if scheduler is not None else FetchScheduler()
+        self.snapshots = snapshots
+        self.ingest = ingest
+        self._subscribers = []  # [(callback, set of feed names or None)]
+        self._lock = Lock()
+        self._feeds = {}  # {feed name: ScheduledFeed}
+        self.polling = {}  # {feed name: noaa.polling.AdaptiveInterval} of the adaptive feeds
+
+        self.alerts = AlertFeed(self.scheduler.create_fetcher('NWSAlerts'), self.emit, snapshots, ingest)
+        self.reports = ReportFeed(self.scheduler.create_fetcher('SPCReports'), self.emit, snapshots, ingest)
+        self.outlooks = OutlookCache(self.scheduler, emit=self.emit)
+
+    def subscribe(self,
+                  callback: Callable[[ChangeEvent], None],
+                  feeds: list[str] = None) -> None:
+        """
+        Adds a subscriber.
+
+        Parameters
+        ----------
+        callback: Callable
+            Function called with every ChangeEvent.
+        feeds: list[str] (default = None)
+            Names of the feeds that the subscriber receives events from ('nws-alerts', 'spc-reports', 'spc-outlook').
+            If None, events from all feeds are received.
+        """
+        with self._lock:
+            self._subscribers.append((callback, set(feeds) if feeds is not None else None))
+
+    def unsubscribe(self, callback: Callable[[ChangeEvent], None]) -> None:
+        """
+        Removes a subscriber. Nothing happens if the function is not subscribed.
+        """
+        with self._lock:
+            self._subscribers = [(subscriber, feeds) for subscriber, feeds in self._subscribers
+                                 if subscriber != callback]
+
+    def emit(self, event: ChangeEvent) -> None:
+        """
+        Passes an event to the subscribers of its feed. An error raised by one subscriber is written to the debug log
+        and does not prevent the other subscribers from receiving the event.
+        """
+        with self._lock:
+            subscribers = [callback for callback, feeds in self._subscribers if feeds is None or event.feed in feeds]
+
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                sys.stderr.write(f'[FeedEngine] Error encountered while passing {event!r} to {callback!r}: {e!r}')
+
+    def start(self,
+              alert_interval: float = 10,
+              report_interval: float = 60,
+              max_updates: int = None,
+              timeout: float = 30,
+              prefetch_outlooks: bool = True,
+              adaptive: bool = True) -> None:
+        """
+        Restores the saved alerts and reports, then schedules the feed updates on the scheduler's worker pool.
+        Subscribers should be added before the engine is started so that they receive the restored snapshots.
+
+        Parameters
+        ----------
+        alert_interval: float (default = 10)
+            Time between alert updates in seconds (the initial interval if the updates are adaptive).
+        report_interval: float (default = 60)
+            Time between report updates in seconds (the initial interval if the updates are adaptive).
+        max_updates: int (default = None)
+            Max number of times that each feed will update before terminating. If None, the feeds update until the
+            engine is stopped.
+        timeout: float (default = 30)
+            Request timeout in seconds.
+        prefetch_outlooks: bool (default = True)
+            Download the Day 1-3 outlooks in the background (see noaa.spc.cache.OutlookCache.start_prefetch).
+        adaptive: bool (default = True)
+            Adjust the intervals to how often the feeds change (see noaa.polling.AdaptiveInterval), within
+            ALERT_INTERVAL_BOUNDS and REPORT_INTERVAL_BOUNDS. Both feeds are polled at their shortest interval while
+            Tornado Warnings are active. The bounds can be changed with FeedEngine.set_interval_bounds.
+        """
+        sys.stdout.write(f'[FeedEngine] Starting feeds. alert_interval={alert_interval}, '
+                         f'report_interval={report_interval}, max_updates={max_updates}')
+
+        self.alerts.restore_snapshot()
+        self.reports.restore_snapshot()
+
+        if adaptive:
+            self.polling[AlertFeed.name] = AdaptiveInterval(alert_interval, *ALERT_INTERVAL_BOUNDS,
+                                                            urgent=self._tornado_warnings_active, name='NWSAlerts')
+            self.polling[ReportFeed.name] = AdaptiveInterval(report_interval, *REPORT_INTERVAL_BOUNDS,
+                                                             urgent=self._tornado_warnings_active, name='SPCReports')
+
+        # an asyncio scheduler awaits the requests on its event loop instead of blocking a worker thread
+        asynchronous = isinstance(self.scheduler, AsyncScheduler)
+        self._feeds[AlertFeed.name] = self.scheduler.add_feed(AlertFeed.name,
+                                                              self.alerts.update_async if asynchronous
+                                                              else self.alerts.update,
+                                                              interval=alert_interval,
+                                                              timeout=timeout,
+                                                              max_runs=max_updates,
+                                                              polling=self.polling.get(AlertFeed.name))
+        self._feeds[ReportFeed.name] = self.scheduler.add_feed(ReportFeed.name,
+                                                               self.reports.update_async if asynchronous
+                                                               else self.reports.update,
+                                                               interval=report_interval,
+                                                               timeout=timeout,
+                                                               max_runs=max_updates,
+                                                               polling=self.polling.get(ReportFeed.name))
+        if prefetch_outlooks:
+            self.outlooks.start_prefetch()
+
+    def set_interval_bounds(self,
+                            feed: str,
+                            min_interval: float,
+                            max_interval: float) -> None:
+        """
+        Changes the shortest and longest intervals of an adaptive feed (e.g., from a user setting). Equal bounds give
+        a fixed interval. The new bounds are used from the next update of the feed. Nothing happens if the feed is not
+        adaptive.
+
+        feed: name of the feed ('nws-alerts' or 'spc-reports').
+        min_interval: shortest interval in seconds.
+        max_interval: longest interval in seconds.
+        """
+        polling = self.polling.get(feed)
+        if polling is not None:
+            sys.stdout.write(f'[FeedEngine] {feed} interval bounds set to {min_interval}-{max_interval} seconds.')
+            polling.set_bounds(min_interval, max_interval)
+
+    def _tornado_warnings_active(self) -> bool:
+        """
+        Returns True while Tornado Warnings are active, when the feeds are polled at their shortest interval.
+        """
+        return self.alerts.has_active('Tornado Warning')
+
+    def stop(self) -> None:
+        """
+        Stops the feed updates. Updates that are already running are not interrupted.
+        """
+        for feed in self._feeds.values():
+            self.scheduler.remove_feed(feed)
+        self._feeds.clear()
+
+
+def main() -> None:
+    # only the events are printed, the debug messages of the feeds are discarded
+    out = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+
+    engine = FeedEngine(AsyncScheduler())
+    engine.subscribe(lambda event: out.write(f'{time.strftime("%H:%M:%S")} {event!r}\n'))
+    engine.start(prefetch_outlooks=False)
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        engine.stop()
+        engine.scheduler.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+class ChangeEvent:
+    """
+    Changes found by a single update of a feed. Events are emitted by the feeds of a noaa.engine.FeedEngine and passed
+    to every subscriber of the feed.
+    """
+    def __init__(self,
+                 feed: str,
+                 added: list,
+                 modified: list,
+                 removed: list,
+                 stale: bool = False,
+                 state=None):
+        """
+        feed: name of the feed ('nws-alerts', 'spc-reports', or 'spc-outlook').
+        added: items that are new (e.g., noaa.nws.feed.NWSAlert instances).
+        modified: items that are still present but have changed. The latest version of each item is listed.
+        removed: IDs of the items that are no longer present.
+        stale: True if the items were restored from a snapshot and have not been confirmed by an update yet.
+        state: all items of the feed after the update (e.g., the list of active alerts).
+        """
+        self.feed = feed
+        self.added = added
+        self.modified = modified
+        self.removed = removed
+        self.stale = stale
+        self.state = state
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+    def __repr__(self) -> str:
+        return (f'ChangeEvent({self.feed!r}, added={len(self.added)}, modified={len(self.modified)}, '
+                f'removed={len(self.removed)}, stale={self.stale})')
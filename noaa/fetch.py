@@ -0,0 +1,256 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Mapping
+import asyncio
+import requests
+import sys
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class RateLimitError(requests.HTTPError):
+    """
+    Raised when a server asks the client to slow down: a '429 Too Many Requests' response, or a '503 Service
+    Unavailable' response with a Retry-After header.
+    """
+    def __init__(self,
+                 message: str,
+                 retry_after: float = None,
+                 response: requests.Response = None):
+        """
+        message: error message.
+        retry_after: delay requested by the server in seconds, or None if the response had no valid Retry-After header.
+        response: the response, if it was received with requests.
+        """
+        super().__init__(message, response=response)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parses a Retry-After header, which is either a number of seconds or an HTTP date. Returns the delay in seconds, or
+    None if the header is missing or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+class ConditionalFetcher:
+    """
+    Object that sends conditional HTTP requests (ETag/If-Modified-Since) and keeps hit/miss statistics for each URL.
+    """
+    def __init__(self,
+                 name: str = 'ConditionalFetcher',
+                 stats_interval: int = 360,
+                 session: requests.Session = None):
+        """
+        Parameters
+        ----------
+        name: str (default = 'ConditionalFetcher')
+            Identifier used when writing to the debug log.
+        stats_interval: int (default = 360)
+            Number of requests between statistics printouts in the debug log.
+        session: requests.Session (default = None)
+            Session used to send the requests. Sharing a session reuses keep-alive connections between requests. If
+            None, a new session is created.
+        """
+        self.name = name
+        self.session = session if session is not None else requests.Session()
+        self.stats_interval = stats_interval
+
+        self._validators = {}  # {url: {'ETag': str, 'Last-Modified': str}}
+        self._content_lengths = {}  # {url: length of the last full response (bytes)}
+
+        self.hits = 0  # responses that came back as '304 Not Modified'
+        self.misses = 0  # responses that returned a full payload
+        self.bytes_received = 0
+        self.bytes_saved = 0  # estimated using the size of the last full response for the URL
+
+    def get(self,
+            url: str,
+            timeout: float = None) -> requests.Response | None:
+        """
+        Sends a conditional GET request.
+
+        Parameters
+        ----------
+        url: str
+            URL of the requested resource.
+        timeout: float (default = None)
+            Request timeout in seconds.
+
+        Returns
+        -------
+        response: requests.Response or None
+            The full response if the resource changed since the last request, otherwise None.
+        """
+        response = self.session.get(url, headers=self._conditional_headers(url), timeout=timeout)
+
+        if response.status_code == 304:
+            self._count_hit(url)
+            response = None
+        else:
+            self._check_rate_limit(url, response.status_code, response.headers, response)
+            response.raise_for_status()
+            self._count_miss(url, response.headers, response.content)
+
+        return response
+
+    def log_stats(self) -> None:
+        """
+        Writes the hit/miss counters to the debug log.
+        """
+        total = self.hits + self.misses
+        hit_rate = 100 * self.hits / total if total > 0 else 0
+        sys.stdout.write(f'[{self.name}] Conditional requests: hits={self.hits}, misses={self.misses} '
+                         f'({hit_rate:.1f}% hit rate), received={self.bytes_received / 1e6:.2f} MB, '
+                         f'saved={self.bytes_saved / 1e6:.2f} MB')
+
+    def reset(self, url: str = None) -> None:
+        """
+        Forgets the stored validators so that the next request returns a full response.
+
+        url: str (default = None)
+            URL to reset. If None, validators for all URLs are removed.
+        """
+        if url is None:
+            self._validators.clear()
+        else:
+            self._validators.pop(url, None)
+
+    def _conditional_headers(self, url: str) -> dict:
+        """
+        Builds the conditional request headers for a URL using the validators from the last full response.
+        """
+        validators = self._validators.get(url, {})
+        headers = {}
+        if 'ETag' in validators:
+            headers['If-None-Match'] = validators['ETag']
+        if 'Last-Modified' in validators:
+            headers['If-Modified-Since'] = validators['Last-Modified']
+        return headers
+
+    def _check_rate_limit(self,
+                          url: str,
+                          status: int,
+                          headers: Mapping[str, str],
+                          response: requests.Response = None) -> None:
+        """
+        Raises a RateLimitError if the server asked the client to slow down.
+        """
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        if status == 429 or (status == 503 and retry_after is not None):
+            sys.stderr.write(f'[{self.name}] {url} responded with status {status} (Retry-After: {retry_after}).')
+            raise RateLimitError(f'{status} response from {url}', retry_after, response)
+
+    def _count_hit(self, url: str) -> None:
+        """
+        Updates the statistics after a '304 Not Modified' response.
+        """
+        self.hits += 1
+        self.bytes_saved += self._content_lengths.get(url, 0)
+        self._log_periodic_stats()
+
+    def _count_miss(self,
+                    url: str,
+                    headers: Mapping[str, str],
+                    content: bytes) -> None:
+        """
+        Updates the statistics and saves the validators after a full response.
+        """
+        self.misses += 1
+        self.bytes_received += len(content)
+        self._content_lengths[url] = len(content)
+        self._store_validators(url, headers)
+        self._log_periodic_stats()
+
+    def _log_periodic_stats(self) -> None:
+        """
+        Writes the hit/miss counters to the debug log every 'stats_interval' requests.
+        """
+        if (self.hits + self.misses) % self.stats_interval == 0:
+            self.log_stats()
+
+    def _store_validators(self,
+                          url: str,
+                          headers: Mapping[str, str]) -> None:
+        """
+        Saves the ETag and Last-Modified headers of a full response.
+        """
+        self._validators[url] = {key: headers[key] for key in ('ETag', 'Last-Modified') if key in headers}
+
+
+class AsyncConditionalFetcher(ConditionalFetcher):
+    """
+    ConditionalFetcher that can also send requests from an asyncio event loop (see noaa.aio.AsyncScheduler). If
+    aiohttp is installed, the requests are sent with an aiohttp.ClientSession; otherwise they are sent with the requests
+    session on a worker thread so that the event loop is not blocked. The synchronous ConditionalFetcher.get method
+    can still be used (e.g., by feeds that are updated on worker threads).
+    """
+    def __init__(self,
+                 name: str = 'AsyncConditionalFetcher',
+                 stats_interval: int = 360,
+                 session: requests.Session = None,
+                 client=None):
+        """
+        Parameters
+        ----------
+        name: str (default = 'AsyncConditionalFetcher')
+            Identifier used when writing to the debug log.
+        stats_interval: int (default = 360)
+            Number of requests between statistics printouts in the debug log.
+        session: requests.Session (default = None)
+            Session used by ConditionalFetcher.get and, when there is no aiohttp client, by get_async.
+        client: aiohttp.ClientSession (default = None)
+            Session used by get_async. If None, get_async sends the requests with 'session' on a worker thread.
+        """
+        super().__init__(name, stats_interval, session)
+        self.client = client
+
+    async def get_async(self,
+                        url: str,
+                        timeout: float = None) -> bytes | None:
+        """
+        Sends a conditional GET request without blocking the event loop.
+
+        Parameters
+        ----------
+        url: str
+            URL of the requested resource.
+        timeout: float (default = None)
+            Request timeout in seconds.
+
+        Returns
+        -------
+        content: bytes or None
+            Content of the response if the resource changed since the last request, otherwise None.
+        """
+        if self.client is None:
+            response = await asyncio.to_thread(self.get, url, timeout)
+            return response.content if response is not None else None
+
+        async with self.client.get(url, headers=self._conditional_headers(url),
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status == 304:
+                self._count_hit(url)
+                return None
+
+            self._check_rate_limit(url, response.status, response.headers)
+            response.raise_for_status()
+            content = await response.read()
+            self._count_miss(url, response.headers, content)
+            return content
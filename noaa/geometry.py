@@ -0,0 +1,142 @@
+"""
+Conversion of GeoJSON geometries from the NOAA feeds into compact coordinate arrays.
+"""
+import itertools
+import numpy as np
+
+
+class FeatureGeometry:
+    """
+    Polygon or MultiPolygon geometry stored as a single contiguous float32 array of (lat, lon) coordinates. Rings and
+    polygon parts are located with offset arrays:
+        - ring i spans coordinates[ring_offsets[i]:ring_offsets[i + 1]]
+        - part j spans rings part_offsets[j] to part_offsets[j + 1] - 1, and its first ring is the exterior ring (any
+          other rings are holes)
+    """
+    __slots__ = ('geometry_type', 'coordinates', 'ring_offsets', 'part_offsets')
+
+    def __init__(self,
+                 geometry_type: str,
+                 coordinates: np.ndarray,
+                 ring_offsets: np.ndarray,
+                 part_offsets: np.ndarray):
+        """
+        geometry_type: 'Polygon' or 'MultiPolygon'.
+        coordinates: float32 array with shape (N, 2) containing (lat, lon) pairs for all rings.
+        ring_offsets: int array with the start index of every ring in 'coordinates', followed by N.
+        part_offsets: int array with the index of the first ring of every part, followed by the number of rings.
+        """
+        self.geometry_type = geometry_type
+        self.coordinates = coordinates
+        self.ring_offsets = ring_offsets
+        self.part_offsets = part_offsets
+
+    @property
+    def n_parts(self) -> int:
+        return len(self.part_offsets) - 1
+
+    @property
+    def n_rings(self) -> int:
+        return len(self.ring_offsets) - 1
+
+    def ring(self, index: int) -> np.ndarray:
+        """
+        Returns a view of the coordinates of a ring.
+        """
+        return self.coordinates[self.ring_offsets[index]:self.ring_offsets[index + 1]]
+
+    def exterior(self, part: int = 0) -> np.ndarray:
+        """
+        Returns a view of the coordinates of a part's exterior ring.
+        """
+        return self.ring(self.part_offsets[part])
+
+    def exteriors(self) -> list[np.ndarray]:
+        """
+        Returns views of the exterior rings of all parts.
+        """
+        return [self.exterior(part) for part in range(self.n_parts)]
+
+    def part(self, part: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the coordinates of all rings in a part (exterior and holes) with ring offsets relative to the part.
+        """
+        first_ring, last_ring = self.part_offsets[part], self.part_offsets[part + 1]
+        start = self.ring_offsets[first_ring]
+        return self.coordinates[start:self.ring_offsets[last_ring]], self.ring_offsets[first_ring:last_ring + 1] - start
+
+    def tobytes(self) -> bytes:
+        """
+        Returns the raw bytes of the coordinates and offsets (used for fingerprinting).
+        """
+        return self.coordinates.tobytes() + self.ring_offsets.tobytes() + self.part_offsets.tobytes()
+
+
+def convert_geometry(geometry: dict | None,
+                     decimals: int | None = 3,
+                     dedupe: bool = True) -> FeatureGeometry | None:
+    """
+    Converts a GeoJSON Polygon or MultiPolygon into a FeatureGeometry. All rings of the feature are converted with a
+    single set of vectorized operations: [lon, lat] pairs are swapped to [lat, lon], rounded, and (optionally)
+    consecutive duplicate points are removed.
+
+    Parameters
+    ----------
+    geometry: dict or None
+        GeoJSON geometry.
+    decimals: int or None (default = 3)
+        Number of decimal places that the coordinates are rounded to (tkintermapview requires three). If None, the
+        coordinates are not rounded.
+    dedupe: bool (default = True)
+        Remove consecutive duplicate points within each ring (rounding often creates duplicates).
+
+    Returns
+    -------
+    geometry: FeatureGeometry or None
+        None if the geometry is missing, is not a Polygon/MultiPolygon, or has no coordinates.
+    """
+    if not isinstance(geometry, dict):
+        return None
+
+    if geometry.get('type') == 'Polygon':
+        parts = [geometry['coordinates']]
+    elif geometry.get('type') == 'MultiPolygon':
+        parts = geometry['coordinates']
+    else:
+        return None
+
+    parts = [[ring for ring in part if len(ring) > 0] for part in parts]
+    parts = [part for part in parts if part]
+    rings = [ring for part in parts for ring in part]
+    if not rings:
+        return None
+
+    ring_lengths = np.fromiter((len(ring) for ring in rings), dtype=np.int64, count=len(rings))
+    part_offsets = np.concatenate([[0], np.cumsum([len(part) for part in parts])]).astype(np.int32)
+
+    try:
+        coordinates = np.array(list(itertools.chain.from_iterable(rings)), dtype=np.float64)
+    except ValueError:
+        # some points have a third value (e.g., elevation)
+        coordinates = np.array([point[:2] for point in itertools.chain.from_iterable(rings)], dtype=np.float64)
+    if coordinates.ndim != 2 or len(coordinates) == 0:
+        return None
+
+    coordinates = coordinates[:, 1::-1]  # [lon, lat] -> [lat, lon]
+    if decimals is not None:
+        coordinates = np.round(coordinates, decimals)
+
+    ring_offsets = np.concatenate([[0], np.cumsum(ring_lengths)])
+
+    if dedupe:
+        keep = np.ones(len(coordinates), dtype=bool)
+        keep[1:] = np.any(coordinates[1:] != coordinates[:-1], axis=1)
+        keep[ring_offsets[:-1]] = True  # the first point of every ring is always kept
+        coordinates = coordinates[keep]
+        kept = np.concatenate([[0], np.cumsum(keep)])
+        ring_offsets = kept[ring_offsets]
+
+    return FeatureGeometry(geometry['type'],
+                           np.ascontiguousarray(coordinates, dtype=np.float32),
+                           ring_offsets.astype(np.int32),
+                           part_offsets)
@@ -0,0 +1,266 @@
+"""
+Optional multi-process ingest for the NOAA feeds. Decoding the alerts GeoJSON and parsing the storm report KMZ are
+CPU-bound, and when they run on threads of the GUI process they hold the GIL and delay the Tk event loop. With a
+ProcessIngest, this work is done by worker processes and the GUI process only diffs and draws the results.
+
+Alert coordinates are handed back through a shared memory block (multiprocessing.shared_memory) that is owned by the
+GUI process and reused between updates; everything else is returned as small pickled records.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from debug.metrics import metrics
+from lxml import etree
+from multiprocessing.shared_memory import SharedMemory
+from noaa.decode import decode_alerts
+from noaa.geometry import FeatureGeometry, convert_geometry
+from noaa.nws.feed import NWSAlert
+from noaa.spc.feed import SPCReport, read_reports
+from noaa.spc.kml import KMLError
+from threading import Lock
+import json
+import multiprocessing
+import numpy as np
+import sys
+import zipfile
+import zlib
+
+
+# the GUI process runs Tk and the scheduler's threads, so the workers are never forked from it: a forked child would
+# inherit locks held by those threads and a copy of the whole process
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _ingest_alerts(content: bytes,
+                   buffer_name: str,
+                   buffer_size: int) -> tuple[list[tuple], int, np.ndarray | None]:
+    """
+    Worker function that decodes the response from the NWS 'alerts/active' endpoint.
+
+    Parameters
+    ----------
+    content: bytes
+        Raw response content.
+    buffer_name: str
+        Name of the shared memory block that the coordinates of all alerts are written to.
+    buffer_size: int
+        Size of the shared memory block in bytes.
+
+    Returns
+    -------
+    records: list[tuple]
+        (fields, layout, parameters, description, fingerprint) for each alert, where 'fields' are the keyword arguments
+        of NWSAlert.from_parts that are not listed separately, and 'layout' is None for alerts without a geometry or
+        (geometry type, first coordinate, number of coordinates, ring offsets, part offsets).
+    n_coordinates: int
+        Number of (lat, lon) pairs of all alerts.
+    overflow: np.ndarray or None
+        Coordinates of all alerts if they did not fit in the shared memory block, otherwise None.
+    """
+    records = []
+    coordinates = []
+    n_coordinates = 0
+
+    for fields in decode_alerts(content):
+        geometry = convert_geometry(fields.pop('geometry'))
+        parameters_json = json.dumps(fields.pop('parameters'), sort_keys=True).encode('utf-8')
+        description = fields.pop('description')
+
+        layout = None
+        if geometry is not None:
+            layout = (geometry.geometry_type, n_coordinates, len(geometry.coordinates), geometry.ring_offsets,
+                      geometry.part_offsets)
+            coordinates.append(geometry.coordinates)
+            n_coordinates += len(geometry.coordinates)
+
+        records.append((fields,
+                        layout,
+                        zlib.compress(parameters_json),
+                        zlib.compress(description.encode('utf-8')) if description is not None else None,
+                        NWSAlert.generate_fingerprint(geometry, fields['time_expires'], parameters_json)))
+
+    if n_coordinates * 2 * np.dtype(np.float32).itemsize > buffer_size:
+        return records, n_coordinates, np.concatenate(coordinates)
+
+    buffer = SharedMemory(name=buffer_name)
+    try:
+        shared = np.ndarray((n_coordinates, 2), dtype=np.float32, buffer=buffer.buf)
+        start = 0
+        for array in coordinates:
+            shared[start:start + len(array)] = array
+            start += len(array)
+        del shared  # the block cannot be closed while an array uses its buffer
+    finally:
+        buffer.close()
+
+    return records, n_coordinates, None
+
+
+def _ingest_reports(kmz: bytes,
+                    seen_keys: set[str]) -> tuple[list[tuple[str, str]], dict[str, SPCReport]]:
+    """
+    Worker function that reads the storm report placemarks in a KMZ file. Only the placemarks that are not in
+    'seen_keys' are parsed.
+
+    Returns
+    -------
+    entries: list[tuple[str, str]]
+        (report type, placemark key) of every placemark, in the order of the KMZ file.
+    new_reports: dict[str, SPCReport]
+        Reports that were parsed, keyed by placemark key.
+
+    Raises
+    ------
+    noaa.spc.kml.KMLError
+        If the KMZ file cannot be read.
+    """
+    try:
+        entries, new_reports = read_reports(kmz, seen_keys, etree.HTMLParser(encoding='utf-8'))
+    except (zipfile.BadZipFile, etree.XMLSyntaxError) as e:
+        raise KMLError(f'{type(e).__name__}: {e}') from None
+
+    return entries, new_reports
+
+
+class ProcessIngest:
+    """
+    Pool of worker processes that decode and parse feed payloads. The payloads are still downloaded by the feeds (the
+    requests release the GIL and the conditional request state stays with noaa.fetch.ConditionalFetcher), and only the
+    CPU-bound work is sent to the workers.
+
+    The methods block the calling thread (a worker thread of noaa.scheduler.FetchScheduler) until the result is ready.
+    Worker processes are started with START_METHOD ('forkserver', or 'spawn' where it is not available).
+    """
+    def __init__(self,
+                 processes: int = 2,
+                 buffer_size: int = 8_000_000):
+        """
+        processes: int (default = 2)
+            Number of worker processes.
+        buffer_size: int (default = 8000000)
+            Initial size of the shared memory blocks used for alert coordinates (bytes). A block that is too small is
+            replaced with a larger one after the update that overflowed it.
+        """
+        self.processes = processes
+        self.buffer_size = buffer_size
+        self._executor = ProcessPoolExecutor(max_workers=processes,
+                                             mp_context=multiprocessing.get_context(START_METHOD))
+        self._buffers = []  # shared memory blocks that are not in use
+        self._lock = Lock()
+
+    def parse_alerts(self, content: bytes) -> list[NWSAlert]:
+        """
+        Decodes the response from the NWS 'alerts/active' endpoint in a worker process.
+
+        content: bytes
+            Raw response content.
+        """
+        buffer = self._acquire_buffer()
+        try:
+            with metrics.span('NWSAlerts.ingest'):
+                records, n_coordinates, overflow = self._run(_ingest_alerts, content, buffer.name, buffer.size)
+
+            with metrics.span('NWSAlerts.parse'):
+                if overflow is not None:
+                    metrics.increment('Ingest.buffer_overflows')
+                    self.buffer_size = max(self.buffer_size, 2 * overflow.nbytes)
+                    coordinates = overflow
+                else:
+                    coordinates = np.ndarray((n_coordinates, 2), dtype=np.float32, buffer=buffer.buf)
+                alerts = [self._create_alert(record, coordinates) for record in records]
+                del coordinates
+        finally:
+            self._release_buffer(buffer)
+
+        return alerts
+
+    def parse_reports(self,
+                      kmz: bytes,
+                      seen_keys: set[str]) -> tuple[list[tuple[str, str]], dict[str, SPCReport]]:
+        """
+        Reads the storm report placemarks in a KMZ file in a worker process. Only the placemarks that are not in
+        'seen_keys' are parsed.
+
+        Returns
+        -------
+        entries: list[tuple[str, str]]
+            (report type, placemark key) of every placemark, in the order of the KMZ file.
+        new_reports: dict[str, SPCReport]
+            Reports that were parsed, keyed by placemark key.
+        """
+        with metrics.span('SPCReports.ingest'):
+            entries, new_reports = self._run(_ingest_reports, kmz, seen_keys)
+
+        # strings are not interned when they are unpickled
+        for report in new_reports.values():
+            report.report_type = sys.intern(report.report_type)
+            report.date = sys.intern(report.date)
+            report.county = sys.intern(report.county)
+            report.state = sys.intern(report.state)
+
+        return entries, new_reports
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes and releases the shared memory blocks.
+        """
+        self._executor.shutdown(cancel_futures=True)
+        with self._lock:
+            buffers, self._buffers = self._buffers, []
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+
+    def _run(self, function, *args):
+        """
+        Runs a function in a worker process and waits for the result. If a worker process died, the pool is replaced
+        so that the next update can be processed.
+        """
+        try:
+            return self._executor.submit(function, *args).result()
+        except BrokenProcessPool:
+            sys.stderr.write('[ProcessIngest] A worker process stopped unexpectedly. Restarting the process pool.')
+            with self._lock:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes,
+                                                     mp_context=multiprocessing.get_context(START_METHOD))
+            raise
+
+    def _acquire_buffer(self) -> SharedMemory:
+        """
+        Returns a shared memory block that is not in use, creating one if necessary.
+        """
+        with self._lock:
+            if self._buffers:
+                return self._buffers.pop()
+        return SharedMemory(create=True, size=self.buffer_size)
+
+    def _release_buffer(self, buffer: SharedMemory) -> None:
+        """
+        Returns a shared memory block to the pool, or releases it if it is smaller than the current buffer size.
+        """
+        if buffer.size < self.buffer_size:
+            buffer.close()
+            buffer.unlink()
+            return
+        with self._lock:
+            self._buffers.append(buffer)
+
+    @staticmethod
+    def _create_alert(record: tuple,
+                      coordinates: np.ndarray) -> NWSAlert:
+        """
+        Creates an alert from a record returned by _ingest_alerts. The alert's coordinates are copied out of the shared
+        coordinate array so that the array can be reused by the next update.
+        """
+        fields, layout, parameters, description, fingerprint = record
+
+        geometry = None
+        if layout is not None:
+            geometry_type, start, length, ring_offsets, part_offsets = layout
+            geometry = FeatureGeometry(sys.intern(geometry_type), coordinates[start:start + length].copy(),
+                                       ring_offsets, part_offsets)
+
+        return NWSAlert.from_parts(geometry=geometry,
+                                   parameters=parameters,
+                                   description=description,
+                                   fingerprint=fingerprint,
+                                   **fields)
@@ -1,8 +1,14 @@
-from threading import Thread
+from functools import partial
+from mapping.culling import ViewportCuller
+from mapping.render import RenderQueue
+from mapping.simplify import SimplifiedPolygon
+from mapping.spatial import SpatialIndex
+from mapping.zorder import ZOrderManager
+from noaa.events import ChangeEvent
+from noaa.nws.feed import NWSAlert
+from noaa.nws.filter import AlertFilter
+from noaa.nws.index import AlertIndex
 from tkinter.scrolledtext import ScrolledText
-import json
-import numpy as np
-import requests
 import sys
 import time
 import tkinter as tk
@@ -23,168 +29,66 @@ DEFAULT_ALERT_PROPERTIES = {
     'Marine Weather Statement': [102, '#FFDAB9'],
 }
 
+# stacking levels of the alert polygons from bottom to top (the most important alerts are drawn on top)
+ALERT_Z_LEVELS = sorted({priority for priority, _ in DEFAULT_ALERT_PROPERTIES.values()}, reverse=True)
 
-class NWSAlert:
-    """
-    Object containing information about active NWS alerts.
-    """
-    def __init__(self,
-                 alert_id: str,
-                 alert_type: str,
-                 alert_code: str,
-                 geometry: dict,
-                 time_sent: str,
-                 time_effective: str,
-                 time_onset: str,
-                 time_expires: str,
-                 parameters: dict,
-                 sender: str,
-                 headline: str,
-                 description: str
-                 ):
-        
-        self.alert_id = alert_id
-        self.alert_type = alert_type
-        self.alert_code = alert_code
-        self.geometry = self._convert_geom_coords(geometry)
-        self.time_sent = time_sent
-        self.time_effective = time_effective
-        self.time_onset = time_onset
-        self.time_expires = time_expires
-        self.parameters = parameters
-        self.sender = sender
-        self.headline = headline
-        self.description = description
-
-    @staticmethod
-    def _convert_geom_coords(geometry: dict | None) -> dict | None:
-        """
-        This method does two things:
-            1) Rounds all coordinates to three decimal places (required for tkintermapview)
-            2) Translates [lon, lat] coordinates to [lat, lon]
-        """
-        if isinstance(geometry, dict):
-            geometry['coordinates'] = [np.round(coords, 3)[::-1] for coords in geometry['coordinates'][0]]
-        
-        return geometry
+# canvas options for alert polygons restored from a snapshot (stale) and for confirmed alert polygons
+STALE_POLYGON_OPTIONS = {'dash': (6, 4), 'stipple': 'gray12'}
+POLYGON_OPTIONS = {'dash': '', 'stipple': 'gray25'}
 
 
 class NWSAlerts:
     """
-    Class that handles the thread for updating NWS alerts on the dashboard.
+    Class that handles the updating of NWS alerts on the dashboard. Alerts are retrieved by a noaa.nws.feed.AlertFeed,
+    and this class draws the changes that the feed emits (see NWSAlerts.on_change).
     """
-    def __init__(self, map_widget):
+    def __init__(self,
+                 map_widget,
+                 render_queue: RenderQueue = None,
+                 spatial_index: SpatialIndex = None,
+                 culler: ViewportCuller = None,
+                 z_order: ZOrderManager = None):
         """
         map_widget: main.AlertDashboard.map_widget
+        render_queue: mapping.render.RenderQueue instance. If None, a new render queue is created for the map widget.
+        spatial_index: mapping.spatial.SpatialIndex instance used for selecting alert polygons. If None, a new index is
+            created.
+        culler: mapping.culling.ViewportCuller instance. If None, a new culler is created for the map widget.
+        z_order: mapping.zorder.ZOrderManager instance containing the levels in ALERT_Z_LEVELS. If None, a new manager is
+            created for the map widget's canvas.
         """
         self._map_widget = map_widget
-        self.alerts = []
-        self.alerts_with_geometry = None
-        self.alerts_without_geometry = None
+        self._render_queue = render_queue if render_queue is not None else RenderQueue(map_widget)
+        self._spatial_index = spatial_index if spatial_index is not None else SpatialIndex()
+        self._culler = culler if culler is not None else ViewportCuller(map_widget)
+        self._z_order = z_order if z_order is not None else ZOrderManager(map_widget.canvas, ALERT_Z_LEVELS)
+        self._index = AlertIndex()  # alerts that are drawn, kept up to date from the feed's events
+        self._stale_alert_ids = set()  # alerts restored from the snapshot that have not been confirmed yet
+        self._filter = AlertFilter()
+        self._bucket_tags = {}  # {(alert_type, sender): canvas tag of the bucket's polygons}
+        self._hidden_buckets = set()  # buckets that are hidden by the filter
     
-    def start_thread(self,
-                     update_freq: int = 10,
-                     max_updates: int = 1440) -> None:
+    def on_change(self, event: ChangeEvent) -> None:
         """
-        Starts a thread for updating NWS alerts automatically in the background.
+        Updates the alert polygons with the changes emitted by an AlertFeed. This method can be called from any thread;
+        the alert index and the canvas are only changed on the Tk main thread (see NWSAlerts._update_alert_polygons).
         
-        Parameters
-        ----------
-        update_freq: int (default = 10)
-            Alert update frequency in seconds.
-        max_updates: int (default = 1440)
-            Max number of times that the NWS alerts will automatically update before terminating. This parameter is
-            only used to prevent an infinite loop when updating alerts.
-
-        Notes
-        -----
-        With the default parameters, the automatic alert updates will stop after the app has been continuously open
-        for about 24 hours.
-        """
-        sys.stdout.write(f'[NWSAlerts] Starting thread. update_freq={update_freq}, max_updates={max_updates}')
-        
-        self._thread = Thread(target=self._live_alert_updates,
-                              name='auto-nws-alerts-thread',
-                              daemon=True,
-                              args=(update_freq, max_updates))
-        self._thread.start()
-    
-    def update_alerts(self):
-        """
-        Performs a single update of active NWS alerts.
-        """
-        self._retrieve_alerts()
-        self._update_alert_polygons()
-    
-    def _live_alert_updates(self,
-                            update_freq: int,
-                            max_updates: int) -> None:
-        """
-        Workflow for updating NWS alerts in real time.
-        
-        Parameters
-        ----------
-        update_freq: int
-            Alert update frequency in seconds.
-        max_updates: int
-            Max number of times that NWS alerts will automatically update before terminating. This parameter is only
-            used to prevent an infinite loop when updating alerts.
-
-        Notes
-        -----
-        With the default parameters, the automatic alert updates will stop after the app has been continuously open
-        for about 24 hours.
-        """
-        update_count = 0
-        while update_count < max_updates:
-            self.update_alerts()
-            time.sleep(update_freq)
-            update_count += 1
-    
-    def _retrieve_alerts(self) -> None:
+        event: noaa.events.ChangeEvent
+            Alerts that were added, modified, or removed by an update (or restored from a snapshot).
         """
-        Retrieve/update alerts from the National Weather Service.
-        """
-        
-        if not self.alerts:  # this condition will be met if this is the first time alerts have been retrieved
-            sys.stdout.write('[NWSAlerts] Retrieving alerts from National Weather Service.')
-        else:
-            sys.stdout.write('[NWSAlerts] Updating active alerts.')
-        
-        # retrieve the alerts
-        response = requests.get('https://api.weather.gov/alerts/active')
-        content = json.loads(response.content)
-        
-        alerts = list(map(lambda alert: NWSAlert(
-            alert_id=alert['id'],
-            alert_type=alert['properties']['event'],
-            alert_code=alert['properties']['eventCode']['NationalWeatherService'][0],
-            geometry=alert['geometry'],
-            time_sent=alert['properties']['sent'],
-            time_effective=alert['properties']['effective'],
-            time_onset=alert['properties']['onset'],
-            time_expires=alert['properties']['expires'],
-            parameters=alert['properties']['parameters'],
-            sender=alert['properties']['senderName'],
-            headline=alert['properties']['headline'],
-            description=alert['properties']['description']), content['features']))
-
-        self.alerts_with_geometry = [alert for alert in alerts if alert.geometry is not None]
-        self.alerts_without_geometry = [alert for alert in alerts if alert.geometry is None]
-    
-        self._check_for_new_or_expired_alerts(alerts)
+        self._update_alert_polygons(event)
     
-        self.alerts = alerts
-
     def _draw_alert_polygon(self,
                            coordinates: list,
                            fill_color: str,
                            border_color: str,
                            border_width: int,
                            name: str,
-                           data = None) -> None:
+                           data = None,
+                           key: str = None) -> tkmap.map_widget.CanvasPolygon:
         """
-        Draw a single alert polygon.
+        Draw a single alert polygon and return it. The polygon is registered with the viewport culler, so it is only
+        drawn while it intersects the visible map.
         
         coordinates: list
             List of (lat, lon) coordinate pairs marking the polygon vertices.
@@ -198,87 +102,264 @@ class NWSAlerts:
             Name of the polygon alert type.
         data: Any
             Optional data to include with the polygon.
+        key: str
+            Key used to register the polygon with the viewport culler. If None, the polygon's ID is used.
         """
-        polygon = tkmap.map_widget.CanvasPolygon(map_widget=self._map_widget,
-                                                 position_list=coordinates,
-                                                 command=lambda p: self._alert_popup(p),
-                                                 fill_color=fill_color,
-                                                 outline_color=border_color,
-                                                 border_width=border_width,
-                                                 name=name,
-                                                 data=data)
+        # clicks are handled by NWSAlerts.show_alerts_at so that overlapping polygons can be selected
+        # the polygon is drawn with a level of detail matched to the map zoom
+        polygon = SimplifiedPolygon(map_widget=self._map_widget,
+                                    position_list=coordinates,
+                                    fill_color=fill_color,
+                                    outline_color=border_color,
+                                    border_width=border_width,
+                                    name=name,
+                                    data=data)
 
-        polygon.draw()
+        self._culler.add(key if key is not None else id(polygon), polygon, layer='alerts',
+                         on_draw=self._style_alert_polygon)
 
-        self._map_widget.canvas_polygon_list.append(polygon)
+        return polygon
 
-    def _update_alert_polygons(self) -> None:
+    def _update_alert_polygons(self, event: ChangeEvent) -> None:
         """
-        Internal method that draws new alert polygons and removes expired and/or canceled alert polygons.
+        Internal method that draws new alert polygons, redraws updated alert polygons, and removes expired and/or
+        canceled alert polygons. The changes are sorted on the calling thread, and the alert index and canvas changes
+        are submitted to the render queue as a single batch so that they are applied on the Tk main thread, where
+        NWSAlerts.set_filter and the canvas operations also read the index.
+        
+        event: noaa.events.ChangeEvent
+            Changes emitted by the feed. New alerts in a stale event are drawn as stale (restored from a snapshot).
         """
         sys.stdout.write('[NWSAlerts] Updating alert polygons.')
         
-        ### find new alert polygons ###
-        new_alert_polygons = []
-        for alert_type in list(DEFAULT_ALERT_PROPERTIES.keys())[::-1]:
-            new_alert_polygons.extend([dict(
-                coordinates=alert.geometry['coordinates'],
-                fill_color=DEFAULT_ALERT_PROPERTIES[alert.alert_type][1],
-                border_color=DEFAULT_ALERT_PROPERTIES[alert.alert_type][1],
-                border_width=2,
-                name=alert.alert_type,
-                data=alert)
-                for alert in self.alerts_with_geometry
-                if alert.alert_type == alert_type
-                and alert.alert_id in self.new_alert_ids])
+        ### find new alert polygons (the z-order manager keeps higher priority alerts on top) ###
+        new_alerts = sorted([alert for alert in event.added
+                             if alert.geometry is not None and alert.alert_type in DEFAULT_ALERT_PROPERTIES],
+                            key=lambda alert: DEFAULT_ALERT_PROPERTIES[alert.alert_type][0],
+                            reverse=True)
         
-        ### identify expired/canceled alert polygons ###
-        polygons = [p for p in self._map_widget.canvas_polygon_list if hasattr(p.data, 'alert_id')]
-        polygons_to_remove = [p for p in polygons if p.data.alert_id in self.old_alert_ids]
+        operations = [partial(self._apply_change, event)]  # update the alert index first
+        operations.extend([partial(self._add_alert_polygon, alert) for alert in new_alerts])  # draw new alert polygons
+        operations.extend([partial(self._redraw_alert_polygon, alert) for alert in event.modified])  # updated alerts
+        if event.removed:
+            operations.append(partial(self._remove_alert_polygons, set(event.removed)))  # expired/canceled alerts
+        if not event.stale:
+            operations.append(self._confirm_stale_alerts)  # restored alerts still active
         
-        # draw new alert polygons
-        for p in new_alert_polygons:
-            polygon = tkmap.map_widget.CanvasPolygon(map_widget=self._map_widget,
-                                                     position_list=p['coordinates'],
-                                                     command=lambda p: self._alert_popup(p),
-                                                     fill_color=p['fill_color'],
-                                                     outline_color=p['border_color'],
-                                                     border_width=p['border_width'],
-                                                     name=p['name'],
-                                                     data=p['data'])
-            polygon.draw()
-            self._map_widget.canvas_polygon_list.append(polygon)
+        self._render_queue.submit(operations, name='NWSAlerts')
+
+    def set_filter(self, alert_filter: AlertFilter) -> None:
+        """
+        Changes which alerts are shown on the map. Existing canvas items are hidden or shown by bucket (alert type and
+        sender) with a single canvas call per bucket whose visibility changed; no polygons are created or deleted. This
+        method must be called from the Tk main thread.
+        
+        alert_filter: noaa.nws.filter.AlertFilter
+            New filter. Use AlertFilter() to show all alerts.
+        """
+        start_time = time.perf_counter()
+        self._filter = alert_filter
+        
+        n_changed = 0
+        for bucket, tag in self._bucket_tags.items():
+            hidden = not self._bucket_visible(bucket)
+            if hidden != (bucket in self._hidden_buckets):
+                self._map_widget.canvas.itemconfig(tag, state='hidden' if hidden else 'normal')
+                if hidden:
+                    self._hidden_buckets.add(bucket)
+                else:
+                    self._hidden_buckets.discard(bucket)
+                n_changed += 1
         
-        # remove expired/canceled alert polygons
-        for polygon in polygons_to_remove:
-            polygon.delete()
+        n_hidden = sum(len(alert_ids) for bucket, alert_ids in self._index.buckets.items()
+                       if bucket in self._hidden_buckets)
+        sys.stdout.write(f'[NWSAlerts] Alert filter changed: {n_changed} bucket(s) toggled, {n_hidden} alert(s) '
+                         f'hidden ({1000 * (time.perf_counter() - start_time):.2f} ms)')
+    
+    def is_visible(self, alert: NWSAlert) -> bool:
+        """
+        Checks whether an alert is shown by the current filter.
+        """
+        return self._bucket_visible(AlertIndex.bucket_key(alert))
+    
+    def _bucket_visible(self, bucket: tuple[str, str]) -> bool:
+        """
+        Internal method that checks whether a bucket (alert type, sender) is shown by the current filter.
+        """
+        alert_type, sender = bucket
+        return self._filter.matches(alert_type, sender, DEFAULT_ALERT_PROPERTIES[alert_type][0])
 
-    def _check_for_new_or_expired_alerts(self, alerts):
+    def _style_alert_polygon(self, polygon: SimplifiedPolygon) -> None:
+        """
+        Internal method called every time a canvas item is created for an alert polygon. The item is moved to the top
+        of its priority level and tagged with its bucket so that filters can hide and show whole buckets. Polygons of
+        alerts restored from a snapshot are drawn with a dashed outline and lighter fill.
         """
-        Compares an updated alert list to what is currently saved in order to find new and expired alerts.
+        self._z_order.place(polygon.canvas_polygon, DEFAULT_ALERT_PROPERTIES[polygon.data.alert_type][0])
+        
+        bucket = AlertIndex.bucket_key(polygon.data)
+        tag = self._bucket_tags.get(bucket)
+        if tag is None:
+            tag = self._bucket_tags[bucket] = f'alerts{len(self._bucket_tags)}'
+            if not self._bucket_visible(bucket):
+                self._hidden_buckets.add(bucket)
         
-        alerts: latest NWS alerts.
+        self._map_widget.canvas.addtag_withtag(tag, polygon.canvas_polygon)
+        if bucket in self._hidden_buckets:
+            self._map_widget.canvas.itemconfig(polygon.canvas_polygon, state='hidden')
+        if polygon.data.alert_id in self._stale_alert_ids:
+            self._map_widget.canvas.itemconfig(polygon.canvas_polygon, **STALE_POLYGON_OPTIONS)
+
+    def _apply_change(self, event: ChangeEvent) -> None:
+        """
+        Internal method that applies the changes emitted by the feed to the alert index. Alerts added by a stale event
+        are saved so that their polygons are drawn as stale until they are confirmed.
         """
-        saved_alert_ids = [alert.alert_id for alert in self.alerts]
-        current_alert_ids = [alert.alert_id for alert in alerts]
+        self._index.apply(event.added + event.modified, event.removed)
+        if event.stale:
+            self._stale_alert_ids = {alert.alert_id for alert in event.added}
+
+    def _confirm_stale_alerts(self) -> None:
+        """
+        Internal method that restores the normal style of restored alert polygons once the alerts are confirmed by an
+        update. Alerts that are no longer active were already removed.
+        """
+        alert_ids, self._stale_alert_ids = self._stale_alert_ids, set()
+        for alert_id in alert_ids:
+            for polygon in self._index.get_polygons(alert_id):
+                if polygon.canvas_polygon is not None:
+                    self._map_widget.canvas.itemconfig(polygon.canvas_polygon, **POLYGON_OPTIONS)
+
+    def _add_alert_polygon(self, alert: NWSAlert) -> None:
+        """
+        Internal method that draws the polygons for an alert (one for each part of a MultiPolygon) and saves them in the
+        alert index.
+        
+        alert: NWSAlert
+            Alert with a geometry and a type listed in DEFAULT_ALERT_PROPERTIES.
+        """
+        polygons = []
+        for part, exterior in enumerate(alert.geometry.exteriors()):
+            polygons.append(self._draw_alert_polygon(coordinates=exterior,
+                                                     fill_color=DEFAULT_ALERT_PROPERTIES[alert.alert_type][1],
+                                                     border_color=DEFAULT_ALERT_PROPERTIES[alert.alert_type][1],
+                                                     border_width=2,
+                                                     name=alert.alert_type,
+                                                     data=alert,
+                                                     key=(alert.alert_id, part)))
+            self._index_alert_part(alert, part)
+        self._index.set_polygons(alert.alert_id, polygons)
+
+    def _index_alert_part(self, alert: NWSAlert, part: int) -> None:
+        """
+        Internal method that adds one part of an alert's geometry (including holes) to the spatial index.
+        """
+        coordinates, ring_offsets = alert.geometry.part(part)
+        self._spatial_index.insert((alert.alert_id, part), coordinates, alert, layer='alerts', ring_offsets=ring_offsets)
+
+    def _redraw_alert_polygon(self, alert: NWSAlert) -> None:
+        """
+        Internal method that redraws the polygons of an alert that was updated (e.g., trimmed polygon or extended
+        expiration time). The existing canvas items are reused when possible.
+        
+        alert: NWSAlert
+            Latest version of the updated alert.
+        """
+        polygons = self._index.get_polygons(alert.alert_id)
+        drawable = alert.geometry is not None and alert.alert_type in DEFAULT_ALERT_PROPERTIES
+        
+        if drawable and len(polygons) == alert.geometry.n_parts and \
+                all(AlertIndex.bucket_key(polygon.data) == AlertIndex.bucket_key(alert) for polygon in polygons):
+            for part, (polygon, exterior) in enumerate(zip(polygons, alert.geometry.exteriors())):
+                polygon.set_position_list(exterior)
+                polygon.data = alert
+                self._culler.add((alert.alert_id, part), polygon, layer='alerts')
+                self._index_alert_part(alert, part)
+            return
+        
+        # the alert type, sender, or number of parts changed, or the alert gained/lost its geometry, so the polygons are replaced
+        self._remove_alert_polygons({alert.alert_id})
+        if drawable:
+            self._add_alert_polygon(alert)
+
+    def _remove_alert_polygons(self, alert_ids: set[str]) -> None:
+        """
+        Internal method that removes the polygons of the given alerts from the map. The map widget's polygon list is
+        rebuilt once (by the viewport culler) instead of being searched for every removed polygon.
+        
+        alert_ids: set[str]
+            IDs of the alerts whose polygons will be removed.
+        """
+        keys = []
+        for alert_id in alert_ids:
+            n_parts = len(self._index.pop_polygons(alert_id))
+            keys.extend([(alert_id, part) for part in range(n_parts)])
+        
+        for key in keys:
+            self._spatial_index.remove(key)
+        self._culler.remove_many(keys)
+
+    def show_alerts_at(self,
+                       lat: float,
+                       lon: float) -> None:
+        """
+        Displays the alerts that cover a point on the map. If more than one alert covers the point, a chooser listing
+        all overlapping alerts is displayed.
+        
+        Parameters
+        ----------
+        lat: float
+            Latitude of the point.
+        lon: float
+            Longitude of the point.
+        """
+        # an alert is listed once even if several parts of its geometry cover the point, and filtered alerts are skipped
+        alerts = {alert.alert_id: alert for alert in self._spatial_index.query_point(lat, lon, layer='alerts')
+                  if self.is_visible(alert)}
+        alerts = sorted(alerts.values(),
+                        key=lambda alert: DEFAULT_ALERT_PROPERTIES[alert.alert_type][0])
+        
+        if len(alerts) == 1:
+            self._alert_popup(alerts[0])
+        elif len(alerts) > 1:
+            self._alert_chooser(alerts)
+
+    def _alert_chooser(self, alerts: list[NWSAlert]) -> None:
+        """
+        Internal method that displays a list of overlapping alerts. Double-clicking an alert displays its popup.
+        
+        alerts: list[NWSAlert]
+            Alerts that cover the clicked point, sorted by priority.
+        """
+        dialog = tk.Toplevel(self._map_widget)
+        dialog.iconbitmap('warningnav.ico')
+        dialog.title(f'{len(alerts)} Alerts')
+        
+        listbox = tk.Listbox(dialog, width=80, height=min(len(alerts), 15))
+        for alert in alerts:
+            listbox.insert(tk.END, f'{alert.alert_type} - {alert.sender} (expires {alert.time_expires})')
+        listbox.pack(expand=True, fill='both')
+        
+        def open_selected(event=None):
+            for index in listbox.curselection():
+                self._alert_popup(alerts[index])
         
-        self.new_alert_ids = [alert_id for alert_id in current_alert_ids if alert_id not in saved_alert_ids]
-        self.old_alert_ids = [alert_id for alert_id in saved_alert_ids if alert_id not in current_alert_ids]
+        listbox.bind('<Double-Button-1>', open_selected)
+        listbox.bind('<Return>', open_selected)
         
-        sys.stdout.write(f'[NWSAlerts] {len(self.new_alert_ids)} new alert(s) found, '
-                         f'{len(self.old_alert_ids)} alert(s) are no longer active')
+        sys.stdout.write(f'[NWSAlerts] Displaying {len(alerts)} overlapping alerts.')
 
-    def _alert_popup(self, polygon: tkmap.map_widget.CanvasPolygon) -> None:
+    def _alert_popup(self, alert: NWSAlert) -> None:
         """
-        Internal method that displays a popup when clicking on an alert polygon.
+        Internal method that displays a popup for an alert.
         """
         dialog = tk.Toplevel(self._map_widget)
         dialog.iconbitmap('warningnav.ico')
-        dialog.title(polygon.data.alert_type)
+        dialog.title(alert.alert_type)
 
         text_widget = ScrolledText(dialog, wrap=tk.WORD)
-        text_widget.insert(tk.END, polygon.data.description)
+        text_widget.insert(tk.END, alert.description)
         text_widget.config(state='disabled')
         text_widget.pack(expand=True, fill='both')
         
-        sys.stdout.write(f'[NWSAlerts] Displaying alert: {polygon.data.parameters}')
\ No newline at end of file
+        sys.stdout.write(f'[NWSAlerts] Displaying alert: {alert.parameters}')
@@ -0,0 +1,338 @@
+"""
+Retrieval of active NWS alerts, independent of the map and Tk. Every update is turned into a noaa.events.ChangeEvent
+listing the alerts that were added, modified, or removed.
+"""
+from datetime import datetime, timezone
+from debug.metrics import metrics
+from noaa.decode import decode_alerts
+from noaa.events import ChangeEvent
+from noaa.fetch import ConditionalFetcher
+from noaa.geometry import FeatureGeometry, convert_geometry
+from noaa.nws.index import AlertIndex
+from noaa.snapshot import SnapshotStore
+from typing import Callable
+import asyncio
+import hashlib
+import json
+import sys
+import zlib
+
+
+# endpoint listing all active NWS alerts
+ALERTS_URL = 'https://api.weather.gov/alerts/active'
+
+
+class NWSAlert:
+    """
+    Object containing information about active NWS alerts.
+
+    To reduce the memory used by a dashboard that stays open for days, alerts use __slots__, repeated strings (alert
+    types, codes, and senders) are interned, coordinates are stored in a single contiguous float32 array, and the
+    description and parameters are kept compressed until they are needed (e.g., when a popup is opened).
+    The geometry is a noaa.geometry.FeatureGeometry (or None).
+    """
+    __slots__ = ('alert_id', 'alert_type', 'alert_code', 'geometry', 'time_sent', 'time_effective', 'time_onset',
+                 'time_expires', 'sender', 'headline', 'fingerprint', '_parameters', '_description')
+
+    def __init__(self,
+                 alert_id: str,
+                 alert_type: str,
+                 alert_code: str,
+                 geometry: dict,
+                 time_sent: str,
+                 time_effective: str,
+                 time_onset: str,
+                 time_expires: str,
+                 parameters: dict,
+                 sender: str | None,
+                 headline: str,
+                 description: str
+                 ):
+        
+        self.alert_id = alert_id
+        self.alert_type = sys.intern(alert_type)
+        self.alert_code = sys.intern(alert_code)
+        self.geometry = convert_geometry(geometry)  # rounded [lat, lon] coordinates for all rings and parts
+        self.time_sent = time_sent
+        self.time_effective = time_effective
+        self.time_onset = time_onset
+        self.time_expires = time_expires
+        self.sender = sys.intern(sender) if sender is not None else None
+        self.headline = headline
+        
+        parameters_json = json.dumps(parameters, sort_keys=True).encode('utf-8')
+        self._parameters = zlib.compress(parameters_json)
+        self._description = zlib.compress(description.encode('utf-8')) if description is not None else None
+        
+        self._generate_fingerprint(parameters_json)
+
+    @property
+    def parameters(self) -> dict:
+        """
+        Alert parameters (decompressed when accessed).
+        """
+        return json.loads(zlib.decompress(self._parameters))
+
+    @property
+    def description(self) -> str | None:
+        """
+        Alert description (decompressed when accessed).
+        """
+        return zlib.decompress(self._description).decode('utf-8') if self._description is not None else None
+
+    @classmethod
+    def from_parts(cls,
+                   alert_id: str,
+                   alert_type: str,
+                   alert_code: str,
+                   geometry: FeatureGeometry | None,
+                   time_sent: str,
+                   time_effective: str,
+                   time_onset: str,
+                   time_expires: str,
+                   sender: str | None,
+                   headline: str,
+                   parameters: bytes,
+                   description: bytes | None,
+                   fingerprint: str):
+        """
+        Creates an alert from fields that were already converted, compressed, and fingerprinted (e.g., by a
+        noaa.ingest worker process). Repeated strings are interned in the calling process.
+
+        geometry: converted geometry (see noaa.geometry.convert_geometry).
+        parameters: zlib-compressed JSON of the alert parameters with sorted keys.
+        description: zlib-compressed UTF-8 description, or None.
+        fingerprint: fingerprint generated with NWSAlert.generate_fingerprint.
+        """
+        alert = cls.__new__(cls)
+        alert.alert_id = alert_id
+        alert.alert_type = sys.intern(alert_type)
+        alert.alert_code = sys.intern(alert_code)
+        alert.geometry = geometry
+        alert.time_sent = time_sent
+        alert.time_effective = time_effective
+        alert.time_onset = time_onset
+        alert.time_expires = time_expires
+        alert.sender = sys.intern(sender) if sender is not None else None
+        alert.headline = headline
+        alert.fingerprint = fingerprint
+        alert._parameters = parameters
+        alert._description = description
+        return alert
+
+    def _generate_fingerprint(self, parameters_json: bytes):
+        """
+        Generates a fingerprint of the alert's content (see NWSAlert.generate_fingerprint).
+        """
+        self.fingerprint = self.generate_fingerprint(self.geometry, self.time_expires, parameters_json)
+
+    @staticmethod
+    def generate_fingerprint(geometry: FeatureGeometry | None,
+                             time_expires: str,
+                             parameters_json: bytes) -> str:
+        """
+        Generates a fingerprint of an alert's content (geometry, expiration time, and parameters). Two versions of an
+        alert with the same ID will have different fingerprints if the alert was updated.
+
+        geometry: converted geometry of the alert, or None.
+        time_expires: expiration time of the alert.
+        parameters_json: alert parameters encoded as JSON with sorted keys.
+        """
+        fingerprint = hashlib.sha256()
+        if geometry is not None:
+            fingerprint.update(geometry.tobytes())
+        fingerprint.update(str(time_expires).encode('utf-8'))
+        fingerprint.update(parameters_json)
+        return fingerprint.hexdigest()
+
+
+class AlertFeed:
+    """
+    Retrieves active NWS alerts and compares every update to the previous one. The feed does not draw anything: the
+    changes are passed to 'emit' as ChangeEvents, so the feed can run without a display and drive any number of
+    front-ends.
+    """
+    name = 'nws-alerts'
+
+    def __init__(self,
+                 fetcher: ConditionalFetcher = None,
+                 emit: Callable[[ChangeEvent], None] = None,
+                 snapshots: SnapshotStore = None,
+                 ingest=None):
+        """
+        fetcher: noaa.fetch.ConditionalFetcher instance used to send the requests. If None, a new fetcher is created.
+        emit: function called with the ChangeEvent of every update that retrieved new alerts. If None, events are only
+            returned by AlertFeed.update.
+        snapshots: noaa.snapshot.SnapshotStore instance. If None, alerts are not saved between sessions.
+        ingest: noaa.ingest.ProcessIngest instance used to decode the alerts in worker processes. If None, the alerts
+            are decoded on the calling thread.
+        """
+        self._fetcher = fetcher if fetcher is not None else ConditionalFetcher(name='NWSAlerts')
+        self._emit = emit
+        self._snapshots = snapshots
+        self._ingest = ingest
+        self._index = AlertIndex()
+        self.alerts = []
+
+    def get(self, alert_id: str) -> NWSAlert | None:
+        """
+        Returns the active alert with the given ID, or None if the alert is not active.
+        """
+        return self._index.get(alert_id)
+
+    def has_active(self, alert_type: str) -> bool:
+        """
+        Returns True if an alert of the given type (e.g., 'Tornado Warning') is active.
+        """
+        return any(bucket_type == alert_type for bucket_type, _ in self._index.buckets)
+
+    def update(self, timeout: float = None) -> ChangeEvent | None:
+        """
+        Performs a single update of active NWS alerts.
+
+        timeout: float (default = None)
+            Request timeout in seconds.
+
+        Returns
+        -------
+        event: noaa.events.ChangeEvent or None
+            Changes since the last update, or None if the NWS reported that the active alerts have not changed.
+        """
+        self._log_request()
+        with metrics.span('NWSAlerts.fetch'):
+            response = self._fetcher.get(ALERTS_URL, timeout=timeout)
+        return self.process(response.content if response is not None else None)
+
+    async def update_async(self, timeout: float = None) -> ChangeEvent | None:
+        """
+        Performs a single update of active NWS alerts from an asyncio event loop (see noaa.aio.AsyncScheduler). The
+        request is sent with noaa.fetch.AsyncConditionalFetcher.get_async, and the alerts are decoded on a worker
+        thread so that the event loop is not blocked. The feed's fetcher must be an AsyncConditionalFetcher.
+
+        timeout: float (default = None)
+            Request timeout in seconds.
+        """
+        self._log_request()
+        with metrics.span('NWSAlerts.fetch'):
+            content = await self._fetcher.get_async(ALERTS_URL, timeout=timeout)
+        return await asyncio.to_thread(self.process, content)
+
+    def process(self, content: bytes | None) -> ChangeEvent | None:
+        """
+        Decodes a response from the NWS 'alerts/active' endpoint and compares the alerts to the previous update.
+
+        content: bytes or None
+            Raw response content, or None if the NWS reported that the active alerts have not changed.
+
+        Returns
+        -------
+        event: noaa.events.ChangeEvent or None
+            Changes since the last update, or None if the active alerts have not changed.
+        """
+        if content is None:
+            metrics.increment('NWSAlerts.not_modified')
+            sys.stdout.write('[NWSAlerts] Active alerts have not changed.')
+            return None
+
+        alerts = self._parse_alerts(content)
+        with metrics.span('NWSAlerts.diff'):
+            event = self._apply(alerts)
+        self._save_snapshot()
+        self._publish(event)
+        return event
+
+    def restore_snapshot(self, max_age: float = 86400) -> ChangeEvent | None:
+        """
+        Restores the alerts saved in the snapshot store and emits them as a stale event. Restored alerts are compared
+        to the first update like any other alerts. Alerts that have already expired are not restored.
+
+        max_age: float (default = 86400)
+            Maximum age of the snapshot in seconds.
+
+        Returns
+        -------
+        event: noaa.events.ChangeEvent or None
+            Restored alerts, or None if there is no snapshot.
+        """
+        snapshot = self._snapshots.load(self.name, max_age=max_age) if self._snapshots is not None else None
+        if snapshot is None:
+            return None
+
+        alerts, saved_at = snapshot
+        now = datetime.now(timezone.utc)
+        alerts = [alert for alert in alerts if not self._has_expired(alert, now)]
+
+        sys.stdout.write(f'[NWSAlerts] Restored {len(alerts)} alert(s) saved at '
+                         f'{datetime.fromtimestamp(saved_at):%H:%M:%S}.')
+        event = self._apply(alerts, stale=True)
+        self._publish(event)
+        return event
+
+    def _save_snapshot(self) -> None:
+        """
+        Saves the current alerts in the snapshot store.
+        """
+        if self._snapshots is not None:
+            self._snapshots.save(self.name, self.alerts)
+
+    @staticmethod
+    def _has_expired(alert: NWSAlert, now: datetime) -> bool:
+        """
+        Checks whether an alert's expiration time has passed. Alerts without a valid expiration time never expire.
+        """
+        try:
+            return datetime.fromisoformat(alert.time_expires) <= now
+        except (TypeError, ValueError):
+            return False
+
+    def _log_request(self) -> None:
+        """
+        Writes the start of an update to the debug log.
+        """
+        if not self.alerts:  # this condition will be met if this is the first time alerts have been retrieved
+            sys.stdout.write('[NWSAlerts] Retrieving alerts from National Weather Service.')
+        else:
+            sys.stdout.write('[NWSAlerts] Updating active alerts.')
+
+    def _parse_alerts(self, content: bytes) -> list[NWSAlert]:
+        """
+        Decodes the active alerts in a response from the NWS 'alerts/active' endpoint.
+        """
+        if self._ingest is not None:
+            # decoding, geometry conversion, and fingerprinting are done by a worker process
+            alerts = self._ingest.parse_alerts(content)
+        else:
+            # only the fields used by NWSAlert are decoded (when possible, see noaa.decode)
+            with metrics.span('NWSAlerts.decode'):
+                decoded = decode_alerts(content)
+            with metrics.span('NWSAlerts.parse'):
+                alerts = [NWSAlert(**kwargs) for kwargs in decoded]
+        metrics.increment('NWSAlerts.alerts_parsed', len(alerts))
+
+        return alerts
+
+    def _apply(self,
+               alerts: list[NWSAlert],
+               stale: bool = False) -> ChangeEvent:
+        """
+        Replaces the saved alerts with the latest alerts and returns the differences between them.
+        """
+        diff = self._index.update(alerts)
+        self.alerts = alerts
+
+        sys.stdout.write(f'[NWSAlerts] {len(diff.added)} new alert(s) found, {len(diff.changed)} alert(s) updated, '
+                         f'{len(diff.removed)} alert(s) are no longer active')
+
+        return ChangeEvent(self.name,
+                           added=[self._index.get(alert_id) for alert_id in diff.added],
+                           modified=[self._index.get(alert_id) for alert_id in diff.changed],
+                           removed=list(diff.removed),
+                           stale=stale,
+                           state=alerts)
+
+    def _publish(self, event: ChangeEvent) -> None:
+        """
+        Passes an event to the 'emit' function.
+        """
+        if self._emit is not None:
+            self._emit(event)
@@ -0,0 +1,45 @@
+class AlertFilter:
+    """
+    Filter that decides which NWS alerts are shown on the map. Alerts are filtered by bucket (alert type and sender),
+    so the filter is evaluated once per bucket rather than once per alert.
+    """
+    def __init__(self,
+                 types: set[str] = None,
+                 senders: set[str] = None,
+                 min_priority: int = None):
+        """
+        Parameters
+        ----------
+        types: set[str] (default = None)
+            Alert types to show (e.g., {'Tornado Warning'}). If None, all alert types are shown.
+        senders: set[str] (default = None)
+            Senders (NWS offices) to show (e.g., {'NWS Norman OK'}). If None, alerts from all senders are shown.
+        min_priority: int (default = None)
+            Minimum priority of the alerts that are shown. Priorities follow noaa.nws.alerts.DEFAULT_ALERT_PROPERTIES,
+            where lower numbers are more important, so only alerts with a priority number less than or equal to
+            'min_priority' are shown. If None, alerts of all priorities are shown.
+        """
+        self.types = set(types) if types is not None else None
+        self.senders = set(senders) if senders is not None else None
+        self.min_priority = min_priority
+
+    def __bool__(self) -> bool:
+        """
+        Returns False if the filter shows all alerts.
+        """
+        return self.types is not None or self.senders is not None or self.min_priority is not None
+
+    def matches(self,
+                alert_type: str,
+                sender: str,
+                priority: int) -> bool:
+        """
+        Checks whether alerts with the given type, sender, and priority are shown.
+        """
+        if self.types is not None and alert_type not in self.types:
+            return False
+        if self.senders is not None and sender not in self.senders:
+            return False
+        if self.min_priority is not None and priority > self.min_priority:
+            return False
+        return True
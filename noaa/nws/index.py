@@ -0,0 +1,148 @@
+class AlertDiff:
+    """
+    Object containing the IDs of alerts that were added, removed, or changed between two alert updates.
+    """
+    def __init__(self,
+                 added: set[str],
+                 removed: set[str],
+                 changed: set[str]):
+        """
+        added: IDs of alerts that are new.
+        removed: IDs of alerts that are no longer active.
+        changed: IDs of alerts that are still active but have been modified (geometry, expiration time, or parameters).
+        """
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+
+class AlertIndex:
+    """
+    Index of active NWS alerts keyed by alert ID. The index also keeps track of the canvas polygons that belong to each
+    alert so that polygons can be updated or removed without scanning the map widget's polygon list, and groups the
+    alerts into buckets by alert type and sender so that filters can be applied to whole buckets.
+    """
+    def __init__(self):
+        self.alerts = {}  # {alert_id: noaa.nws.alerts.NWSAlert}
+        self.polygons = {}  # {alert_id: list of tkintermapview.map_widget.CanvasPolygon}
+        self.buckets = {}  # {(alert_type, sender): set of alert IDs}
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def __contains__(self, alert_id: str) -> bool:
+        return alert_id in self.alerts
+
+    def get(self, alert_id: str):
+        """
+        Returns the alert with the given ID, or None if the alert is not in the index.
+        """
+        return self.alerts.get(alert_id)
+
+    def diff(self, alerts: list) -> AlertDiff:
+        """
+        Compares a list of alerts to the alerts in the index. The comparison is linear in the number of alerts.
+
+        alerts: list of noaa.nws.alerts.NWSAlert instances
+            Latest NWS alerts.
+        """
+        current_alerts = {alert.alert_id: alert for alert in alerts}
+
+        added = current_alerts.keys() - self.alerts.keys()
+        removed = self.alerts.keys() - current_alerts.keys()
+        changed = {alert_id for alert_id in current_alerts.keys() & self.alerts.keys()
+                   if self._has_changed(self.alerts[alert_id], current_alerts[alert_id])}
+
+        return AlertDiff(added, removed, changed)
+
+    def update(self, alerts: list) -> AlertDiff:
+        """
+        Replaces the alerts in the index with a new list of alerts.
+
+        alerts: list of noaa.nws.alerts.NWSAlert instances
+            Latest NWS alerts.
+
+        Returns
+        -------
+        diff: AlertDiff
+            Differences between the new alerts and the alerts that were previously in the index.
+        """
+        diff = self.diff(alerts)
+        self.alerts = {alert.alert_id: alert for alert in alerts}
+
+        buckets = {}
+        for alert in alerts:
+            buckets.setdefault(self.bucket_key(alert), set()).add(alert.alert_id)
+        self.buckets = buckets
+
+        return diff
+
+    def apply(self,
+              alerts: list,
+              removed: list[str]) -> None:
+        """
+        Adds or replaces alerts and removes alerts by ID. This is used to follow the changes emitted by a feed
+        (noaa.events.ChangeEvent) instead of replacing the whole index.
+
+        alerts: list of noaa.nws.alerts.NWSAlert instances
+            Alerts that are new or were modified.
+        removed: list[str]
+            IDs of alerts that are no longer active.
+        """
+        for alert_id in removed:
+            alert = self.alerts.pop(alert_id, None)
+            if alert is not None:
+                self._discard_from_bucket(alert)
+
+        for alert in alerts:
+            previous = self.alerts.get(alert.alert_id)
+            if previous is not None:
+                self._discard_from_bucket(previous)
+            self.alerts[alert.alert_id] = alert
+            self.buckets.setdefault(self.bucket_key(alert), set()).add(alert.alert_id)
+
+    def _discard_from_bucket(self, alert) -> None:
+        """
+        Removes an alert from its bucket, removing the bucket if it is empty.
+        """
+        bucket = self.bucket_key(alert)
+        alert_ids = self.buckets.get(bucket)
+        if alert_ids is not None:
+            alert_ids.discard(alert.alert_id)
+            if not alert_ids:
+                del self.buckets[bucket]
+
+    def set_polygons(self, alert_id: str, polygons: list) -> None:
+        """
+        Saves the canvas polygons that belong to an alert (one for each part of the alert's geometry).
+        """
+        self.polygons[alert_id] = polygons
+
+    def get_polygons(self, alert_id: str) -> list:
+        """
+        Returns the canvas polygons that belong to an alert. The list is empty if the alert has no polygons.
+        """
+        return self.polygons.get(alert_id, [])
+
+    def pop_polygons(self, alert_id: str) -> list:
+        """
+        Removes and returns the canvas polygons that belong to an alert. The list is empty if the alert has no polygons.
+        """
+        return self.polygons.pop(alert_id, [])
+
+    @staticmethod
+    def bucket_key(alert) -> tuple[str, str]:
+        """
+        Returns the bucket of an alert: (alert type, sender).
+        """
+        return alert.alert_type, alert.sender
+
+    @staticmethod
+    def _has_changed(saved_alert, current_alert) -> bool:
+        """
+        Checks whether an alert with the same ID has been updated by comparing the content fingerprints of the alerts.
+        """
+        return saved_alert.fingerprint != current_alert.fingerprint
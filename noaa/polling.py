@@ -0,0 +1,78 @@
+"""
+Adaptive polling intervals for the NOAA feeds.
+"""
+from typing import Callable
+import sys
+
+
+class AdaptiveInterval:
+    """
+    Polling interval that follows how often a feed changes. After an update that found changes the interval is halved,
+    while a higher-priority condition holds (e.g., Tornado Warnings are active) the minimum interval is used, and after
+    every update that found nothing new the interval grows exponentially up to the maximum. Quiet feeds are polled
+    less often, and feeds are polled more often during active weather.
+    """
+    def __init__(self,
+                 interval: float,
+                 min_interval: float,
+                 max_interval: float,
+                 backoff: float = 1.5,
+                 urgent: Callable[[], bool] = None,
+                 name: str = 'AdaptiveInterval'):
+        """
+        Parameters
+        ----------
+        interval: float
+            Initial interval in seconds.
+        min_interval: float
+            Shortest interval in seconds.
+        max_interval: float
+            Longest interval in seconds.
+        backoff: float (default = 1.5)
+            Factor that the interval is multiplied by after every update that found nothing new.
+        urgent: Callable (default = None)
+            Function that returns True while the feed should be polled at the minimum interval. The function is called
+            after every update.
+        name: str (default = 'AdaptiveInterval')
+            Identifier used when writing to the debug log.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.urgent = urgent
+        self.name = name
+        self.interval = self._clamp(interval)
+
+    def update(self, changed: bool) -> float:
+        """
+        Adjusts the interval after an update of the feed and returns the new interval.
+
+        changed: bool
+            True if the update found changes.
+        """
+        previous = self.interval
+        if self.urgent is not None and self.urgent():
+            self.interval = self.min_interval
+        elif changed:
+            self.interval = self._clamp(self.interval / 2)
+        else:
+            self.interval = self._clamp(self.interval * self.backoff)
+
+        if self.interval != previous:
+            sys.stdout.write(f'[{self.name}] Polling interval changed from {previous:.1f} to {self.interval:.1f} '
+                             f'seconds.')
+        return self.interval
+
+    def set_bounds(self,
+                   min_interval: float,
+                   max_interval: float) -> None:
+        """
+        Changes the shortest and longest intervals (e.g., from a user setting). Equal bounds give a fixed interval. The
+        new bounds are used from the next update of the feed.
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = self._clamp(self.interval)
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
@@ -0,0 +1,266 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from noaa.fetch import ConditionalFetcher, RateLimitError
+from noaa.polling import AdaptiveInterval
+from requests.adapters import HTTPAdapter
+from threading import Condition, Thread
+from typing import Any, Callable
+import heapq
+import random
+import requests
+import sys
+import time
+
+
+class ScheduledFeed:
+    """
+    Object containing the polling state of a single feed.
+    """
+    def __init__(self,
+                 name: str,
+                 callback: Callable,
+                 interval: float,
+                 timeout: float,
+                 max_runs: int | None,
+                 polling: AdaptiveInterval = None):
+        """
+        name: str
+            Name of the feed.
+        callback: Callable
+            Function that performs a single update of the feed. The feed's timeout (seconds) is passed as the only
+            argument.
+        interval: float
+            Time between updates in seconds.
+        timeout: float
+            Request timeout in seconds.
+        max_runs: int or None
+            Maximum number of updates. If None, the feed will update until the scheduler is stopped.
+        polling: noaa.polling.AdaptiveInterval or None
+            Policy that adjusts the interval after every update, based on whether the update found changes (a truthy
+            return value of the callback). If None, the interval is fixed.
+        """
+        self.name = name
+        self.callback = callback
+        self.interval = interval if polling is None else polling.interval
+        self.timeout = timeout
+        self.max_runs = max_runs
+        self.polling = polling
+
+        self.runs = 0
+        self.failures = 0  # number of consecutive failed updates
+        self.running = False
+        self.cancelled = False
+
+    def next_interval(self, result) -> float:
+        """
+        Returns the time until the next update after a successful update.
+
+        result: value returned by the callback (e.g., a noaa.events.ChangeEvent, or None if nothing changed).
+        """
+        if self.polling is not None:
+            self.interval = self.polling.update(bool(result))
+        return self.interval
+
+    def retry_delay(self,
+                    error: BaseException | None,
+                    max_backoff: float) -> float:
+        """
+        Returns the time until the next update after a failed update. The delay requested by the server with a
+        Retry-After header is used if there is one, otherwise the delay is a jittered exponential backoff.
+
+        error: exception raised by the callback (None if the update was cancelled).
+        max_backoff: maximum backoff in seconds.
+        """
+        if isinstance(error, RateLimitError) and error.retry_after is not None:
+            return max(error.retry_after, self.interval)
+        backoff = min(self.interval * 2 ** self.failures, max_backoff)
+        return random.uniform(self.interval, max(backoff, self.interval))
+
+
+class FetchScheduler:
+    """
+    Runs the updates for all NOAA feeds from a single worker pool. All requests share one session, which keeps a pool
+    of keep-alive connections for each host.
+    """
+    def __init__(self,
+                 max_workers: int = 4,
+                 max_backoff: float = 300,
+                 pool_maxsize: int = 4):
+        """
+        Parameters
+        ----------
+        max_workers: int (default = 4)
+            Maximum number of feeds that can be updated at the same time.
+        max_backoff: float (default = 300)
+            Maximum delay between updates (seconds) for a feed that keeps failing.
+        pool_maxsize: int (default = 4)
+            Maximum number of keep-alive connections saved for each host.
+        """
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='noaa-fetch')
+        self._queue = []  # heap of (next update time, sequence number, ScheduledFeed)
+        self._sequence = 0
+        self._condition = Condition()
+        self._stopped = False
+
+        self._thread = Thread(target=self._run, name='noaa-scheduler-thread', daemon=True)
+        self._thread.start()
+
+    def create_fetcher(self, name: str) -> ConditionalFetcher:
+        """
+        Returns a conditional fetcher that uses the shared session.
+
+        name: str
+            Identifier used by the fetcher when writing to the debug log.
+        """
+        return ConditionalFetcher(name=name, session=self.session)
+
+    def add_feed(self,
+                 name: str,
+                 callback: Callable,
+                 interval: float,
+                 timeout: float = 30,
+                 max_runs: int = None,
+                 delay: float = 0,
+                 polling: AdaptiveInterval = None) -> ScheduledFeed:
+        """
+        Adds a feed that is updated periodically on the worker pool.
+
+        Parameters
+        ----------
+        name: str
+            Name of the feed.
+        callback: Callable
+            Function that performs a single update of the feed. The feed's timeout (seconds) is passed as the only
+            argument.
+        interval: float
+            Time between updates in seconds.
+        timeout: float (default = 30)
+            Request timeout in seconds.
+        max_runs: int (default = None)
+            Maximum number of updates. If None, the feed will update until the scheduler is stopped.
+        delay: float (default = 0)
+            Delay before the first update in seconds.
+        polling: noaa.polling.AdaptiveInterval (default = None)
+            Policy that adjusts the interval after every update (see ScheduledFeed). If provided, 'interval' is
+            replaced by the policy's interval.
+
+        Returns
+        -------
+        feed: ScheduledFeed
+            The scheduled feed, which can be passed to FetchScheduler.remove_feed.
+        """
+        feed = ScheduledFeed(name, callback, interval, timeout, max_runs, polling)
+        sys.stdout.write(f'[FetchScheduler] Adding feed: {name}. interval={feed.interval}, timeout={timeout}, '
+                         f'max_runs={max_runs}, adaptive={polling is not None}')
+        self._push(feed, time.monotonic() + delay)
+        return feed
+
+    def remove_feed(self, feed: ScheduledFeed) -> None:
+        """
+        Stops future updates of a feed. An update that is already running will not be interrupted.
+        """
+        feed.cancelled = True
+
+    def submit(self,
+               name: str,
+               callback: Callable,
+               timeout: float = 30) -> Future:
+        """
+        Runs a one-time task on the worker pool.
+
+        Parameters
+        ----------
+        name: str
+            Name of the task.
+        callback: Callable
+            Function to run. The timeout is passed as the only argument.
+        timeout: float (default = 30)
+            Request timeout in seconds.
+        """
+        return self._executor.submit(self._run_task, name, callback, timeout)
+
+    def stop(self) -> None:
+        """
+        Stops all feeds and shuts down the worker pool.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _push(self,
+              feed: ScheduledFeed,
+              next_update: float) -> None:
+        """
+        Adds a feed to the queue and wakes up the scheduler thread.
+        """
+        with self._condition:
+            heapq.heappush(self._queue, (next_update, self._sequence, feed))
+            self._sequence += 1
+            self._condition.notify()
+
+    def _run(self) -> None:
+        """
+        Scheduler thread. Waits until the next feed is due and hands its update to the worker pool.
+        """
+        while True:
+            with self._condition:
+                while not self._stopped and (not self._queue or self._queue[0][0] > time.monotonic()):
+                    wait = self._queue[0][0] - time.monotonic() if self._queue else None
+                    self._condition.wait(timeout=wait)
+                if self._stopped:
+                    return
+                _, _, feed = heapq.heappop(self._queue)
+
+            if feed.cancelled:
+                continue
+
+            feed.running = True
+            future = self._executor.submit(self._run_task, feed.name, feed.callback, feed.timeout)
+            future.add_done_callback(lambda f, feed=feed: self._reschedule(feed, f))
+
+    def _reschedule(self,
+                    feed: ScheduledFeed,
+                    future: Future) -> None:
+        """
+        Schedules the next update of a feed. Failed updates are retried with a jittered exponential backoff.
+        """
+        feed.running = False
+        feed.runs += 1
+
+        if future.cancelled() or future.exception() is not None:
+            feed.failures += 1
+            delay = feed.retry_delay(None if future.cancelled() else future.exception(), self.max_backoff)
+            sys.stderr.write(f'[FetchScheduler] {feed.name} update failed ({feed.failures} in a row). '
+                             f'Retrying in {delay:.1f} seconds.')
+        else:
+            feed.failures = 0
+            delay = feed.next_interval(future.result())
+
+        if feed.cancelled or self._stopped or (feed.max_runs is not None and feed.runs >= feed.max_runs):
+            sys.stdout.write(f'[FetchScheduler] {feed.name} stopped after {feed.runs} update(s).')
+            return
+
+        self._push(feed, time.monotonic() + delay)
+
+    @staticmethod
+    def _run_task(name: str,
+                  callback: Callable,
+                  timeout: float) -> Any:
+        """
+        Runs a feed update, writing any error to the debug log before re-raising it.
+
+        Returns the callback's return value (e.g., a noaa.events.ChangeEvent, or None if nothing changed), which
+        FetchScheduler._reschedule passes to ScheduledFeed.next_interval.
+        """
+        try:
+            return callback(timeout)
+        except Exception as e:
+            sys.stderr.write(f'[FetchScheduler] Error encountered while updating {name}: {e!r}')
+            raise
@@ -0,0 +1,87 @@
+from threading import Lock
+import pickle
+import sqlite3
+import sys
+import time
+import zlib
+
+
+class SnapshotStore:
+    """
+    SQLite store containing the last successfully parsed version of each feed (alerts, storm reports, and the selected
+    outlook). The snapshots are drawn on startup so that the map is not empty while the first requests are in progress,
+    and they remain available if the NOAA servers cannot be reached.
+    """
+    def __init__(self, path: str = 'snapshots.db'):
+        """
+        path: str (default = 'snapshots.db')
+            Path to the SQLite database. The database is created if it does not exist.
+        """
+        self.path = path
+        self._lock = Lock()  # snapshots are saved from the fetch scheduler's worker threads
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS snapshots '
+                                     '(feed TEXT PRIMARY KEY, saved_at REAL NOT NULL, data BLOB NOT NULL)')
+
+    def save(self, feed: str, data) -> None:
+        """
+        Saves the latest snapshot of a feed, replacing the previous snapshot.
+
+        Parameters
+        ----------
+        feed: str
+            Name of the feed (e.g., 'nws-alerts').
+        data: Any
+            Parsed feed data. The data must be picklable.
+        """
+        blob = zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO snapshots (feed, saved_at, data) VALUES (?, ?, ?)',
+                                     (feed, time.time(), blob))
+
+    def load(self, feed: str, max_age: float = None):
+        """
+        Loads the latest snapshot of a feed.
+
+        Parameters
+        ----------
+        feed: str
+            Name of the feed.
+        max_age: float (default = None)
+            Maximum age of the snapshot in seconds. Older snapshots are ignored. If None, snapshots of any age are
+            returned.
+
+        Returns
+        -------
+        snapshot: tuple[Any, float] or None
+            Feed data and the time that it was saved (seconds since the epoch), or None if there is no usable snapshot.
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT saved_at, data FROM snapshots WHERE feed = ?', (feed, )).fetchone()
+        if row is None:
+            return None
+
+        saved_at, blob = row
+        if max_age is not None and time.time() - saved_at > max_age:
+            return None
+
+        try:
+            data = pickle.loads(zlib.decompress(blob))
+        except Exception as e:  # snapshot saved by an incompatible version of the app
+            sys.stderr.write(f'[SnapshotStore] Could not load the {feed} snapshot: {e}')
+            self.delete(feed)
+            return None
+
+        return data, saved_at
+
+    def delete(self, feed: str) -> None:
+        """
+        Deletes the snapshot of a feed. Nothing happens if the feed does not have a snapshot.
+        """
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM snapshots WHERE feed = ?', (feed, ))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,236 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from debug.metrics import metrics
+from noaa.decode import decode_outlook
+from noaa.events import ChangeEvent
+from noaa.scheduler import FetchScheduler
+from threading import Lock
+from typing import Callable
+import sys
+import time
+
+
+# nominal issuance times (UTC) of the SPC convective outlooks, keyed by a substring of the product URL
+ISSUANCE_TIMES = {
+    'day1otlk': ['0100', '0600', '1300', '1630', '2000'],
+    'day2otlk': ['0600', '1730'],
+    'day3otlk': ['0730', '1930'],
+}
+
+# products that are downloaded in the background so that they can be drawn without waiting for a request
+PREFETCH_URLS = [
+    'https://www.spc.noaa.gov/products/outlook/day1otlk_cat.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day1otlk_torn.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day1otlk_hail.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day1otlk_wind.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day2otlk_cat.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day2otlk_torn.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day2otlk_hail.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day2otlk_wind.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day3otlk_cat.lyr.geojson',
+    'https://www.spc.noaa.gov/products/outlook/day3otlk_prob.lyr.geojson',
+]
+
+
+def next_issuance(url: str, now: datetime = None) -> datetime | None:
+    """
+    Returns the next nominal issuance time (UTC) of an outlook product, or None if the product's schedule is unknown.
+
+    Parameters
+    ----------
+    url: str
+        URL of the outlook product.
+    now: datetime (default = None)
+        Current time (timezone-aware). If None, the current UTC time is used.
+    """
+    times = next((times for product, times in ISSUANCE_TIMES.items() if product in url), None)
+    if times is None:
+        return None
+
+    now = now if now is not None else datetime.now(timezone.utc)
+    for day in (0, 1):
+        date = now.date() + timedelta(days=day)
+        for hhmm in times:
+            issuance = datetime(date.year, date.month, date.day, int(hhmm[:2]), int(hhmm[2:]), tzinfo=timezone.utc)
+            if issuance > now:
+                return issuance
+
+
+class CachedOutlook:
+    """
+    Outlook product saved in an OutlookCache.
+    """
+    def __init__(self,
+                 url: str,
+                 features: list[dict],
+                 expires: float):
+        """
+        url: URL of the outlook product.
+        features: outlook features returned by noaa.decode.decode_outlook.
+        expires: time (time.time()) after which the product must be revalidated with the SPC.
+        """
+        self.url = url
+        self.features = features
+        self.expires = expires
+        # polygons created from the features by a front-end (see noaa.spc.outlooks.get_outlook_polygons). The polygons
+        # are reused every time the outlook is drawn, so their simplified levels of detail are only computed once.
+        self.polygons = None
+        # held while the polygons are created, so that they are only created once when the dashboard's worker thread
+        # and an SPCOutlook request the outlook at the same time
+        self.lock = Lock()
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires
+
+
+class OutlookCache:
+    """
+    LRU cache of SPC outlook products keyed by URL. Each product expires at its next scheduled issuance time (or after
+    'max_ttl' seconds, whichever comes first), after which it is revalidated with a conditional request so that an
+    unchanged product is not downloaded again. Products that are downloaded are emitted as ChangeEvents, so front-ends
+    can prepare them for drawing before they are requested.
+    """
+    name = 'spc-outlook'
+
+    def __init__(self,
+                 scheduler: FetchScheduler,
+                 max_entries: int = 16,
+                 max_ttl: float = 1800,
+                 emit: Callable[[ChangeEvent], None] = None):
+        """
+        Parameters
+        ----------
+        scheduler: noaa.scheduler.FetchScheduler
+            Scheduler that provides the shared session and runs the background prefetch.
+        max_entries: int (default = 16)
+            Maximum number of products in the cache. The least recently used product is removed when the cache is full.
+        max_ttl: float (default = 1800)
+            Maximum time (seconds) that a product is used before it is revalidated.
+        emit: Callable (default = None)
+            Function called with a ChangeEvent whenever a product is downloaded. The new or modified CachedOutlook is
+            listed in the event, along with the URLs of any products that were evicted to make room for it.
+        """
+        self._emit = emit
+        self._scheduler = scheduler
+        self._fetcher = scheduler.create_fetcher('OutlookCache')
+        self._entries = OrderedDict()  # {url: CachedOutlook}, least recently used first
+        self._lock = Lock()  # products are retrieved from the scheduler's worker threads
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, url: str) -> CachedOutlook | None:
+        """
+        Returns a cached product if it has not expired, otherwise None. No requests are sent.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or entry.expired:
+                return None
+            self._entries.move_to_end(url)
+            return entry
+
+    def get(self,
+            url: str,
+            timeout: float = None) -> CachedOutlook:
+        """
+        Returns an outlook product, sending a (conditional) request if the product is not cached or has expired.
+
+        Parameters
+        ----------
+        url: str
+            URL of the outlook product.
+        timeout: float (default = None)
+            Request timeout in seconds.
+        """
+        entry = self.peek(url)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(url)
+        if entry is None:
+            self._fetcher.reset(url)  # the product was evicted, so a '304 Not Modified' response cannot be used
+        previous = entry
+
+        with metrics.span('SPCOutlook.fetch'):
+            response = self._fetcher.get(url, timeout=timeout)
+        if response is None:
+            metrics.increment('SPCOutlook.not_modified')
+            sys.stdout.write(f'[OutlookCache] Outlook has not changed: {url}')
+        else:
+            with metrics.span('SPCOutlook.decode'):
+                features = decode_outlook(response.content)
+            entry = CachedOutlook(url, features, 0)
+        entry.expires = self._expiration_time(url)
+
+        evicted = []
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+
+        if entry is not previous and self._emit is not None:
+            self._emit(ChangeEvent(self.name,
+                                   added=[entry] if previous is None else [],
+                                   modified=[entry] if previous is not None else [],
+                                   removed=evicted))
+
+        return entry
+
+    def start_prefetch(self,
+                       urls: list[str] = None,
+                       interval: float = 900,
+                       delay: float = 30,
+                       timeout: float = 30) -> None:
+        """
+        Periodically downloads outlook products in the background. All products are retrieved one after another in a
+        single task, so the prefetch never uses more than one of the scheduler's workers.
+
+        Parameters
+        ----------
+        urls: list[str] (default = None)
+            Products to prefetch. If None, the Day 1-3 convective outlooks are prefetched.
+        interval: float (default = 900)
+            Time between prefetches in seconds. Products that have not expired are skipped.
+        delay: float (default = 30)
+            Delay before the first prefetch in seconds, so that the prefetch does not compete with the first alert and
+            report updates.
+        timeout: float (default = 30)
+            Request timeout in seconds.
+        """
+        urls = list(urls) if urls is not None else PREFETCH_URLS
+        self._scheduler.add_feed('spc-outlook-prefetch',
+                                 lambda timeout: self.prefetch(urls, timeout),
+                                 interval=interval,
+                                 timeout=timeout,
+                                 delay=delay)
+
+    def prefetch(self,
+                 urls: list[str],
+                 timeout: float = None) -> None:
+        """
+        Retrieves the products that are not cached or have expired.
+        """
+        n_fetched = 0
+        for url in urls:
+            if self.peek(url) is None:
+                self.get(url, timeout=timeout)
+                n_fetched += 1
+
+        if n_fetched > 0:
+            sys.stdout.write(f'[OutlookCache] Prefetched {n_fetched} outlook(s).')
+
+    def _expiration_time(self, url: str) -> float:
+        """
+        Returns the time (time.time()) at which a product that was just retrieved expires.
+        """
+        expires = time.time() + self.max_ttl
+        issuance = next_issuance(url)
+        if issuance is not None:
+            expires = min(expires, issuance.timestamp())
+        return expires
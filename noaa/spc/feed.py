@@ -0,0 +1,389 @@
+"""
+Retrieval of today's SPC storm reports, independent of the map and Tk. Every update is turned into a
+noaa.events.ChangeEvent listing the reports that were added or removed.
+"""
+from datetime import datetime, timedelta
+from debug.metrics import metrics
+from lxml import etree
+from noaa.events import ChangeEvent
+from noaa.fetch import ConditionalFetcher
+from noaa.snapshot import SnapshotStore
+from noaa.spc.kml import KMLError, iter_kmz_placemarks, placemark_key, read_descriptions
+from typing import Callable
+import asyncio
+import hashlib
+import sys
+import zipfile
+
+
+# KMZ file containing today's filtered storm reports
+REPORTS_URL = 'https://www.spc.noaa.gov/climo/reports/today_filtered.kmz'
+
+
+class SPCReport:
+    """
+    Object containing information for an SPC storm report. Reports use __slots__ and repeated strings (report types,
+    dates, counties, and states) are interned to reduce memory usage.
+    """
+    __slots__ = ('report_type', 'date', 't', 'mag', 'location', 'county', 'state', 'lat', 'lon', 'description', 'id')
+
+    def __init__(self,
+                 description: bytes,
+                 html_parser: etree.HTMLParser = None,
+                 report_id: str = None):
+        """
+        description: bytes
+            Raw HTML description of the report's KML placemark. To read many reports, use read_reports, which reads
+            all descriptions in a single pass of the HTML parser.
+        html_parser: etree.HTMLParser (default = None)
+            Parser used to read the description. If None, a new parser is created.
+        report_id: str (default = None)
+            Unique ID of the report. If None, an ID is generated from the report's fields.
+
+        Raises
+        ------
+        noaa.spc.kml.KMLError
+            If the description does not have the layout of a storm report.
+        """
+        if html_parser is None:
+            html_parser = etree.HTMLParser(encoding='utf-8')
+        fields = read_descriptions([description], html_parser)[0]
+        if fields is None:
+            raise KMLError('The placemark description does not have the layout of a storm report.')
+        self._set_fields(fields, report_id)
+
+    @classmethod
+    def from_fields(cls,
+                    fields: dict,
+                    report_id: str = None):
+        """
+        Creates a report from fields that were already read from its description (see noaa.spc.kml.read_descriptions).
+
+        fields: fields of the report returned by noaa.spc.kml.read_descriptions.
+        report_id: unique ID of the report. If None, an ID is generated from the report's fields.
+        """
+        report = cls.__new__(cls)
+        report._set_fields(fields, report_id)
+        return report
+
+    def _set_fields(self,
+                    fields: dict,
+                    report_id: str | None) -> None:
+        """
+        Saves the fields of the report, interning repeated strings.
+        """
+        self.report_type = sys.intern(fields['report_type'])
+        self.date = sys.intern(fields['date'])
+        self.t = fields['t']
+        self.mag = fields['mag']
+        self.location = fields['location']
+        self.county, self.state = sys.intern(fields['county']), sys.intern(fields['state'])
+        self.lat = fields['lat']
+        self.lon = fields['lon']
+        self.description = fields['description']
+        
+        # reformatting and ID generation
+        self._reformat_mag()
+        if report_id is None:
+            self._generate_id()
+        else:
+            self.id = report_id
+        
+    def _generate_id(self):
+        """
+        Generates a unique ID for the storm report.
+        """
+        report_str = str(f"{self.report_type}{self.date}{self.t}{self.mag}{self.location}{self.county}{self.state}"
+                         f"{self.description}{self.lat}{self.lon}")
+        self.id = hashlib.sha256(report_str.encode('utf-8')).hexdigest()
+
+    def _reformat_mag(self):
+        """
+        Reformats the magnitude string of the storm report.
+        """
+        if 'Hail' in self.report_type:
+            self.mag = self.mag.split(' ')[1]  # hail size (in.)
+        elif 'Wind' in self.report_type:
+            self.mag = "" if "Unknown" in self.mag else self.mag.split(' ')[1]  # mph
+        else:
+            self.mag = ""  # tornado reports do not have a magnitude
+
+
+def read_reports(kmz: bytes,
+                 seen_keys,
+                 html_parser: etree.HTMLParser) -> tuple[list[tuple[str, str]], dict[str, SPCReport]]:
+    """
+    Reads the storm reports in a KMZ file. The placemarks are streamed from the KMZ file, and only the descriptions of
+    placemarks that are not in 'seen_keys' are read, all in a single pass of the HTML parser (see
+    noaa.spc.kml.read_descriptions). Placemarks whose descriptions cannot be read are skipped.
+
+    Parameters
+    ----------
+    kmz: bytes
+        Contents of the KMZ file.
+    seen_keys: set[str] or dict[str, SPCReport]
+        Keys of the placemarks that were already read (see noaa.spc.kml.placemark_key).
+    html_parser: etree.HTMLParser
+        Parser used to read the descriptions.
+
+    Returns
+    -------
+    entries: list[tuple[str, str]]
+        (report type, placemark key) of every placemark, in the order of the KMZ file.
+    new_reports: dict[str, SPCReport]
+        Reports that were read, keyed by placemark key.
+    """
+    entries = []
+    new_descriptions = {}  # {placemark key: description} of the placemarks that were not seen
+    for report_type, description in iter_kmz_placemarks(kmz):
+        key = placemark_key(report_type, description)
+        entries.append((report_type, key))
+        if key not in seen_keys:
+            new_descriptions.setdefault(key, description)
+
+    new_reports = {}
+    for key, fields in zip(new_descriptions, read_descriptions(list(new_descriptions.values()), html_parser)):
+        if fields is not None:
+            new_reports[key] = SPCReport.from_fields(fields, report_id=key)
+
+    if len(new_reports) < len(new_descriptions):
+        sys.stderr.write(f'[SPCReports] Skipped {len(new_descriptions) - len(new_reports)} placemark(s) that are not '
+                         f'storm reports.')
+        entries = [(report_type, key) for report_type, key in entries if key in new_reports or key in seen_keys]
+
+    return entries, new_reports
+
+
+class ReportFeed:
+    """
+    Retrieves today's filtered storm reports and compares every update to the previous one. The feed does not draw
+    anything: the changes are passed to 'emit' as ChangeEvents, so the feed can run without a display and drive any
+    number of front-ends.
+    """
+    name = 'spc-reports'
+
+    def __init__(self,
+                 fetcher: ConditionalFetcher = None,
+                 emit: Callable[[ChangeEvent], None] = None,
+                 snapshots: SnapshotStore = None,
+                 ingest=None):
+        """
+        fetcher: noaa.fetch.ConditionalFetcher instance used to send the requests. If None, a new fetcher is created.
+        emit: function called with the ChangeEvent of every update that retrieved new reports. If None, events are only
+            returned by ReportFeed.update.
+        snapshots: noaa.snapshot.SnapshotStore instance. If None, reports are not saved between sessions.
+        ingest: noaa.ingest.ProcessIngest instance used to parse the reports in worker processes. If None, the reports
+            are parsed on the calling thread.
+        """
+        self._fetcher = fetcher if fetcher is not None else ConditionalFetcher(name='SPCReports')
+        self._emit = emit
+        self._snapshots = snapshots
+        self._ingest = ingest
+        self._html_parser = etree.HTMLParser(encoding='utf-8')  # shared by all reports
+        self._seen_reports = {}  # {placemark key: SPCReport} for the current convective day
+        self._convective_day = None
+        self.reports = {'tornado': [], 'wind': [], 'hail': []}
+
+    def update(self, timeout: float = None) -> ChangeEvent | None:
+        """
+        Performs a single update of today's storm reports.
+
+        timeout: float (default = None)
+            Request timeout in seconds.
+
+        Returns
+        -------
+        event: noaa.events.ChangeEvent or None
+            Changes since the last update, or None if the reports could not be read or have not changed.
+        """
+        sys.stdout.write('[SPCReports] Updating reports.')
+        with metrics.span('SPCReports.fetch'):
+            response = self._fetcher.get(REPORTS_URL, timeout=timeout)
+        return self.process(response.content if response is not None else None)
+
+    async def update_async(self, timeout: float = None) -> ChangeEvent | None:
+        """
+        Performs a single update of today's storm reports from an asyncio event loop (see noaa.aio.AsyncScheduler).
+        The request is sent with noaa.fetch.AsyncConditionalFetcher.get_async, and the reports are parsed on a worker
+        thread so that the event loop is not blocked. The feed's fetcher must be an AsyncConditionalFetcher.
+
+        timeout: float (default = None)
+            Request timeout in seconds.
+        """
+        sys.stdout.write('[SPCReports] Updating reports.')
+        with metrics.span('SPCReports.fetch'):
+            content = await self._fetcher.get_async(REPORTS_URL, timeout=timeout)
+        return await asyncio.to_thread(self.process, content)
+
+    def process(self, content: bytes | None) -> ChangeEvent | None:
+        """
+        Reads the KMZ file containing today's storm reports and compares the reports to the previous update.
+
+        content: bytes or None
+            Contents of the KMZ file, or None if the SPC reported that the reports have not changed.
+
+        Returns
+        -------
+        event: noaa.events.ChangeEvent or None
+            Changes since the last update, or None if the reports could not be read or have not changed.
+        """
+        if content is None:
+            metrics.increment('SPCReports.not_modified')
+            sys.stdout.write('[SPCReports] Storm reports have not changed.')
+            return None
+
+        reports = self._read_reports(content)
+        if reports is None:
+            return None
+
+        with metrics.span('SPCReports.diff'):
+            event = self._apply(reports)
+        self._save_snapshot()
+        self._publish(event)
+        return event
+
+    def restore_snapshot(self, max_age: float = 86400) -> ChangeEvent | None:
+        """
+        Restores the reports saved in the snapshot store and emits them as a stale event. Snapshots from a previous
+        convective day are ignored.
+
+        max_age: float (default = 86400)
+            Maximum age of the snapshot in seconds.
+
+        Returns
+        -------
+        event: noaa.events.ChangeEvent or None
+            Restored reports, or None if there is no snapshot for the current convective day.
+        """
+        snapshot = self._snapshots.load(self.name, max_age=max_age) if self._snapshots is not None else None
+        if snapshot is None:
+            return None
+
+        (convective_day, seen_reports, reports), saved_at = snapshot
+        self._check_convective_day()
+        if convective_day != self._convective_day:
+            return None
+
+        self._seen_reports.update(seen_reports)
+        event = self._apply(reports, stale=True)
+
+        sys.stdout.write(f'[SPCReports] Restored {len(event.added)} report(s) saved at '
+                         f'{datetime.fromtimestamp(saved_at):%H:%M:%S}.')
+        self._publish(event)
+        return event
+
+    def _save_snapshot(self) -> None:
+        """
+        Saves the current reports in the snapshot store.
+        """
+        if self._snapshots is not None:
+            self._snapshots.save(self.name, (self._convective_day, self._seen_reports, self.reports))
+
+    def _read_reports(self, kmz: bytes) -> dict[str, list[SPCReport]] | None:
+        """
+        Reads the reports in the KMZ file containing today's filtered storm reports.
+
+        kmz: bytes
+            Contents of the KMZ file.
+
+        Returns
+        -------
+        reports: dict[str, list[SPCReport]] or None
+            Reports of each type ('tornado', 'wind', and 'hail'), or None if the KMZ file could not be read.
+        """
+        self._check_convective_day()
+
+        reports = {'tornado': [], 'wind': [], 'hail': []}
+
+        # stream the placemarks directly from the KMZ file containing today's reports (decoding and parsing are timed
+        # together because the placemarks are parsed while the KMZ is being read)
+        try:
+            with metrics.span('SPCReports.parse'):
+                n_parsed = self._parse_reports(kmz, reports)
+        except (zipfile.BadZipFile, etree.XMLSyntaxError, KMLError):
+            sys.stderr.write('[SPCReports] Error encountered when reading KMZ file. This error usually corrects itself after '
+                             'a few minutes; contact Andrew Justin at andrewjustinwx@gmail.com or open an issue on our '
+                             'GitHub page if this error persists.')
+            self._fetcher.reset(REPORTS_URL)
+            return None
+
+        reports_torn = reports['tornado']
+        reports_wind = reports['wind']
+        reports_hail = reports['hail']
+
+        if not reports_torn:
+            sys.stdout.write('[SPCReports] No tornado reports found.')
+        if not reports_wind:
+            sys.stdout.write('[SPCReports] No wind reports found.')
+        if not reports_hail:
+            sys.stdout.write('[SPCReports] No hail reports found.')
+
+        sys.stdout.write(f'[SPCReports] Total reports: T={len(reports_torn)} W={len(reports_wind)} H={len(reports_hail)} '
+                         f'({n_parsed} parsed)')
+
+        metrics.increment('SPCReports.reports_parsed', n_parsed)
+        return reports
+
+    def _parse_reports(self,
+                       kmz: bytes,
+                       reports: dict[str, list[SPCReport]]) -> int:
+        """
+        Internal method that reads the reports in a KMZ file and adds them to 'reports'.
+
+        Returns
+        -------
+        n_parsed: int
+            Number of reports that had to be parsed (reports that were already seen today are reused).
+        """
+        if self._ingest is not None:
+            # only the placemarks that were not seen today are parsed by the worker process
+            entries, new_reports = self._ingest.parse_reports(kmz, set(self._seen_reports))
+        else:
+            # placemarks that were already seen today are reused without reading their descriptions
+            entries, new_reports = read_reports(kmz, self._seen_reports, self._html_parser)
+
+        self._seen_reports.update(new_reports)
+        for report_type, key in entries:
+            reports[report_type].append(self._seen_reports[key])
+        return len(new_reports)
+
+    def _apply(self,
+               reports: dict[str, list[SPCReport]],
+               stale: bool = False) -> ChangeEvent:
+        """
+        Replaces the saved reports with the latest reports and returns the differences between them. Reports never
+        change once they are listed, so the event does not contain any modified reports.
+        """
+        saved_reports = {report.id: report for reports_of_type in self.reports.values() for report in reports_of_type}
+        current_reports = {report.id: report for reports_of_type in reports.values() for report in reports_of_type}
+        self.reports = reports
+
+        added = current_reports.keys() - saved_reports.keys()
+        removed = saved_reports.keys() - current_reports.keys()
+        sys.stdout.write(f'[SPCReports] {len(added)} new reports found.')
+
+        return ChangeEvent(self.name,
+                           added=[current_reports[report_id] for report_id in added],
+                           modified=[],
+                           removed=list(removed),
+                           stale=stale,
+                           state=reports)
+
+    def _publish(self, event: ChangeEvent) -> None:
+        """
+        Passes an event to the 'emit' function.
+        """
+        if self._emit is not None:
+            self._emit(event)
+
+    def _check_convective_day(self) -> None:
+        """
+        Clears the saved placemarks when a new SPC convective day (12Z to 12Z) starts.
+        """
+        convective_day = (datetime.utcnow() - timedelta(hours=12)).date()
+        if convective_day != self._convective_day:
+            if self._convective_day is not None:
+                sys.stdout.write(f'[SPCReports] New convective day ({convective_day}). Clearing '
+                                 f'{len(self._seen_reports)} saved report(s).')
+            self._seen_reports.clear()
+            self._convective_day = convective_day
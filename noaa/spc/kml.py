@@ -0,0 +1,157 @@
+"""
+Streaming reader for the SPC storm report KMZ files.
+"""
+from lxml import etree
+from typing import IO, Iterator
+import hashlib
+import io
+import zipfile
+
+
+# index of each report folder within the KML 'Document' (the first folder does not contain any reports)
+REPORT_FOLDERS = {1: 'tornado', 2: 'wind', 3: 'hail'}
+
+
+class KMLError(Exception):
+    """
+    Raised by worker processes (see noaa.ingest) when a KMZ file cannot be read. lxml errors cannot be pickled, so
+    they are not passed back to the main process as they are.
+    """
+
+
+def iter_kml_placemarks(kml_file: IO[bytes]) -> Iterator[tuple[str, bytes]]:
+    """
+    Reads the storm report placemarks in a KML file one at a time. Each placemark is discarded after it is read, so
+    the full KML tree is never held in memory.
+
+    kml_file: IO[bytes]
+        KML file (or a member of a KMZ archive opened with zipfile.ZipFile.open).
+
+    Yields
+    ------
+    report_type: str
+        'tornado', 'wind', or 'hail'.
+    description: bytes
+        Raw HTML description of the placemark (UTF-8).
+    """
+    folder_index = -1  # index of the current folder within the 'Document'
+    folder_depth = 0  # number of open folders, used so that nested folders are not counted as report folders
+
+    # only folders and descriptions are passed to Python, and tags are compared as strings (without creating QNames)
+    for event, element in etree.iterparse(kml_file, events=('start', 'end'), tag=('{*}Folder', '{*}description')):
+        if element.tag.endswith('Folder'):
+            if event == 'start':
+                if folder_depth == 0:
+                    folder_index += 1
+                folder_depth += 1
+            else:
+                folder_depth -= 1
+                element.clear()
+            continue
+
+        placemark = element.getparent()
+        if event != 'end' or placemark is None or not placemark.tag.endswith('Placemark'):
+            continue  # descriptions of the document or a folder
+
+        report_type = REPORT_FOLDERS.get(folder_index)
+        if report_type is not None and element.text:
+            yield report_type, element.text.encode('utf-8')
+
+        # discard the placemark and any siblings that were already read
+        placemark.clear()
+        parent = placemark.getparent()
+        if parent is not None:
+            while placemark.getprevious() is not None:
+                del parent[0]
+
+
+def iter_kmz_placemarks(kmz: bytes) -> Iterator[tuple[str, bytes]]:
+    """
+    Reads the storm report placemarks in a KMZ archive one at a time, streaming the KML directly from the archive.
+
+    kmz: bytes
+        Contents of the KMZ file.
+
+    Yields
+    ------
+    report_type: str
+        'tornado', 'wind', or 'hail'.
+    description: bytes
+        Raw HTML description of the placemark (UTF-8).
+
+    Raises
+    ------
+    zipfile.BadZipFile
+        If the KMZ file cannot be read.
+    """
+    with zipfile.ZipFile(io.BytesIO(kmz)) as kmz_zip:
+        with kmz_zip.open(kmz_zip.namelist()[0]) as kml_file:
+            yield from iter_kml_placemarks(kml_file)
+
+
+def placemark_key(report_type: str, description: bytes) -> str:
+    """
+    Generates a key for a placemark from its raw description. The key is much cheaper to generate than parsing the
+    description and is used as the report ID.
+    """
+    return hashlib.blake2b(report_type.encode('utf-8') + description, digest_size=16).hexdigest()
+
+
+def read_descriptions(descriptions: list[bytes],
+                      html_parser: etree.HTMLParser) -> list[dict | None]:
+    """
+    Reads the fields of storm report descriptions. All descriptions are read in a single pass of the HTML parser: they
+    are parsed as one document with a <div> for each description, instead of one document for each report.
+
+    Each description is a table with a single cell containing the header (the location in italics, followed by the
+    report type), the details (county and state, latitude, longitude, date and time, and magnitude, each in the tail
+    of an element), and the comments.
+
+    Parameters
+    ----------
+    descriptions: list[bytes]
+        Raw HTML descriptions of the placemarks (UTF-8).
+    html_parser: etree.HTMLParser
+        Parser used to read the descriptions.
+
+    Returns
+    -------
+    fields: list[dict or None]
+        Fields of each report ('report_type', 'date', 't', 'mag', 'location', 'county', 'state', 'lat', 'lon', and
+        'description'), or None for descriptions that do not have the layout of a storm report.
+    """
+    if not descriptions:
+        return []
+
+    document = b'<html><body><div>' + b'</div><div>'.join(descriptions) + b'</div></body></html>'
+    body = etree.fromstring(document, html_parser)[0]
+    if len(body) != len(descriptions):
+        # a description closed its <div> early or left it open, so the descriptions are parsed one at a time instead
+        if len(descriptions) == 1:
+            return [None]
+        return [read_descriptions([description], html_parser)[0] for description in descriptions]
+
+    return [_read_fields(div) for div in body]
+
+
+def _read_fields(div: etree.ElementBase) -> dict | None:
+    """
+    Reads the fields of a single storm report description (see read_descriptions).
+    """
+    try:
+        cell = div[0][0][0]  # table > tr > td
+        header, details = cell[0][0], cell[1]
+        date, t = details[6].tail.split('  ')[:2]
+        county, state = details[0].tail.split(', ')
+        return {'report_type': header.tail.split(' ')[0],
+                'date': date,
+                't': t,
+                'mag': details[8].tail,
+                'location': header.text,
+                'county': county,
+                'state': state,
+                'lat': float(details[3].tail.replace(',', '')),
+                'lon': float(details[4].tail.replace(',', '')),
+                'description': cell[2].text}
+    except (AttributeError, IndexError, ValueError):
+        return None
@@ -1,13 +1,15 @@
 from datetime import datetime
-from threading import Thread
+from debug.metrics import metrics
+from functools import partial
+from mapping.simplify import SimplifiedPolygon
+from noaa.geometry import convert_geometry
+from noaa.spc.cache import CachedOutlook
 from typing import Callable
-import json
-import requests
 import sys
 import tkintermapview as tkmap
 
 
-class SPCOutlookPolygon(tkmap.map_widget.CanvasPolygon):
+class SPCOutlookPolygon(SimplifiedPolygon):
 
     def __init__(self,
                  map_widget: tkmap.TkinterMapView,
@@ -37,50 +39,108 @@ class SPCOutlookPolygon(tkmap.map_widget.CanvasPolygon):
                          data=data)
 
 
-class SPCOutlook:
+def build_outlook_polygons(map_widget: tkmap.TkinterMapView,
+                           features: list[dict]) -> list[SPCOutlookPolygon]:
+    """
+    Creates the polygons for the features of an SPC outlook. The polygons are not drawn.
+
+    map_widget: tkmap.TkinterMapView
+        Map widget that the polygons will be drawn on.
+    features: list[dict]
+        Outlook features returned by noaa.decode.decode_outlook.
+    """
+    polygons = []
+    for feature in features:
+
+        fill = None
+
+        # convert all rings from [lon, lat] to [lat, lon] at once, then draw the exterior ring of each part
+        geometry = convert_geometry(feature['geometry'], decimals=None)
+        if geometry is None:
+            continue
+
+        for coordinates in geometry.exteriors():
+            polygons.append(SPCOutlookPolygon(map_widget,
+                                              coordinates,
+                                              feature['label'],
+                                              feature['name'],
+                                              feature['valid_time'],
+                                              feature['expire_time'],
+                                              feature['issue_time'],
+                                              feature['stroke'],
+                                              fill))
+
+    return polygons
+
+
+def get_outlook_polygons(map_widget: tkmap.TkinterMapView,
+                         outlook: CachedOutlook) -> list[SPCOutlookPolygon]:
+    """
+    Returns the polygons of a cached outlook product, creating them the first time they are needed. The polygons are
+    saved with the product so that they are reused until the product changes. This function can be called from any
+    thread: a caller that requests the polygons while they are being created waits for them.
 
-    def __init__(self, dashboard, url: str) -> None:
+    map_widget: tkmap.TkinterMapView
+        Map widget that the polygons will be drawn on.
+    outlook: noaa.spc.cache.CachedOutlook
+        Outlook product from the dashboard's OutlookCache.
+    """
+    if outlook.polygons is None:
+        with outlook.lock:
+            if outlook.polygons is None:
+                with metrics.span('SPCOutlook.parse'):
+                    outlook.polygons = build_outlook_polygons(map_widget, outlook.features)
+    return outlook.polygons
 
+
+class SPCOutlook:
+
+    def __init__(self, dashboard, url: str, timeout: float = 30, features: list[dict] = None) -> None:
+        """
+        dashboard: main.AlertDashboard instance
+        url: URL of the outlook GeoJSON file.
+        timeout: request timeout in seconds.
+        features: decoded outlook features saved in the dashboard's snapshot store. If provided, the features are drawn
+            immediately and replaced once the latest outlook is retrieved.
+        """
         self.dashboard = dashboard
         self.url = url
-        self.outlook_polygons = []
 
-        outlook_thread = Thread(target=self.main, name='outlook-thread', daemon=True)
-        outlook_thread.start()
+        # outlooks that are in the cache and have not expired are drawn without any requests
+        cached = self.dashboard.outlook_cache.peek(url)
+        if cached is not None:
+            sys.stdout.write(f'Using cached outlook from {self.url}')
+            metrics.increment('SPCOutlook.cache_hits')
+            with metrics.span('SPCOutlook.draw'):
+                self._show_polygons(get_outlook_polygons(self.dashboard.map_widget, cached))
+            self.dashboard.scheduler.submit('spc-outlook', lambda timeout: self._save_snapshot(cached.features))
+            return
+
+        if features is not None:
+            sys.stdout.write(f'Restoring saved outlook from {self.url}')
+            self._show_polygons(build_outlook_polygons(self.dashboard.map_widget, features))
 
-    def main(self):
+        self.dashboard.scheduler.submit('spc-outlook', self.main, timeout=timeout)
+
+    def main(self, timeout: float = None):
 
         sys.stdout.write(f'Retrieving outlooks from {self.url}')
-        content = requests.get(self.url).content
-        features = json.loads(content)['features']
+        outlook = self.dashboard.outlook_cache.get(self.url, timeout=timeout)
+        
+        # the layer change is applied on the Tk main thread
+        polygons = get_outlook_polygons(self.dashboard.map_widget, outlook)
+        self.dashboard.render_queue.submit([partial(self._show_polygons, polygons)], name='SPCOutlook')
+        self._save_snapshot(outlook.features)
+
+    def _save_snapshot(self, features: list[dict]) -> None:
         
-        self.dashboard.destroy_all_outlook_polygons()
+        # the selected outlook is drawn again the next time the app is opened
+        self.dashboard.snapshots.save('spc-outlook', (self.url, features))
+
+    def _show_polygons(self, polygons: list[SPCOutlookPolygon]) -> None:
         
-        for feature in features:
-
-            label = feature['properties']['LABEL']
-            name = feature['properties']['LABEL2']
-            valid_time = feature['properties']['VALID']
-            expire_time = feature['properties']['EXPIRE']
-            issue_time = feature['properties']['ISSUE']
-            stroke = feature['properties']['stroke']
-            fill = None
-
-            # extract coordinates and convert from [lon, lat] to [lat, lon]
-            for coord_list in feature['geometry']['coordinates']:
-                coordinates = [[float(coords[1]), float(coords[0])] for coords in coord_list[0] if len(coords) == 2]
-
-                p = SPCOutlookPolygon(self.dashboard.map_widget,
-                                      coordinates,
-                                      label,
-                                      name,
-                                      valid_time,
-                                      expire_time,
-                                      issue_time,
-                                      stroke,
-                                      fill)
-                sys.stdout.write(f'Drawing {label} outlook polygon.')
-                
-                p.draw()
-                self.dashboard.map_widget.canvas_polygon_list.append(p)
-                self.dashboard.map_widget.canvas.itemconfig(p.canvas_polygon, state='disabled')
\ No newline at end of file
+        # the outlook's layer is only rebuilt if the polygons changed, otherwise its hidden canvas items are shown
+        if self.dashboard.layers.get_polygons(self.url) is not polygons:
+            sys.stdout.write(f'Adding {len(polygons)} outlook polygons.')
+            self.dashboard.layers.add_layer(self.url, polygons, group='outlooks', visible_state='disabled')
+        self.dashboard.layers.show(self.url)
@@ -1,13 +1,8 @@
-from lxml import etree
-from pykml import parser
-from threading import Thread
-import hashlib
-import io
-import requests
-import sys
-import time
+from functools import partial
+from mapping.render import RenderQueue
+from noaa.events import ChangeEvent
+from noaa.spc.feed import SPCReport  # re-exported so that existing imports and saved snapshots still resolve
 import vlc
-import zipfile
 
 
 DEFAULT_REPORT_COLORS = {
@@ -16,229 +11,117 @@ DEFAULT_REPORT_COLORS = {
     'wind': 'blue'
 }
 
-
-class SPCReport:
-    """
-    Object containing information for an SPC storm report.
-    """
-    def __init__(self, placemark):
-        
-        parser = etree.HTMLParser(encoding='utf-8')
-        root = etree.fromstring(placemark.description.text, parser)
-        
-        tr = root[0][0][0]
-        
-        self.report_type = tr[0][0][0].tail.split(' ')[0].replace(' ', '')
-        self.date, self.t = tr[0][1][6].tail.split('  ')[:2]
-        self.mag = tr[0][1][8].tail
-        self.location = tr[0][0][0].text
-        self.county, self.state = tr[0][1][0].tail.split(', ')
-        self.lat = float(tr[0][1][3].tail.replace(',', ''))
-        self.lon = float(tr[0][1][4].tail.replace(',', ''))
-        self.description = tr[0][2].text
-        
-        # reformatting and ID generation
-        self._reformat_mag()
-        self._generate_id()
-        
-    def _generate_id(self):
-        """
-        Generates a unique ID for the storm report.
-        """
-        report_str = str(f"{self.report_type}{self.date}{self.t}{self.mag}{self.location}{self.county}{self.state}"
-                         f"{self.description}{self.lat}{self.lon}")
-        self.id = hashlib.sha256(report_str.encode('utf-8')).hexdigest()
-
-    def _reformat_mag(self):
-        """
-        Reformats the magnitude string of the storm report.
-        """
-        if 'Hail' in self.report_type:
-            self.mag = self.mag.split(' ')[1]  # hail size (in.)
-        elif 'Wind' in self.report_type:
-            self.mag = "" if "Unknown" in self.mag else self.mag.split(' ')[1]  # mph
-        else:
-            self.mag = ""  # tornado reports do not have a magnitude
+REPORT_MARKER_OUTLINE = '#000000'
+STALE_REPORT_MARKER_OUTLINE = '#808080'  # reports restored from a snapshot that have not been confirmed by the SPC yet
 
 
 class SPCReports:
     """
-    Class that handles the thread for updating SPC reports on the dashboard.
+    Class that handles the updating of SPC reports on the dashboard. Reports are retrieved by a
+    noaa.spc.feed.ReportFeed, and this class draws the new reports that the feed emits (see SPCReports.on_change).
     """
-    def __init__(self, map_widget) -> None:
+    def __init__(self,
+                 map_widget,
+                 render_queue: RenderQueue = None,
+                 play_sound: bool = True) -> None:
         """
         map_widget: main.AlertDashboard.map_widget
+        render_queue: mapping.render.RenderQueue instance. If None, a new render queue is created for the map widget.
+        play_sound: play a sound when new reports are found.
         """
         self._map_widget = map_widget
-        self.reports = {'tornado': [], 'wind': [], 'hail': []}
-
-    def start_thread(self,
-                     update_freq: int = 60,
-                     max_updates: int = 1440) -> None:
-        """
-        Starts a thread for updating SPC reports automatically in the background.
-        
-        Parameters
-        ----------
-        update_freq: int (default = 60)
-            Report update frequency in seconds.
-        max_updates: int (default = 1440)
-            Max number of times that the SPC reports will automatically update before terminating. This parameter is
-            only used to prevent an infinite loop when updating reports.
-
-        Notes
-        -----
-        With the default parameters, the automatic report updates will stop after the app has been continuously open
-        for about 24 hours.
-        """
-        sys.stdout.write(f'[SPCReports] Starting thread. update_freq={update_freq}, max_updates={max_updates}')
-        
-        self._thread = Thread(target=self._live_report_updates,
-                              name='auto-spc-reports-thread',
-                              daemon=True,
-                              args=(update_freq, max_updates))
-        self._thread.start()
+        self._render_queue = render_queue if render_queue is not None else RenderQueue(map_widget)
+        self._markers = {}  # {report ID: tkintermapview.canvas_position_marker.CanvasPositionMarker}
+        self._stale_report_ids = set()  # reports restored from the snapshot that have not been confirmed yet
+        self.play_sound = play_sound
     
-    def update_reports(self):
-        """
-        Performs a single update of today's storm reports.
+    def on_change(self, event: ChangeEvent) -> None:
         """
-        sys.stdout.write('[SPCReports] Updating reports.')
-        self._retrieve_reports()
+        Draws the new reports emitted by a ReportFeed. This method can be called from any thread; the markers are drawn
+        on the Tk main thread.
         
-        if len(self.new_report_ids) > 0:
+        event: noaa.events.ChangeEvent
+            Reports that were added by an update (or restored from a snapshot).
+        """
+        if event.added and not event.stale and self.play_sound:
             self._play_new_report_sound()
         
-        self._draw_new_spc_reports()
+        self._draw_new_spc_reports(event)
     
-    def _live_report_updates(self,
-                             update_freq: int,
-                             max_updates: int):
+    def _draw_new_spc_reports(self, event: ChangeEvent) -> None:
         """
-        Workflow for updating storm reports in real time.
+        Draws new storm reports on the map widget and removes the markers of reports that are no longer listed (e.g.
+        after the convective day rolls over at 12Z). The markers are submitted to the render queue as a single batch so
+        that they are changed on the Tk main thread, where the marker and stale report bookkeeping is also updated.
         
-        Parameters
-        ----------
-        update_freq: int
-            Report update frequency in seconds.
-        max_updates: int
-            Max number of times that the SPC reports will automatically update before terminating. This parameter is
-            only used to prevent an infinite loop when updating reports.
-
-        Notes
-        -----
-        With the default parameters, the automatic report updates will stop after the app has been continuously open
-        for about 24 hours.
-        """
-        update_count = 0  # total update count
-        while update_count < max_updates:
-            self.update_reports()
-            time.sleep(update_freq)
-            update_count += 1
-    
-    def _draw_new_spc_reports(self) -> None:
-        """
-        Draws new storm reports on the map widget.
+        event: noaa.events.ChangeEvent
+            Changes emitted by the feed. New reports in a stale event are drawn as stale (restored from a snapshot).
         """
+        new_report_ids = {report.id for report in event.added}
         new_reports = []
         for report_type in ['tornado', 'hail', 'wind']:
             new_reports.extend([dict(
+                report_id=report.id,
                 deg_x=report.lat,
                 deg_y=report.lon,
                 text=report.mag,
                 marker_color_circle=DEFAULT_REPORT_COLORS[report_type],
-                marker_color_outside='#000000',
+                marker_color_outside=STALE_REPORT_MARKER_OUTLINE if event.stale else REPORT_MARKER_OUTLINE,
                 )
-                for report in self.reports[report_type]
-                if report.id in self.new_report_ids])
-        
-        for report in new_reports:
-            self._map_widget.set_marker(**report)
-        
-        sys.stdout.write(f'[SPCReports] {len(new_reports)} new reports found.')
-        
-    def _retrieve_reports(self) -> None:
-        """
-        Retrieves today's filtered storm reports from the SPC.
-        """
-        sys.stdout.write('[SPCReports] Retrieving storm reports.')
-        url = 'https://www.spc.noaa.gov/climo/reports/today_filtered.kmz'
-        response = requests.get(url)
-        kmz = io.BytesIO(response.content)
-        
-        # read the KMZ file containing today's reports
-        try:
-            kmz_zip = zipfile.ZipFile(kmz)
-        except zipfile.BadZipFile:
-            sys.stderr.write('[SPCReports] Error encountered when reading KMZ file. This error usually corrects itself after '
-                             'a few minutes; contact Andrew Justin at andrewjustinwx@gmail.com or open an issue on our '
-                             'GitHub page if this error persists.')
+                for report in event.state[report_type]
+                if report.id in new_report_ids])
+        
+        operations = []
+        if event.removed:
+            operations.append(partial(self._remove_report_markers, set(event.removed)))  # reports no longer listed
+        operations.extend([partial(self._add_report_marker, **report) for report in new_reports])
+        if event.stale:
+            operations.append(partial(self._set_stale_reports, new_report_ids))
         else:
-            with kmz_zip as f:
-                kml_name = f.namelist()[0]
-                kml = f.read(kml_name)
-            
-        root = parser.fromstring(kml)
-        
-        reports_torn = []
-        reports_hail = []
-        reports_wind = []
+            operations.append(self._confirm_stale_reports)  # restored reports still listed by the SPC
         
+        self._render_queue.submit(operations, name='SPCReports')
+    
+    def _add_report_marker(self, report_id: str, **kwargs) -> None:
         """
-        The KML will contain a 'Document' if any storm reports exist.
-        If there are no reports, the 'Document' attribute will not exist.
+        Internal method that draws the marker for a storm report.
         """
-        try:
-            _ = root.Document
-        except AttributeError:
-            sys.stdout.write('[SPCReports] No storm reports were found.')
-    
-        folder_torn = root.Document.Folder[1]
-        folder_wind = root.Document.Folder[2]
-        folder_hail = root.Document.Folder[3]
-        
-        # tornado reports
-        try:
-            reports_torn = [SPCReport(pm) for pm in folder_torn.Placemark]
-        except AttributeError:
-            sys.stdout.write('[SPCReports] No tornado reports found.')
-        
-        # wind reports
-        try:
-            reports_wind = [SPCReport(pm) for pm in folder_wind.Placemark]
-        except AttributeError:
-            sys.stdout.write('[SPCReports] No wind reports found.')
-        
-        # hail reports
-        try:
-            reports_hail = [SPCReport(pm) for pm in folder_hail.Placemark]
-        except AttributeError:
-            sys.stdout.write('[SPCReports] No hail reports found.')
+        self._markers[report_id] = self._map_widget.set_marker(**kwargs)
     
-        sys.stdout.write(f'[SPCReports] Total reports: T={len(reports_torn)} W={len(reports_wind)} H={len(reports_hail)}')
-        
-        reports = {'tornado': reports_torn,
-                   'wind': reports_wind,
-                   'hail': reports_hail}
-        
-        self._check_for_new_or_old_reports(reports)
-        
-        self.reports = reports
+    def _remove_report_markers(self, report_ids: set[str]) -> None:
+        """
+        Internal method that deletes the markers of reports that are no longer listed by the SPC.
+        """
+        for report_id in report_ids:
+            marker = self._markers.pop(report_id, None)
+            if marker is not None:
+                marker.delete()
+        self._stale_report_ids -= report_ids
     
-    def _check_for_new_or_old_reports(self, reports):
+    def _set_stale_reports(self, report_ids: set[str]) -> None:
         """
-        Checks for new storm reports.
+        Internal method that saves the IDs of the reports restored from a snapshot so that their markers are drawn as
+        stale until they are confirmed by an update.
         """
-        saved_report_ids = []
-        current_report_ids = []
-        
-        for report_type in ['tornado', 'wind', 'hail']:
-            saved_report_ids.extend([report.id for report in self.reports[report_type]])
-            current_report_ids.extend([report.id for report in reports[report_type]])
-        
-        self.new_report_ids = [report_id for report_id in current_report_ids if report_id not in saved_report_ids]
-        self.old_report_ids = [report_id for report_id in saved_report_ids if report_id not in current_report_ids]
-        
+        self._stale_report_ids = report_ids
+    
+    def _confirm_stale_reports(self) -> None:
+        """
+        Internal method that restores the normal outline of restored reports once they are confirmed by an update.
+        Restored reports that are no longer listed were already removed.
+        """
+        report_ids, self._stale_report_ids = self._stale_report_ids, set()
+        for report_id in report_ids:
+            marker = self._markers.get(report_id)
+            if marker is None:
+                continue
+            marker.marker_color_outside = REPORT_MARKER_OUTLINE
+            for item in (marker.polygon, marker.big_circle):
+                if item is not None:
+                    self._map_widget.canvas.itemconfig(item, outline=REPORT_MARKER_OUTLINE)
+            if marker.polygon is not None:
+                self._map_widget.canvas.itemconfig(marker.polygon, fill=REPORT_MARKER_OUTLINE)
+
     @staticmethod
     def _play_new_report_sound():
         sound = vlc.MediaPlayer('default-report.mp3')
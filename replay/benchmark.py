@@ -0,0 +1,505 @@
+"""
+Replays a fixture directory through the NOAA feeds without a Tk display and reports the latency, allocations, and memory
+growth of every poll, along with the time spent in each stage of the feeds and benchmarks of JSON decoding and geometry
+conversion. While the feeds are updated, a probe thread stands in for the Tk event loop and records how late its frames
+are ('Benchmark.frame_delay'), which shows how long the updates hold the GIL. Finally, the peak RSS of a 1000-alert
+feed is compared between NWSAlert and the alert model it replaced.
+
+Usage:
+    python -m replay.benchmark <fixture directory> [--polls N] [--no-draw] [--processes N] [--repeat 5]
+                                                   [--rss-alerts 1000] [--json results.json]
+
+A synthetic outbreak day to run it against can be generated with 'python -m replay.synthetic <fixture directory>'.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from debug.metrics import metrics
+from lxml import etree, objectify
+from mapping.culling import ViewportCuller
+from mapping.layers import LayerManager
+from mapping.render import RenderQueue
+from mapping.spatial import SpatialIndex
+from noaa.decode import DECODER, decode_alerts, decode_outlook, loads
+from noaa.engine import FeedEngine
+from noaa.geometry import convert_geometry
+from noaa.ingest import ProcessIngest
+from noaa.nws.alerts import NWSAlerts
+from noaa.nws.feed import ALERTS_URL, NWSAlert
+from noaa.scheduler import FetchScheduler
+from noaa.spc.feed import REPORTS_URL, SPCReport, read_reports
+from noaa.spc.kml import REPORT_FOLDERS
+from noaa.spc.outlooks import get_outlook_polygons
+from noaa.spc.reports import SPCReports
+from replay.fixtures import FixtureSet
+from replay.headless import HeadlessMapWidget
+from replay.transport import ReplayAdapter
+from typing import Callable
+import argparse
+import io
+import json
+import multiprocessing
+import numpy as np
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import zipfile
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+class PollResult:
+    """
+    Measurements of a single feed update.
+    """
+    def __init__(self,
+                 poll: int,
+                 elapsed_ms: float,
+                 allocated_kb: float = None,
+                 retained_kb: float = None):
+        """
+        poll: index of the replayed poll.
+        elapsed_ms: time spent updating the feed and running its canvas operations (milliseconds).
+        allocated_kb: peak memory allocated during the update (KiB). None if memory was not traced.
+        retained_kb: memory still allocated after the update, relative to the start of the replay (KiB). None if memory
+            was not traced.
+        """
+        self.poll = poll
+        self.elapsed_ms = elapsed_ms
+        self.allocated_kb = allocated_kb
+        self.retained_kb = retained_kb
+
+
+class HeadlessFeeds:
+    """
+    FeedEngine with all requests answered by a ReplayAdapter. Unless drawing is disabled, the dashboard's alert,
+    report, and outlook front-ends subscribe to the engine and draw on a HeadlessMapWidget.
+    """
+    def __init__(self,
+                 fixtures: FixtureSet,
+                 draw: bool = True,
+                 processes: int = 0):
+        """
+        fixtures: replay.fixtures.FixtureSet
+            Recorded polls that are replayed.
+        draw: bool (default = True)
+            Draw the changes emitted by the engine. If False, only the engine (fetch, parse, and diff) is measured.
+        processes: int (default = 0)
+            Number of worker processes used to decode the feeds (see noaa.ingest). If 0, the feeds are decoded on the
+            calling thread.
+        """
+        self.scheduler = FetchScheduler(max_workers=1)  # only the session is used, the feeds are updated directly
+        self.transport = ReplayAdapter(fixtures)
+        self.transport.mount(self.scheduler.session)
+
+        self.ingest = ProcessIngest(processes) if processes > 0 else None
+        self.engine = FeedEngine(self.scheduler, ingest=self.ingest)
+        # every product is revalidated in every poll, as if its scheduled issuance time had passed
+        self.engine.outlooks.max_ttl = 0
+        self.outlook_urls = [url for url in fixtures.urls if url not in (ALERTS_URL, REPORTS_URL)]
+
+        self.map_widget = HeadlessMapWidget()
+        self.render_queue = RenderQueue(self.map_widget)
+        self.draw = draw
+        if draw:
+            self.spatial_index = SpatialIndex()
+            self.culler = ViewportCuller(self.map_widget)
+            self.layers = LayerManager(self.map_widget, self.culler, self.spatial_index)
+            self.alerts = NWSAlerts(self.map_widget, self.render_queue, self.spatial_index, self.culler)
+            self.reports = SPCReports(self.map_widget, self.render_queue, play_sound=False)
+            self.engine.subscribe(self.alerts.on_change, feeds=['nws-alerts'])
+            self.engine.subscribe(self.reports.on_change, feeds=['spc-reports'])
+
+    def updates(self) -> dict[str, Callable]:
+        """
+        Returns the function that performs one update of each feed, keyed by the feed name.
+        """
+        updates = {}
+        if ALERTS_URL in self.transport.fixtures.urls:
+            updates['NWSAlerts'] = self.engine.alerts.update
+        if REPORTS_URL in self.transport.fixtures.urls:
+            updates['SPCReports'] = self.engine.reports.update
+        if self.outlook_urls:
+            updates['SPCOutlook'] = self.update_outlooks
+        return updates
+
+    def update_outlooks(self, timeout: float = None) -> None:
+        """
+        Retrieves every outlook product and shows it, in the same way as noaa.spc.outlooks.SPCOutlook.
+        """
+        for url in self.outlook_urls:
+            outlook = self.engine.outlooks.get(url, timeout=timeout)
+            if not self.draw:
+                continue
+            polygons = get_outlook_polygons(self.map_widget, outlook)
+            if self.layers.get_polygons(url) is not polygons:
+                self.layers.add_layer(url, polygons, group='outlooks', visible_state='disabled')
+            self.layers.show(url)
+
+    def stop(self) -> None:
+        self.scheduler.stop()
+        if self.ingest is not None:
+            self.ingest.shutdown()
+
+
+class FrameProbe:
+    """
+    Thread that wakes up at the frame interval of mapping.render.RenderQueue and records how late every frame is, in
+    the same way as the Tk event loop would be delayed while another thread holds the GIL.
+    """
+    def __init__(self, interval_ms: float = 16):
+        self.interval = interval_ms / 1000
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='FrameProbe', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            scheduled_at = time.perf_counter()
+            if self._stopped.wait(self.interval):
+                return
+            metrics.record('Benchmark.frame_delay', max(1000 * (time.perf_counter() - scheduled_at - self.interval), 0),
+                           log=False)
+
+
+def replay(fixtures: FixtureSet,
+           polls: int = None,
+           trace_memory: bool = False,
+           draw: bool = True,
+           processes: int = 0) -> dict[str, list[PollResult]]:
+    """
+    Replays recorded polls through the feeds. When drawing, the canvas operations of every update are run before the
+    update is considered finished.
+
+    Parameters
+    ----------
+    fixtures: replay.fixtures.FixtureSet
+        Recorded polls.
+    polls: int (default = None)
+        Number of polls to replay. If None, all polls are replayed.
+    trace_memory: bool (default = False)
+        Measure allocations with tracemalloc. Tracing slows down the feeds, so latencies should be measured separately.
+    draw: bool (default = True)
+        Draw the changes on a headless map. If False, only the engine is replayed.
+    processes: int (default = 0)
+        Number of worker processes used to decode the feeds (see noaa.ingest).
+
+    Returns
+    -------
+    results: dict[str, list[PollResult]]
+        Measurements of every update, keyed by feed name.
+    """
+    polls = min(polls, len(fixtures)) if polls is not None else len(fixtures)
+
+    if trace_memory:
+        tracemalloc.start()
+    feeds = HeadlessFeeds(fixtures, draw, processes)
+    updates = feeds.updates()
+    results = {name: [] for name in updates}
+    probe = FrameProbe() if not trace_memory else None
+    if probe is not None:
+        probe.start()
+
+    baseline = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    try:
+        for poll in range(polls):
+            for name, update in updates.items():
+                if trace_memory:
+                    tracemalloc.reset_peak()
+                    start_memory = tracemalloc.get_traced_memory()[0]
+                start_time = time.perf_counter()
+
+                try:
+                    update(None)
+                except Exception as e:
+                    sys.stderr.write(f'[Benchmark] Error encountered while updating {name} (poll {poll}): {e!r}\n')
+                feeds.render_queue.flush()
+
+                elapsed_ms = 1000 * (time.perf_counter() - start_time)
+                if trace_memory:
+                    current, peak = tracemalloc.get_traced_memory()
+                    results[name].append(PollResult(poll, elapsed_ms, (peak - start_memory) / 1024,
+                                                    (current - baseline) / 1024))
+                else:
+                    results[name].append(PollResult(poll, elapsed_ms))
+
+            feeds.transport.advance()
+    finally:
+        if probe is not None:
+            probe.stop()
+        feeds.stop()
+        if trace_memory:
+            tracemalloc.stop()
+
+    return results
+
+
+def parse_kmz_full_tree(kmz: bytes) -> list[SPCReport]:
+    """
+    Reads the storm reports in a KMZ file the way noaa.spc.reports did before noaa.spc.kml was added: the whole KML
+    is read into memory and parsed into an objectified tree (pykml.parser.fromstring is lxml.objectify.fromstring),
+    and the description of every report is parsed as its own document with a new HTML parser. Only used to compare the
+    previous parser with noaa.spc.feed.read_reports.
+    """
+    with zipfile.ZipFile(io.BytesIO(kmz)) as f:
+        kml = f.read(f.namelist()[0])
+    root = objectify.fromstring(kml)
+    if not hasattr(root, 'Document'):
+        return []
+
+    folders = root.Document.Folder
+    return [SPCReport(placemark.description.text.encode('utf-8'))
+            for index in REPORT_FOLDERS if index < len(folders)
+            for placemark in getattr(folders[index], 'Placemark', [])]
+
+
+def benchmark_decoding(fixtures: FixtureSet, repeat: int = 5) -> dict[str, dict[str, float]]:
+    """
+    Times the decoding of every distinct alerts and outlook payload, the construction of the alerts, and the conversion
+    of their geometries. Storm report KMZ files are parsed with both the streaming reader (with no reports seen, and
+    with every report seen as on a later poll) and the previous full-tree parser (see parse_kmz_full_tree). The best
+    of 'repeat' runs is used for each payload. Each step is run once more with tracemalloc to record the peak memory
+    it allocates; this run is not timed.
+
+    Returns
+    -------
+    decoding: dict[str, dict[str, float]]
+        For each step, the total time over all distinct payloads ('ms', milliseconds) and the largest peak allocation
+        of a single payload ('peak_kb', KiB).
+    """
+    def best_of(function: Callable) -> float:
+        times = []
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start_time)
+        return 1000 * min(times)
+
+    def peak_of(function: Callable) -> float:
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak / 1024
+
+    def measure(step: str, function: Callable) -> None:
+        decoding[step]['ms'] += best_of(function)
+        decoding[step]['peak_kb'] = max(decoding[step]['peak_kb'], peak_of(function))
+
+    steps = ('alerts.decode', 'alerts.construct', 'alerts.geometry', 'reports.full_tree', 'reports.streaming',
+             'reports.streaming_seen', 'outlook.decode')
+    decoding = {step: {'ms': 0, 'peak_kb': 0} for step in steps}
+    for content in fixtures.payloads(ALERTS_URL):
+        decoded = decode_alerts(content)
+        measure('alerts.decode', lambda: decode_alerts(content))
+        measure('alerts.construct', lambda: [NWSAlert(**kwargs) for kwargs in decoded])
+        measure('alerts.geometry', lambda: [convert_geometry(kwargs['geometry']) for kwargs in decoded])
+
+    for content in fixtures.payloads(REPORTS_URL):
+        try:
+            parse_kmz_full_tree(content)
+        except (zipfile.BadZipFile, etree.XMLSyntaxError):
+            continue  # failed polls are recorded as they were received
+        html_parser = etree.HTMLParser(encoding='utf-8')
+        measure('reports.full_tree', lambda: parse_kmz_full_tree(content))
+        measure('reports.streaming', lambda: read_reports(content, set(), html_parser))
+        # a later poll of the same reports only reads the placemarks, since every report was already seen
+        seen_keys = {key for _, key in read_reports(content, set(), html_parser)[0]}
+        measure('reports.streaming_seen', lambda: read_reports(content, seen_keys, html_parser))
+
+    for url in fixtures.urls:
+        if url not in (ALERTS_URL, REPORTS_URL):
+            for content in fixtures.payloads(url):
+                measure('outlook.decode', lambda: decode_outlook(content))
+
+    return decoding
+
+
+class LegacyAlert:
+    """
+    Alert model used before NWSAlert was reduced in size: attributes are stored in a __dict__, strings are not
+    interned, every vertex is a separate array, and the description and parameters are not compressed. Only used to
+    compare the memory used by the two models (see benchmark_alert_rss).
+    """
+    def __init__(self, geometry: dict | None, **fields):
+        if isinstance(geometry, dict):
+            geometry = dict(geometry, coordinates=[np.round(coords, 3)[::-1] for coords in geometry['coordinates'][0]])
+        self.geometry = geometry
+        self.__dict__.update(fields)
+
+
+def _peak_rss_mb() -> float:
+    """
+    Returns the peak RSS of the current process (MiB). On Linux, the peak of the process's own memory (VmHWM) is used,
+    because ru_maxrss also includes the peak of the parent process at the time it was forked.
+    """
+    try:
+        with open('/proc/self/status', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    # ru_maxrss is in bytes on macOS and in KiB on other platforms
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def _measure_alert_rss(content: bytes, legacy: bool) -> tuple[float, float]:
+    """
+    Worker function that decodes an alerts payload and creates its alerts, either as NWSAlerts or as LegacyAlerts.
+    Runs in a new process, so that the peak RSS is not raised by the replays.
+
+    Returns
+    -------
+    baseline_mb: float
+        Peak RSS before the payload was decoded (MiB).
+    peak_mb: float
+        Peak RSS after the alerts were created (MiB).
+    """
+    baseline_mb = _peak_rss_mb()
+    model = LegacyAlert if legacy else NWSAlert
+    alerts = [model(**kwargs) for kwargs in decode_alerts(content)]
+    peak_mb = _peak_rss_mb()
+    del alerts
+    return baseline_mb, peak_mb
+
+
+def benchmark_alert_rss(fixtures: FixtureSet, n_alerts: int = 1000) -> dict[str, dict[str, float]] | None:
+    """
+    Compares the peak RSS of NWSAlert with the previous alert model (LegacyAlert). The features of the largest
+    recorded alerts payload are repeated (with new IDs) until the payload contains 'n_alerts' alerts, and each model
+    decodes the payload in a new process.
+
+    Returns
+    -------
+    rss: dict[str, dict[str, float]] or None
+        'baseline_mb', 'peak_mb', and 'increase_mb' of each model. None if the resource module is not available or no
+        alerts were recorded.
+    """
+    payloads = fixtures.payloads(ALERTS_URL)
+    if resource is None or not payloads:
+        return None
+
+    features = max((loads(content)['features'] for content in payloads), key=len)
+    if not features:
+        return None
+    features = [dict(features[i % len(features)], id=f'{features[i % len(features)]["id"]}.{i}')
+                for i in range(n_alerts)]
+    content = json.dumps({'features': features}).encode('utf-8')
+
+    rss = {}
+    for name, legacy in (('legacy', True), ('slots', False)):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            baseline_mb, peak_mb = executor.submit(_measure_alert_rss, content, legacy).result()
+        rss[name] = {'baseline_mb': baseline_mb, 'peak_mb': peak_mb, 'increase_mb': peak_mb - baseline_mb}
+    return rss
+
+
+def summarize(results: dict[str, list[PollResult]],
+              memory_results: dict[str, list[PollResult]] = None) -> dict[str, dict]:
+    """
+    Summarizes the measurements of each feed.
+    """
+    summary = {}
+    for name, polls in results.items():
+        elapsed = np.array([poll.elapsed_ms for poll in polls])
+        summary[name] = {'polls': len(polls),
+                         'p50_ms': float(np.percentile(elapsed, 50)),
+                         'p95_ms': float(np.percentile(elapsed, 95)),
+                         'max_ms': float(elapsed.max()),
+                         'total_ms': float(elapsed.sum())}
+
+        if memory_results is not None and memory_results.get(name):
+            polls = memory_results[name]
+            allocated = np.array([poll.allocated_kb for poll in polls])
+            summary[name].update({'mean_alloc_kb': float(allocated.mean()),
+                                  'max_alloc_kb': float(allocated.max()),
+                                  # growth after the first poll, which builds the initial state of the feed
+                                  'growth_kb': polls[-1].retained_kb - polls[0].retained_kb})
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Replay recorded NOAA payloads through the feeds without a display.')
+    parser.add_argument('path', help='fixture directory created with replay.record')
+    parser.add_argument('--polls', type=int, default=None, help='number of polls to replay (default: all)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each decoding benchmark (best is kept)')
+    parser.add_argument('--no-draw', action='store_true', help='only replay the engine (fetch, parse, and diff)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the replay that traces allocations')
+    parser.add_argument('--processes', type=int, default=0, help='worker processes used to decode the feeds '
+                                                                  '(default: 0, decode on the calling thread)')
+    parser.add_argument('--rss-alerts', type=int, default=1000, help='alerts used to compare the peak RSS of the '
+                                                                      'alert models (default: 1000, 0 to skip)')
+    parser.add_argument('--json', default=None, help='write the results to a JSON file')
+    parser.add_argument('--verbose', action='store_true', help='show the debug messages of the feeds')
+    args = parser.parse_args()
+
+    fixtures = FixtureSet(args.path)
+    if len(fixtures) == 0:
+        parser.error(f'no recorded polls found in {args.path} (record them with "python -m replay.record")')
+    fixtures.load()
+
+    # the feeds write their debug messages to stdout/stderr, which are silenced unless requested
+    out = sys.stdout
+    if not args.verbose:
+        sys.stdout = sys.stderr = open(os.devnull, 'w')
+    metrics.log = args.verbose
+    metrics.reset()
+
+    try:
+        results = replay(fixtures, args.polls, draw=not args.no_draw, processes=args.processes)
+        stages = metrics.summary()
+        memory_results = replay(fixtures, args.polls, trace_memory=True, draw=not args.no_draw,
+                                processes=args.processes) \
+            if not args.no_memory else None
+        decoding = benchmark_decoding(fixtures, args.repeat)
+        alert_rss = benchmark_alert_rss(fixtures, args.rss_alerts) if args.rss_alerts > 0 else None
+    finally:
+        sys.stdout, sys.stderr = out, sys.__stderr__
+
+    summary = summarize(results, memory_results)
+
+    out.write(f'Replayed {min(args.polls or len(fixtures), len(fixtures))} poll(s) from {args.path} '
+              f'(decoder: {DECODER})\n\n')
+    out.write(f'{"feed":<12}{"polls":>7}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}{"alloc KiB":>12}{"growth KiB":>12}\n')
+    for name, feed in summary.items():
+        alloc = f'{feed["mean_alloc_kb"]:.0f}' if 'mean_alloc_kb' in feed else '-'
+        growth = f'{feed["growth_kb"]:.0f}' if 'growth_kb' in feed else '-'
+        out.write(f'{name:<12}{feed["polls"]:>7}{feed["p50_ms"]:>10.1f}{feed["p95_ms"]:>10.1f}{feed["max_ms"]:>10.1f}'
+                  f'{alloc:>12}{growth:>12}\n')
+
+    out.write(f'\n{"stage":<28}{"count":>7}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}\n')
+    for stage, count, p50, p95, max_ms in stages:
+        out.write(f'{stage:<28}{count:>7}{p50:>10.1f}{p95:>10.1f}{max_ms:>10.1f}\n')
+
+    out.write(f'\n{"decoding (distinct payloads)":<28}{"ms":>10}{"peak KiB":>12}\n')
+    for step, result in decoding.items():
+        out.write(f'{step:<28}{result["ms"]:>10.1f}{result["peak_kb"]:>12.0f}\n')
+
+    if alert_rss is not None:
+        out.write(f'\n{f"peak RSS ({args.rss_alerts} alerts)":<28}{"baseline MiB":>14}{"peak MiB":>10}'
+                  f'{"increase MiB":>14}\n')
+        for model, rss in alert_rss.items():
+            out.write(f'{model:<28}{rss["baseline_mb"]:>14.1f}{rss["peak_mb"]:>10.1f}{rss["increase_mb"]:>14.1f}\n')
+
+    if args.json is not None:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'decoder': DECODER, 'feeds': summary, 'decoding': decoding, 'alert_rss': alert_rss,
+                       'stages': {stage: {'count': count, 'p50_ms': p50, 'p95_ms': p95, 'max_ms': max_ms}
+                                  for stage, count, p50, p95, max_ms in stages}}, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
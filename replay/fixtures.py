@@ -0,0 +1,125 @@
+"""
+Recorded NOAA payloads used to replay the feeds offline.
+
+A fixture directory contains a 'manifest.json' file and a 'payloads' folder:
+    manifest.json
+        {"polls": [{"recorded_at": 1714000000.0, "files": {"<url>": "<payload file>", ...}}, ...]}
+    payloads/
+        one file for each distinct payload, named after the hash of its content
+Each poll lists the payload returned by every URL at that time. A URL that is missing from a poll could not be retrieved
+when the poll was recorded. Payloads that did not change between polls are only stored once.
+"""
+from urllib.parse import urlsplit
+import hashlib
+import json
+import os
+import time
+
+
+class FixtureSet:
+    """
+    Sequence of recorded polls of the NOAA feeds.
+    """
+    def __init__(self, path: str):
+        """
+        path: str
+            Fixture directory. The directory is created when the fixture set is saved.
+        """
+        self.path = path
+        self.polls = []  # [{'recorded_at': float, 'files': {url: payload file}}]
+        self._payloads = {}  # {payload file: bytes}, payloads that were already read
+
+        manifest = os.path.join(path, 'manifest.json')
+        if os.path.isfile(manifest):
+            with open(manifest, 'r', encoding='utf-8') as f:
+                self.polls = json.load(f)['polls']
+
+    def __len__(self) -> int:
+        return len(self.polls)
+
+    @property
+    def urls(self) -> list[str]:
+        """
+        URLs that were recorded in at least one poll, in the order that they were first recorded.
+        """
+        return list(dict.fromkeys(url for poll in self.polls for url in poll['files']))
+
+    def recorded_at(self, poll: int) -> float:
+        """
+        Returns the time (time.time()) at which a poll was recorded.
+        """
+        return self.polls[poll]['recorded_at']
+
+    def payload(self,
+                url: str,
+                poll: int) -> bytes | None:
+        """
+        Returns the payload of a URL in a poll, or None if the URL was not retrieved in the poll.
+        """
+        name = self.polls[poll]['files'].get(url)
+        if name is None:
+            return None
+
+        content = self._payloads.get(name)
+        if content is None:
+            with open(os.path.join(self.path, 'payloads', name), 'rb') as f:
+                content = self._payloads[name] = f.read()
+        return content
+
+    def payloads(self, url: str) -> list[bytes]:
+        """
+        Returns the distinct payloads of a URL in the order that they were recorded.
+        """
+        first_polls = {}  # {payload file: first poll that returned the payload}
+        for index, poll in enumerate(self.polls):
+            if url in poll['files']:
+                first_polls.setdefault(poll['files'][url], index)
+        return [self.payload(url, index) for index in first_polls.values()]
+
+    def load(self) -> None:
+        """
+        Reads all payloads into memory, so that replays do not include the time spent reading files.
+        """
+        for poll in range(len(self.polls)):
+            for url in self.polls[poll]['files']:
+                self.payload(url, poll)
+
+    def add_poll(self,
+                 payloads: dict[str, bytes],
+                 recorded_at: float = None) -> None:
+        """
+        Adds a poll and writes any new payloads to the 'payloads' folder.
+
+        payloads: dict[str, bytes]
+            Content returned by each URL.
+        recorded_at: float (default = None)
+            Time (time.time()) at which the poll was recorded. If None, the current time is used.
+        """
+        os.makedirs(os.path.join(self.path, 'payloads'), exist_ok=True)
+
+        files = {}
+        for url, content in payloads.items():
+            name = f'{hashlib.blake2b(content, digest_size=16).hexdigest()}{self._extension(url)}'
+            if name not in self._payloads:
+                with open(os.path.join(self.path, 'payloads', name), 'wb') as f:
+                    f.write(content)
+                self._payloads[name] = content
+            files[url] = name
+
+        self.polls.append({'recorded_at': recorded_at if recorded_at is not None else time.time(), 'files': files})
+
+    def save(self) -> None:
+        """
+        Writes the manifest.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({'polls': self.polls}, f, indent=1)
+
+    @staticmethod
+    def _extension(url: str) -> str:
+        """
+        Returns the file extension used for the payloads of a URL (e.g., '.kmz' or '.geojson').
+        """
+        _, extension = os.path.splitext(urlsplit(url).path)
+        return extension if extension else '.json'
@@ -0,0 +1,161 @@
+"""
+Stand-in for tkintermapview's map widget that lets the NOAA feeds run without a Tk display.
+"""
+from collections import Counter
+from itertools import count
+from tkintermapview.utility_functions import decimal_to_osm
+
+
+class HeadlessCanvas:
+    """
+    Canvas that keeps the options and tags of its items without drawing anything. Every call is counted so that replays
+    can report how many canvas operations each update needed.
+    """
+    def __init__(self):
+        self._ids = count(1)
+        self.items = {}  # {item ID: {option: value}}
+        self.calls = Counter()  # {method name: number of calls}
+
+    def _create(self, method: str, **options) -> int:
+        self.calls[method] += 1
+        item = next(self._ids)
+        tags = options.pop('tags', options.pop('tag', ()))
+        options['tags'] = (tags,) if isinstance(tags, str) else tuple(tags)
+        self.items[item] = options
+        return item
+
+    def _find(self, tag_or_id) -> list[int]:
+        if tag_or_id in self.items:
+            return [tag_or_id]
+        return [item for item, options in self.items.items() if tag_or_id in options['tags']]
+
+    def create_polygon(self, *coordinates, **options) -> int:
+        return self._create('create_polygon', **options)
+
+    def create_line(self, *coordinates, **options) -> int:
+        return self._create('create_line', **options)
+
+    def create_oval(self, *coordinates, **options) -> int:
+        return self._create('create_oval', **options)
+
+    def create_text(self, *coordinates, **options) -> int:
+        return self._create('create_text', **options)
+
+    def coords(self, tag_or_id, *coordinates) -> None:
+        self.calls['coords'] += 1
+
+    def itemconfig(self, tag_or_id, **options) -> None:
+        self.calls['itemconfig'] += 1
+        for item in self._find(tag_or_id):
+            self.items[item].update(options)
+
+    def itemcget(self, tag_or_id, option: str):
+        items = self._find(tag_or_id)
+        return self.items[items[0]].get(option) if items else None
+
+    def addtag_withtag(self, new_tag: str, tag_or_id) -> None:
+        self.calls['addtag_withtag'] += 1
+        for item in self._find(tag_or_id):
+            self.items[item]['tags'] += (new_tag,)
+
+    def gettags(self, tag_or_id) -> tuple:
+        items = self._find(tag_or_id)
+        return self.items[items[0]]['tags'] if items else ()
+
+    def find_withtag(self, tag_or_id) -> list[int]:
+        return self._find(tag_or_id)
+
+    def delete(self, tag_or_id) -> None:
+        self.calls['delete'] += 1
+        if tag_or_id is None:
+            return
+        for item in self._find(tag_or_id):
+            del self.items[item]
+
+    def tag_lower(self, tag_or_id, below=None) -> None:
+        self.calls['tag_lower'] += 1
+
+    def tag_raise(self, tag_or_id, above=None) -> None:
+        self.calls['tag_raise'] += 1
+
+    def lift(self, tag_or_id, above=None) -> None:
+        self.calls['lift'] += 1
+
+    def tag_bind(self, tag_or_id, sequence: str = None, func=None) -> None:
+        pass
+
+
+class HeadlessMarker:
+    """
+    Position marker created by HeadlessMapWidget.set_marker. Like tkintermapview's markers, it owns a 'polygon' and a
+    'big_circle' canvas item.
+    """
+    def __init__(self,
+                 map_widget,
+                 deg_x: float,
+                 deg_y: float,
+                 text: str = None,
+                 **kwargs):
+        self.map_widget = map_widget
+        self.position = (deg_x, deg_y)
+        self.text = text
+        self.marker_color_circle = kwargs.get('marker_color_circle')
+        self.marker_color_outside = kwargs.get('marker_color_outside')
+        self.polygon = map_widget.canvas.create_polygon(outline=self.marker_color_outside, tag='marker')
+        self.big_circle = map_widget.canvas.create_oval(outline=self.marker_color_outside, tag='marker')
+        self.deleted = False
+
+    def delete(self) -> None:
+        if self in self.map_widget.canvas_marker_list:
+            self.map_widget.canvas_marker_list.remove(self)
+        self.map_widget.canvas.delete(self.polygon)
+        self.map_widget.canvas.delete(self.big_circle)
+        self.deleted = True
+
+
+class HeadlessMapWidget:
+    """
+    Map widget with a fixed view and a HeadlessCanvas. Only the parts of tkintermapview.TkinterMapView that are used by
+    the feeds, the viewport culler, and the render queue are provided. There is no event loop, so functions passed to
+    'after' are never called; use RenderQueue.flush and ViewportCuller.refresh to apply pending changes.
+    """
+    def __init__(self,
+                 center: tuple[float, float] = (37.0, -96.0),
+                 zoom: int = 6,
+                 width: int = 1920,
+                 height: int = 1080,
+                 tile_size: int = 256):
+        """
+        center: (lat, lon) of the center of the map (the default view covers CONUS).
+        zoom: map zoom.
+        width: width of the map in pixels.
+        height: height of the map in pixels.
+        tile_size: size of the map tiles in pixels.
+        """
+        self.canvas = HeadlessCanvas()
+        self.canvas_polygon_list = []
+        self.canvas_marker_list = []
+        self.zoom = zoom
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+
+        x, y = decimal_to_osm(*center, zoom)
+        half_width, half_height = width / tile_size / 2, height / tile_size / 2
+        self.upper_left_tile_pos = (x - half_width, y - half_height)
+        self.lower_right_tile_pos = (x + half_width, y + half_height)
+
+    def after(self, ms: int, func=None, *args) -> None:
+        pass
+
+    def manage_z_order(self) -> None:
+        pass
+
+    def set_marker(self,
+                   deg_x: float,
+                   deg_y: float,
+                   text: str = None,
+                   **kwargs) -> HeadlessMarker:
+        marker = HeadlessMarker(self, deg_x, deg_y, text=text, **kwargs)
+        self.canvas_marker_list.append(marker)
+        return marker
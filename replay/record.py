@@ -0,0 +1,85 @@
+"""
+Records the NOAA feeds into a fixture directory that can be replayed offline.
+
+Usage:
+    python -m replay.record <fixture directory> [--polls 1440] [--interval 60]
+"""
+from noaa.fetch import ConditionalFetcher
+from noaa.nws.feed import ALERTS_URL
+from noaa.spc.cache import PREFETCH_URLS
+from noaa.spc.feed import REPORTS_URL
+from replay.fixtures import FixtureSet
+import argparse
+import requests
+import sys
+import time
+
+
+# URLs recorded by default: active alerts, today's storm reports, and the Day 1-3 outlooks
+DEFAULT_URLS = [ALERTS_URL, REPORTS_URL, *PREFETCH_URLS]
+
+
+def record(fixtures: FixtureSet,
+           urls: list[str] = None,
+           polls: int = 1440,
+           interval: float = 60,
+           timeout: float = 30) -> None:
+    """
+    Retrieves a list of URLs at a fixed interval and adds every poll to a fixture set. The manifest is saved after each
+    poll, so an interrupted recording can still be replayed.
+
+    Parameters
+    ----------
+    fixtures: replay.fixtures.FixtureSet
+        Fixture set that the polls are added to.
+    urls: list[str] (default = None)
+        URLs to record. If None, DEFAULT_URLS are recorded.
+    polls: int (default = 1440)
+        Number of polls to record.
+    interval: float (default = 60)
+        Time between polls in seconds.
+    timeout: float (default = 30)
+        Request timeout in seconds.
+    """
+    urls = list(urls) if urls is not None else DEFAULT_URLS
+    fetcher = ConditionalFetcher(name='Recorder', session=requests.Session())
+    latest = {}  # {url: latest payload}, reused when the server reports that a payload has not changed
+
+    start_time = time.monotonic()
+    for poll in range(polls):
+        payloads = {}
+        for url in urls:
+            try:
+                response = fetcher.get(url, timeout=timeout)
+            except requests.RequestException as e:
+                sys.stderr.write(f'[Recorder] Error encountered while retrieving {url}: {e!r}\n')
+                continue
+            if response is not None:
+                latest[url] = response.content
+            if url in latest:
+                payloads[url] = latest[url]
+
+        fixtures.add_poll(payloads)
+        fixtures.save()
+        sys.stdout.write(f'[Recorder] Recorded poll {poll + 1}/{polls} ({len(payloads)}/{len(urls)} URLs)\n')
+
+        if poll + 1 < polls:
+            # polls are scheduled from the start time so that slow requests do not delay the following polls
+            time.sleep(max(start_time + (poll + 1) * interval - time.monotonic(), 0))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Record the NOAA feeds into a fixture directory.')
+    parser.add_argument('path', help='fixture directory (polls are appended if it already exists)')
+    parser.add_argument('--polls', type=int, default=1440, help='number of polls to record')
+    parser.add_argument('--interval', type=float, default=60, help='time between polls (seconds)')
+    parser.add_argument('--timeout', type=float, default=30, help='request timeout (seconds)')
+    parser.add_argument('--url', action='append', dest='urls', help='URL to record (default: alerts, reports, and '
+                                                                    'the Day 1-3 outlooks)')
+    args = parser.parse_args()
+
+    record(FixtureSet(args.path), args.urls, args.polls, args.interval, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Generates a synthetic outbreak day as a fixture directory (see replay.fixtures), so that the feeds can be replayed and
+benchmarked without a recording of the live servers. The payloads have the same format as the NOAA endpoints:
+    alerts/active
+        Alerts are issued throughout the day and expire after a fixed number of polls. Some alerts are updated during
+        their lifetime, some have a MultiPolygon or no geometry, and some have no sender.
+    today_filtered.kmz
+        Storm reports accumulate during the day, in the KMZ layout read by noaa.spc.kml.
+    Day 1 categorical and tornado outlooks
+        The outlooks are issued at the start of the day and updated halfway through it.
+The same arguments always generate the same fixtures.
+
+Usage:
+    python -m replay.synthetic <fixture directory> [--polls 48] [--alerts 1000] [--reports 2100] [--seed 0]
+"""
+from datetime import datetime, timedelta, timezone
+from noaa.nws.alerts import DEFAULT_ALERT_PROPERTIES
+from noaa.nws.feed import ALERTS_URL
+from noaa.spc.feed import REPORTS_URL
+from replay.fixtures import FixtureSet
+from xml.sax.saxutils import escape
+import argparse
+import io
+import json
+import math
+import random
+import sys
+import zipfile
+
+
+# outlook products included in the fixtures
+OUTLOOK_URLS = ['https://www.spc.noaa.gov/products/outlook/day1otlk_cat.lyr.geojson',
+                'https://www.spc.noaa.gov/products/outlook/day1otlk_torn.lyr.geojson']
+
+# (label, name, stroke) of the outlook categories, from the lowest to the highest risk
+OUTLOOK_CATEGORIES = {OUTLOOK_URLS[0]: [('MRGL', 'Marginal Risk', '#005500'), ('SLGT', 'Slight Risk', '#DDAA00'),
+                                       ('ENH', 'Enhanced Risk', '#FF6600'), ('MDT', 'Moderate Risk', '#CC0000')],
+                      OUTLOOK_URLS[1]: [('0.02', '2 %', '#008B00'), ('0.05', '5 %', '#8B4726'),
+                                       ('0.10', '10 %', '#FFC800'), ('0.15', '15 %', '#FF0000')]}
+
+# storm report folders of the KMZ file, in order, and the type written in each report's description
+REPORT_TYPES = [('tornado', 'Tornado'), ('wind', 'Wind'), ('hail', 'Hail')]
+
+# center of the outbreak (lat, lon)
+CENTER = (36.0, -96.0)
+
+
+def _ring(rng: random.Random,
+          lat: float,
+          lon: float,
+          radius: float,
+          n_vertices: int) -> list[list[float]]:
+    """
+    Returns a closed, roughly circular ring of [lon, lat] coordinates.
+    """
+    ring = []
+    for i in range(n_vertices):
+        angle = 2 * math.pi * i / n_vertices
+        scale = radius * rng.uniform(0.7, 1.0)
+        ring.append([round(lon + scale * math.cos(angle), 4), round(lat + scale * math.sin(angle), 4)])
+    ring.append(ring[0])
+    return ring
+
+
+def alert_feature(rng: random.Random,
+                  index: int,
+                  revision: int,
+                  issued: datetime,
+                  expires: datetime) -> dict:
+    """
+    Returns the GeoJSON feature of an alert, in the format of the NWS 'alerts/active' endpoint.
+
+    Parameters
+    ----------
+    rng: random.Random
+        Random number generator seeded for this alert, so that every revision of the alert has the same location.
+    index: int
+        Index of the alert within the day.
+    revision: int
+        Number of times the alert was updated. Every revision has a different geometry and parameters.
+    issued: datetime
+        Time at which the alert was issued.
+    expires: datetime
+        Time at which the alert expires.
+    """
+    alert_type = rng.choice(list(DEFAULT_ALERT_PROPERTIES))
+    lat, lon = CENTER[0] + rng.gauss(0, 3), CENTER[1] + rng.gauss(0, 4)
+    radius = rng.uniform(0.1, 0.4) * (0.8 ** revision)  # updates trim the polygon
+
+    kind = index % 20
+    if kind == 0:
+        geometry = None  # zone-based alerts do not have a geometry
+    elif kind == 1:
+        geometry = {'type': 'MultiPolygon',
+                    'coordinates': [[_ring(rng, lat, lon, radius, 24)],
+                                    [_ring(rng, lat + 2 * radius, lon + 2 * radius, radius / 2, 12)]]}
+    else:
+        geometry = {'type': 'Polygon', 'coordinates': [_ring(rng, lat, lon, radius, rng.randint(8, 64))]}
+
+    office = f'NWS Office {rng.randint(1, 40)}'
+    return {'id': f'urn:oid:2.49.0.1.840.0.synthetic.{index}',
+            'type': 'Feature',
+            'geometry': geometry,
+            'properties': {'event': alert_type,
+                           'eventCode': {'NationalWeatherService': [alert_type[:2].upper() + 'W']},
+                           'sent': (issued + timedelta(minutes=10 * revision)).isoformat(),
+                           'effective': issued.isoformat(),
+                           'onset': issued.isoformat(),
+                           'expires': expires.isoformat(),
+                           'parameters': {'AWIPSidentifier': [f'SVR{index % 100:02d}'],
+                                          'eventMotionDescription': [f'{revision}...storm...{rng.randint(180, 270)}DEG'
+                                                                     f'...{rng.randint(15, 50)}KT']},
+                           'senderName': office if kind != 2 else None,
+                           'headline': f'{alert_type} issued by {office}',
+                           'description': f'At {issued:%H%M} UTC, a severe thunderstorm was located near '
+                                          f'{lat:.2f}N {-lon:.2f}W. ' * rng.randint(2, 8)}}
+
+
+def report_description(rng: random.Random,
+                       index: int,
+                       report_type: str,
+                       reported_at: datetime) -> str:
+    """
+    Returns the HTML description of a storm report placemark (see noaa.spc.kml.read_descriptions).
+    """
+    lat, lon = CENTER[0] + rng.gauss(0, 3), CENTER[1] + rng.gauss(0, 4)
+    if report_type == 'Hail':
+        mag = f'{rng.choice([0.75, 1.00, 1.25, 1.75, 2.00, 2.75])} INCH'
+    elif report_type == 'Wind':
+        mag = rng.choice(['Unknown', f'{rng.randint(50, 90)} MPH'])
+    else:
+        mag = 'UNK'
+    return (f'<table><tr><td><b><i>{index % 9 + 1} N Town {index}</i>{report_type} Report</b><p><br/>'
+            f'County {index % 50}, OK<br/><br/><br/>{lat:.2f}<br/>{lon:.2f}<br/><br/>'
+            f'{reported_at:%y%m%d}  {reported_at:%H%M}<br/><br/> {mag}</p>'
+            f'<span>Report {index} relayed by emergency management.</span></td></tr></table>')
+
+
+def reports_kmz(descriptions: dict[str, list[str]]) -> bytes:
+    """
+    Returns a KMZ file with the layout of the SPC's 'today_filtered.kmz': a legend folder followed by a folder of
+    placemarks for each report type.
+
+    descriptions: dict[str, list[str]]
+        HTML descriptions of the reports of each type ('tornado', 'wind', and 'hail').
+    """
+    kml = ['<?xml version="1.0" encoding="UTF-8"?><kml xmlns="http://www.opengis.net/kml/2.2"><Document>'
+           '<name>Storm Reports</name><Folder><name>Legend</name></Folder>']
+    for report_type, name in REPORT_TYPES:
+        kml.append(f'<Folder><name>{name} Reports</name>')
+        for description in descriptions[report_type]:
+            kml.append(f'<Placemark><description>{escape(description)}</description>'
+                       f'<Point><coordinates>0,0,0</coordinates></Point></Placemark>')
+        kml.append('</Folder>')
+    kml.append('</Document></kml>')
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as kmz:
+        kmz.writestr('today_filtered.kml', ''.join(kml))
+    return buffer.getvalue()
+
+
+def outlook_geojson(rng: random.Random,
+                    url: str,
+                    issued: datetime) -> bytes:
+    """
+    Returns an outlook product with one nested polygon for each category.
+    """
+    features = []
+    for level, (label, name, stroke) in enumerate(OUTLOOK_CATEGORIES[url]):
+        radius = 8 - 1.8 * level
+        features.append({'type': 'Feature',
+                         'geometry': {'type': 'Polygon',
+                                      'coordinates': [_ring(rng, CENTER[0], CENTER[1], radius, 120)]},
+                         'properties': {'LABEL': label,
+                                        'LABEL2': name,
+                                        'VALID': f'{issued:%Y%m%d%H%M}',
+                                        'EXPIRE': f'{issued + timedelta(hours=24):%Y%m%d%H%M}',
+                                        'ISSUE': f'{issued:%Y%m%d%H%M}',
+                                        'stroke': stroke}})
+    return json.dumps({'type': 'FeatureCollection', 'features': features}).encode('utf-8')
+
+
+def generate(fixtures: FixtureSet,
+             polls: int = 48,
+             alerts: int = 1000,
+             reports: int = 2100,
+             seed: int = 0,
+             interval: float = 60,
+             start: datetime = None) -> None:
+    """
+    Adds the polls of a synthetic outbreak day to a fixture set and saves it.
+
+    Parameters
+    ----------
+    fixtures: replay.fixtures.FixtureSet
+        Fixture set that the polls are added to.
+    polls: int (default = 48)
+        Number of polls.
+    alerts: int (default = 1000)
+        Number of alerts that are active at the peak of the day (halfway through it).
+    reports: int (default = 2100)
+        Number of storm reports at the end of the day.
+    seed: int (default = 0)
+        Seed of the random number generator.
+    interval: float (default = 60)
+        Time between polls in seconds.
+    start: datetime (default = None)
+        Time of the first poll (UTC). If None, 12Z on 2024-05-06 is used.
+    """
+    start = start if start is not None else datetime(2024, 5, 6, 12, tzinfo=timezone.utc)
+
+    # every alert is active for half of the day, so 'alerts' alerts are active halfway through it
+    n_alerts = 2 * alerts
+    lifetime = max(polls // 2, 1)
+    issued_at = [i * polls // n_alerts for i in range(n_alerts)]  # poll at which each alert is issued
+    updated_every = max(lifetime // 3, 1)  # every fifth alert is updated at this interval
+
+    report_polls = [j * polls // reports for j in range(reports)] if reports > 0 else []
+    report_descriptions = []  # (report type, description) of every report, in the order that they are issued
+    for j in range(reports):
+        report_type, name = REPORT_TYPES[0 if j % 10 == 0 else 1 + j % 2]
+        reported_at = start + timedelta(seconds=report_polls[j] * interval)
+        report_descriptions.append((report_type, report_description(random.Random(f'{seed}-report-{j}'), j, name,
+                                                                    reported_at)))
+
+    for poll in range(polls):
+        now = start + timedelta(seconds=poll * interval)
+
+        features = []
+        for i, issued in enumerate(issued_at):
+            if not issued <= poll < issued + lifetime:
+                continue
+            revision = (poll - issued) // updated_every if i % 5 == 0 else 0
+            issued_time = start + timedelta(seconds=issued * interval)
+            features.append(alert_feature(random.Random(f'{seed}-alert-{i}'), i, revision, issued_time,
+                                          issued_time + timedelta(seconds=lifetime * interval)))
+
+        descriptions = {report_type: [] for report_type, _ in REPORT_TYPES}
+        for j, (report_type, description) in enumerate(report_descriptions):
+            if report_polls[j] <= poll:
+                descriptions[report_type].append(description)
+
+        payloads = {ALERTS_URL: json.dumps({'type': 'FeatureCollection', 'features': features}).encode('utf-8'),
+                    REPORTS_URL: reports_kmz(descriptions)}
+        outlook_issued = start if poll < polls // 2 else start + timedelta(seconds=polls // 2 * interval)
+        for url in OUTLOOK_URLS:
+            payloads[url] = outlook_geojson(random.Random(f'{seed}-{url}-{outlook_issued}'), url, outlook_issued)
+
+        fixtures.add_poll(payloads, recorded_at=now.timestamp())
+
+    fixtures.save()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate a synthetic outbreak day as a fixture directory.')
+    parser.add_argument('path', help='fixture directory (polls are appended if it already exists)')
+    parser.add_argument('--polls', type=int, default=48, help='number of polls (default: 48)')
+    parser.add_argument('--alerts', type=int, default=1000, help='alerts active at the peak of the day '
+                                                                 '(default: 1000)')
+    parser.add_argument('--reports', type=int, default=2100, help='storm reports at the end of the day '
+                                                                  '(default: 2100)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random number generator (default: 0)')
+    parser.add_argument('--interval', type=float, default=60, help='time between polls (seconds, default: 60)')
+    args = parser.parse_args()
+
+    fixtures = FixtureSet(args.path)
+    generate(fixtures, args.polls, args.alerts, args.reports, args.seed, args.interval)
+    sys.stdout.write(f'Generated {args.polls} poll(s) in {args.path} ({len(fixtures.urls)} URLs)\n')
+
+
+if __name__ == '__main__':
+    main()
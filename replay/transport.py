@@ -0,0 +1,93 @@
+"""
+Transport adapter that serves recorded NOAA payloads to a requests session.
+"""
+from http import HTTPStatus
+from replay.fixtures import FixtureSet
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+import hashlib
+import requests
+import time
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter that answers requests with the payloads of the current poll of a FixtureSet instead of sending
+    them. Responses have an ETag, and conditional requests for a payload that did not change since the last poll are
+    answered with '304 Not Modified', so the feeds follow the same code paths as they do with the live servers. URLs
+    that were not retrieved in the current poll return '503 Service Unavailable'.
+
+    The adapter is injected by mounting it on the session used by the feeds (e.g., FetchScheduler.session).
+    """
+    def __init__(self,
+                 fixtures: FixtureSet,
+                 poll: int = 0,
+                 latency: float = 0):
+        """
+        fixtures: replay.fixtures.FixtureSet
+            Recorded polls.
+        poll: int (default = 0)
+            Index of the first poll that is served.
+        latency: float (default = 0)
+            Simulated network latency of every request in seconds.
+        """
+        super().__init__()
+        self.fixtures = fixtures
+        self.poll = poll
+        self.latency = latency
+        self.requests = 0  # number of requests answered
+
+    def mount(self, session: requests.Session) -> None:
+        """
+        Routes all HTTP(S) requests sent with a session to the adapter.
+        """
+        session.mount('https://', self)
+        session.mount('http://', self)
+
+    def advance(self) -> bool:
+        """
+        Moves to the next poll.
+
+        Returns
+        -------
+        advanced: bool
+            False if the current poll is the last one, otherwise True.
+        """
+        if self.poll + 1 >= len(self.fixtures):
+            return False
+        self.poll += 1
+        return True
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self.requests += 1
+
+        content = self.fixtures.payload(request.url, self.poll)
+        if content is None:
+            return self._build_response(request, 503, b'')
+
+        etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+        if request.headers.get('If-None-Match') == etag:
+            return self._build_response(request, 304, b'', ETag=etag)
+        return self._build_response(request, 200, content, ETag=etag)
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _build_response(request: requests.PreparedRequest,
+                        status_code: int,
+                        content: bytes,
+                        **headers) -> requests.Response:
+        """
+        Builds the response to a request.
+        """
+        response = requests.Response()
+        response.status_code = status_code
+        response.reason = HTTPStatus(status_code).phrase
+        response.headers = CaseInsensitiveDict({'Content-Length': str(len(content)), **headers})
+        response._content = content
+        response.url = request.url
+        response.request = request
+        return response
@@ -0,0 +1,23 @@
+from debug.logger import DebugLogger, LogBuffer
+
+
+def test_pending_messages_are_bounded():
+    log_buffer = LogBuffer(max_lines=10)
+    logger = DebugLogger(log_buffer, 'stdout')
+    for i in range(1000):
+        logger.write(f'message {i}')
+
+    assert len(log_buffer._pending) == 10
+    messages = log_buffer.drain()
+    assert [message.split(': ', 1)[1] for _, message in messages] == [f'message {i}\n' for i in range(990, 1000)]
+    assert len(log_buffer) == 10
+
+
+def test_ring_buffer_keeps_latest_messages():
+    log_buffer = LogBuffer(max_lines=3)
+    for i in range(5):
+        log_buffer.put('stderr' if i % 2 else 'stdout', f'{i}\n')
+        log_buffer.drain()
+
+    assert list(log_buffer) == [('stdout', '2\n'), ('stderr', '3\n'), ('stdout', '4\n')]
+    assert log_buffer.drain() == []
@@ -0,0 +1,98 @@
+from mapping.render import RenderQueue
+from noaa.decode import decode_alerts
+from noaa.events import ChangeEvent
+from noaa.nws.alerts import NWSAlerts
+from noaa.nws.feed import NWSAlert
+from noaa.nws.filter import AlertFilter
+from replay.headless import HeadlessMapWidget
+import json
+import sys
+import threading
+
+
+ALERT_TYPES = ['Tornado Warning', 'Severe Thunderstorm Warning', 'Flood Warning']
+
+
+def _alerts(start: int, stop: int) -> list[NWSAlert]:
+    """
+    Creates alerts with IDs 'start' to 'stop' (exclusive). Every alert has its own sender, so every alert is in its
+    own bucket.
+    """
+    features = []
+    for i in range(start, stop):
+        lat, lon = 30 + (i % 10), -105 + (i % 15)
+        features.append({'id': f'urn:alert:{i}',
+                         'geometry': {'type': 'Polygon',
+                                      'coordinates': [[[lon, lat], [lon + 0.5, lat], [lon + 0.5, lat + 0.5],
+                                                       [lon, lat]]]},
+                         'properties': {'event': ALERT_TYPES[i % len(ALERT_TYPES)],
+                                        'eventCode': {'NationalWeatherService': ['XXX']},
+                                        'expires': '2030-01-01T00:00:00+00:00',
+                                        'parameters': {},
+                                        'senderName': f'NWS Office {i}'}})
+    return [NWSAlert(**kwargs) for kwargs in decode_alerts(json.dumps({'features': features}).encode('utf-8'))]
+
+
+def test_changes_are_applied_on_main_thread():
+    map_widget = HeadlessMapWidget()
+    render_queue = RenderQueue(map_widget)
+    nws_alerts = NWSAlerts(map_widget, render_queue=render_queue)
+    alerts = _alerts(0, 10)
+
+    worker = threading.Thread(target=nws_alerts.on_change, args=(ChangeEvent('nws-alerts', alerts, [], []),))
+    worker.start()
+    worker.join()
+
+    # the index is only updated once the render queue runs on the main thread
+    assert len(nws_alerts._index) == 0 and not nws_alerts._index.buckets
+
+    render_queue.flush()
+    assert nws_alerts._index.alerts.keys() == {alert.alert_id for alert in alerts}
+    assert len(nws_alerts._index.buckets) == len(alerts)
+
+
+def test_set_filter_while_alerts_change(capsys):
+    map_widget = HeadlessMapWidget()
+    render_queue = RenderQueue(map_widget)
+    nws_alerts = NWSAlerts(map_widget, render_queue=render_queue)
+
+    n_updates, batch_size, n_active = 200, 20, 50
+    updates = [_alerts(i * batch_size, (i + 1) * batch_size) for i in range(n_updates)]
+
+    def emit_changes():
+        # each update adds a batch of alerts and removes the batch that was added 'n_active' updates before
+        for i, added in enumerate(updates):
+            removed = [alert.alert_id for alert in updates[i - n_active]] if i >= n_active else []
+            nws_alerts.on_change(ChangeEvent('nws-alerts', added, [], removed))
+
+    # switch threads as often as possible so that the updates overlap the filter changes
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    worker = threading.Thread(target=emit_changes)
+    worker.start()
+
+    # the main thread stands in for the Tk event loop: it changes the filter and runs the queued canvas operations
+    filters = [AlertFilter(types={'Tornado Warning'}), AlertFilter()]
+    n_filters = 0
+    while worker.is_alive():
+        nws_alerts.set_filter(filters[n_filters % len(filters)])
+        render_queue.flush()
+        n_filters += 1
+    worker.join()
+    sys.setswitchinterval(switch_interval)
+    nws_alerts.set_filter(AlertFilter(types={'Tornado Warning'}))
+    render_queue.flush()
+
+    assert 'Error' not in capsys.readouterr().err
+
+    index = nws_alerts._index
+    expected_ids = {alert.alert_id for alert in sum(updates[-n_active:], [])}
+    assert index.alerts.keys() == expected_ids
+    assert index.polygons.keys() == expected_ids
+    assert set().union(*index.buckets.values()) == expected_ids
+
+    for alert_id, polygons in index.polygons.items():
+        hidden = index.get(alert_id).alert_type != 'Tornado Warning'
+        for polygon in polygons:
+            state = map_widget.canvas.itemcget(polygon.canvas_polygon, 'state')
+            assert (state == 'hidden') == hidden
@@ -0,0 +1,54 @@
+from noaa.decode import decode_alerts
+from noaa.geometry import convert_geometry
+from noaa.nws.feed import NWSAlert
+import json
+import zlib
+
+
+def _feature(sender):
+    return {'id': 'urn:oid:2.49.0.1.840.0.1',
+            'geometry': {'type': 'Polygon', 'coordinates': [[[-97.0, 35.0], [-96.5, 35.0], [-96.5, 35.5],
+                                                              [-97.0, 35.0]]]},
+            'properties': {'event': 'Tornado Warning',
+                           'eventCode': {'NationalWeatherService': ['TOR']},
+                           'sent': '2024-05-01T00:00:00+00:00',
+                           'effective': '2024-05-01T00:00:00+00:00',
+                           'onset': '2024-05-01T00:00:00+00:00',
+                           'expires': '2024-05-01T01:00:00+00:00',
+                           'parameters': {'VTEC': ['/O.NEW.KOUN.TO.W.0001.240501T0000Z-240501T0100Z/']},
+                           'senderName': sender,
+                           'headline': 'Tornado Warning issued May 1',
+                           'description': 'A tornado was reported.'}}
+
+
+def test_alert_without_sender():
+    content = json.dumps({'features': [_feature(None)]}).encode('utf-8')
+    fields = decode_alerts(content)[0]
+    assert fields['sender'] is None
+
+    alert = NWSAlert(**fields)
+    assert alert.sender is None
+    assert alert.alert_type == 'Tornado Warning'
+
+
+def test_alert_from_parts_without_sender():
+    fields = decode_alerts(json.dumps({'features': [_feature(None)]}).encode('utf-8'))[0]
+    geometry = convert_geometry(fields.pop('geometry'))
+    parameters_json = json.dumps(fields.pop('parameters'), sort_keys=True).encode('utf-8')
+    description = fields.pop('description')
+
+    alert = NWSAlert.from_parts(geometry=geometry,
+                                parameters=zlib.compress(parameters_json),
+                                description=zlib.compress(description.encode('utf-8')),
+                                fingerprint=NWSAlert.generate_fingerprint(geometry, fields['time_expires'],
+                                                                          parameters_json),
+                                **fields)
+    assert alert.sender is None
+    assert alert.description == 'A tornado was reported.'
+
+
+def test_sender_is_interned():
+    content = json.dumps({'features': [_feature('NWS Norman OK'), _feature('NWS Norman OK')]}).encode('utf-8')
+    first, second = [NWSAlert(**fields) for fields in decode_alerts(content)]
+    assert first.sender == 'NWS Norman OK'
+    assert first.sender is second.sender
@@ -0,0 +1,53 @@
+from noaa.nws.feed import ALERTS_URL
+from noaa.spc.feed import REPORTS_URL
+from replay.benchmark import replay
+from replay.fixtures import FixtureSet
+from replay.synthetic import OUTLOOK_URLS, generate
+from replay.transport import ReplayAdapter
+import pytest
+import requests
+
+
+@pytest.fixture(scope='module')
+def fixtures(tmp_path_factory) -> FixtureSet:
+    path = tmp_path_factory.mktemp('day')
+    generate(FixtureSet(str(path)), polls=6, alerts=40, reports=60)
+    return FixtureSet(str(path))
+
+
+def test_fixture_set(fixtures):
+    assert len(fixtures) == 6
+    assert fixtures.urls == [ALERTS_URL, REPORTS_URL, *OUTLOOK_URLS]
+    # unchanged payloads are only stored once: the outlooks are updated halfway through the day
+    assert len(fixtures.payloads(OUTLOOK_URLS[0])) == 2
+    assert len(fixtures.payloads(ALERTS_URL)) == 6
+    assert fixtures.recorded_at(1) - fixtures.recorded_at(0) == 60
+
+
+def test_replay_adapter(fixtures):
+    session = requests.Session()
+    transport = ReplayAdapter(fixtures)
+    transport.mount(session)
+
+    response = session.get(OUTLOOK_URLS[0])
+    assert response.status_code == 200 and response.content == fixtures.payload(OUTLOOK_URLS[0], 0)
+
+    # the outlook did not change in the next poll, so a conditional request is answered with 304
+    assert transport.advance()
+    response = session.get(OUTLOOK_URLS[0], headers={'If-None-Match': response.headers['ETag']})
+    assert response.status_code == 304
+
+    assert session.get('https://www.spc.noaa.gov/not-recorded').status_code == 503
+    while transport.advance():
+        pass
+    assert transport.poll == len(fixtures) - 1
+
+
+@pytest.mark.parametrize('draw, trace_memory', [(True, False), (False, False), (True, True)])
+def test_replay(fixtures, draw, trace_memory, capsys):
+    results = replay(fixtures, draw=draw, trace_memory=trace_memory)
+
+    assert set(results) == {'NWSAlerts', 'SPCReports', 'SPCOutlook'}
+    assert all(len(polls) == len(fixtures) for polls in results.values())
+    assert all((poll.allocated_kb is not None) == trace_memory for polls in results.values() for poll in polls)
+    assert 'Error' not in capsys.readouterr().err
@@ -0,0 +1,73 @@
+from lxml import etree
+from noaa.spc.feed import SPCReport, read_reports
+from noaa.spc.kml import KMLError, read_descriptions
+from xml.sax.saxutils import escape
+import io
+import pytest
+import zipfile
+
+
+def _description(location: str, report_type: str, mag: str) -> bytes:
+    return (f'<table><tr><td><b><i>{location}</i>{report_type} Report</b><p><br/>Cleveland, OK<br/><br/><br/>35.22'
+            f'<br/>-97.44<br/><br/>240501  2215<br/><br/> {mag}</p><span>Reported by storm chaser.</span></td></tr>'
+            f'</table>').encode('utf-8')
+
+
+def _kmz(folders: list[list[bytes]]) -> bytes:
+    """
+    Creates a KMZ file with an empty first folder followed by the given report folders.
+    """
+    kml = ['<kml xmlns="http://www.opengis.net/kml/2.2"><Document><description>Storm reports</description>'
+           '<Folder><name>Legend</name></Folder>']
+    for descriptions in folders:
+        kml.append('<Folder><description>Folder</description>')
+        kml.extend(f'<Placemark><description>{escape(description.decode("utf-8"))}</description></Placemark>'
+                   for description in descriptions)
+        kml.append('</Folder>')
+    kml.append('</Document></kml>')
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as kmz:
+        kmz.writestr('reports.kml', ''.join(kml))
+    return buffer.getvalue()
+
+
+def test_read_descriptions():
+    html_parser = etree.HTMLParser(encoding='utf-8')
+    fields = read_descriptions([_description('2 N Norman', 'Tornado', ''),
+                                b'<p>Not a storm report</p>',
+                                _description('Moore', 'Hail', '1.75 INCH')], html_parser)
+
+    assert fields[1] is None
+    assert fields[0]['location'] == '2 N Norman' and fields[0]['report_type'] == 'Tornado'
+    assert (fields[0]['county'], fields[0]['state']) == ('Cleveland', 'OK')
+    assert (fields[0]['lat'], fields[0]['lon']) == (35.22, -97.44)
+    assert (fields[0]['date'], fields[0]['t']) == ('240501', '2215')
+    assert fields[2]['mag'] == ' 1.75 INCH'
+
+
+def test_read_descriptions_that_close_their_div():
+    html_parser = etree.HTMLParser(encoding='utf-8')
+    fields = read_descriptions([_description('Moore', 'Hail', '1.00 INCH'), b'</div></div>',
+                                _description('Noble', 'Wind', '65 MPH')], html_parser)
+    assert [field['location'] if field is not None else None for field in fields] == ['Moore', None, 'Noble']
+
+
+def test_read_reports():
+    tornado, wind, hail = (_description('Norman', 'Tornado', ''), _description('Noble', 'Wind', '65 MPH'),
+                           _description('Moore', 'Hail', '1.75 INCH'))
+    kmz = _kmz([[tornado], [wind, b'<p>Not a storm report</p>'], [hail]])
+    html_parser = etree.HTMLParser(encoding='utf-8')
+
+    entries, new_reports = read_reports(kmz, set(), html_parser)
+    assert [report_type for report_type, _ in entries] == ['tornado', 'wind', 'hail']
+    assert [new_reports[key].mag for _, key in entries] == ['', '65', '1.75']
+
+    # reports that were already seen are listed but not read again
+    entries, new_reports = read_reports(kmz, {key for _, key in entries[:2]}, html_parser)
+    assert len(entries) == 3 and len(new_reports) == 1
+
+
+def test_report_with_unknown_layout():
+    with pytest.raises(KMLError):
+        SPCReport(b'<p>Not a storm report</p>')
@@ -0,0 +1,76 @@
+from mapping.render import RenderQueue
+from noaa.events import ChangeEvent
+from noaa.spc.feed import SPCReport
+from noaa.spc.reports import REPORT_MARKER_OUTLINE, STALE_REPORT_MARKER_OUTLINE, SPCReports
+from replay.headless import HeadlessMapWidget
+import threading
+
+
+def _report(i: int) -> SPCReport:
+    return SPCReport.from_fields({'report_type': 'Tornado',
+                                  'date': '05/20/26',
+                                  't': '2100',
+                                  'mag': '',
+                                  'location': f'{i} N Norman',
+                                  'county': 'Cleveland',
+                                  'state': 'OK',
+                                  'lat': 35.0 + i / 100,
+                                  'lon': -97.0,
+                                  'description': f'Report {i}'})
+
+
+def _event(reports: list[SPCReport],
+           added: list[SPCReport],
+           removed: list[SPCReport] = (),
+           stale: bool = False) -> ChangeEvent:
+    return ChangeEvent('spc-reports',
+                       added=list(added),
+                       modified=[],
+                       removed=[report.id for report in removed],
+                       stale=stale,
+                       state={'tornado': list(reports), 'hail': [], 'wind': []})
+
+
+def _spc_reports() -> tuple[SPCReports, RenderQueue, HeadlessMapWidget]:
+    map_widget = HeadlessMapWidget()
+    render_queue = RenderQueue(map_widget)
+    return SPCReports(map_widget, render_queue=render_queue, play_sound=False), render_queue, map_widget
+
+
+def test_removed_reports_are_deleted():
+    spc_reports, render_queue, map_widget = _spc_reports()
+    day1, day2 = [_report(i) for i in range(5)], [_report(i) for i in range(5, 8)]
+
+    spc_reports.on_change(_event(day1, day1))
+    render_queue.flush()
+    assert spc_reports._markers.keys() == {report.id for report in day1}
+
+    # the convective day rolls over: the previous day's reports are no longer listed
+    spc_reports.on_change(_event(day2, day2, removed=day1))
+    render_queue.flush()
+    assert spc_reports._markers.keys() == {report.id for report in day2}
+    assert len(map_widget.canvas_marker_list) == len(day2)
+    assert len(map_widget.canvas.items) == 2 * len(day2)
+
+
+def test_stale_reports_are_updated_on_main_thread():
+    spc_reports, render_queue, map_widget = _spc_reports()
+    restored = [_report(i) for i in range(4)]
+
+    worker = threading.Thread(target=spc_reports.on_change, args=(_event(restored, restored, stale=True),))
+    worker.start()
+    worker.join()
+
+    # the stale reports are only saved once the render queue runs on the main thread
+    assert not spc_reports._stale_report_ids
+    render_queue.flush()
+    assert spc_reports._stale_report_ids == {report.id for report in restored}
+    assert all(marker.marker_color_outside == STALE_REPORT_MARKER_OUTLINE for marker in spc_reports._markers.values())
+
+    # the first update confirms the reports that are still listed and removes the others
+    spc_reports.on_change(_event(restored[:2], [], removed=restored[2:]))
+    render_queue.flush()
+    assert not spc_reports._stale_report_ids
+    assert spc_reports._markers.keys() == {report.id for report in restored[:2]}
+    for marker in spc_reports._markers.values():
+        assert map_widget.canvas.itemcget(marker.big_circle, 'outline') == REPORT_MARKER_OUTLINE
@@ -1,6 +1,6 @@
-import sys
-import tkinter as tk
+from debug.logger import LogBuffer
 from debug.menu import DebugFileMenu
+import tkinter as tk
 
 
 class DebugLogWidget(tk.Toplevel):
@@ -33,11 +33,88 @@ class DebugLogWidget(tk.Toplevel):
 
 class DebugLog(tk.Text):
     
-    def __init__(self, dashboard):
+    def __init__(self, dashboard, log_buffer: LogBuffer, flush_interval_ms: int = 250):
         """
         dashboard: main.AlertDashboard instance
+        log_buffer: debug.logger.LogBuffer instance that the DebugLoggers write to
+        flush_interval_ms: time between updates of the log text (milliseconds). Messages written between updates are
+            inserted in a single batch.
         """
         super().__init__(master=DebugLogWidget(dashboard))
+        self.log_buffer = log_buffer
+        self.flush_interval_ms = flush_interval_ms
+        self._out_of_date = False  # messages were received while the window was withdrawn
+        
         self.pack(side="top", fill="both", expand=True)
         self.tag_configure("stdout", foreground="#000000")  # black text for standard info
-        self.tag_configure("stderr", foreground="#ff0000")  # red text for error info
\ No newline at end of file
+        self.tag_configure("stderr", foreground="#ff0000")  # red text for error info
+        self.configure(state="disabled")  # make DebugLog object read-only
+        
+        self.master.bind("<Map>", self._on_map)
+        self.after(self.flush_interval_ms, self._flush)
+    
+    def clear(self) -> None:
+        """
+        Removes all messages from the log.
+        """
+        self.log_buffer.clear()
+        self.configure(state="normal")
+        self.delete("1.0", tk.END)
+        self.configure(state="disabled")
+    
+    def _flush(self) -> None:
+        """
+        Internal method that inserts the messages written since the last update. While the window is withdrawn, the
+        messages are only kept in the log buffer and the text is rebuilt from the buffer when the window is shown.
+        """
+        messages = self.log_buffer.drain()
+        if messages:
+            if self.master.state() == "withdrawn":
+                self._out_of_date = True
+            elif not self._out_of_date:
+                self._insert(messages)
+        
+        self.after(self.flush_interval_ms, self._flush)
+    
+    def _on_map(self, event: tk.Event) -> None:
+        """
+        Internal method called when the window or one of its widgets is mapped. Bindings on a Toplevel also receive the
+        events of its children, so events from other widgets are ignored.
+        """
+        if event.widget is self.master:
+            self._on_show()
+    
+    def _on_show(self) -> None:
+        """
+        Internal method called when the window is shown. Inserts the messages written since the last update, or
+        rebuilds the text if messages were received while the window was withdrawn.
+        """
+        messages = self.log_buffer.drain()
+        if self._out_of_date:
+            self._out_of_date = False
+            self.configure(state="normal")
+            self.delete("1.0", tk.END)
+            self.configure(state="disabled")
+            self._insert(list(self.log_buffer))
+        elif messages:
+            self._insert(messages)
+        self.see(tk.END)
+    
+    def _insert(self, messages: list[tuple[str, str]]) -> None:
+        """
+        Internal method that inserts messages with a single insert call and removes the oldest lines once the text has
+        more lines than the log buffer keeps.
+        """
+        args = []
+        for tag, message in messages:
+            args.extend((message, (tag, )))
+        
+        self.configure(state="normal")  # allow DebugLog object to be edited
+        self.insert(tk.END, *args)
+        
+        n_lines = int(self.index("end-1c").split(".")[0])
+        if n_lines > self.log_buffer.max_lines:
+            self.delete("1.0", f"{n_lines - self.log_buffer.max_lines + 1}.0")
+        
+        self.configure(state="disabled")  # make DebugLog object read-only
+        self.see(tk.END)  # scroll to the end when new text is added
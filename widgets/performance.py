@@ -0,0 +1,68 @@
+from debug.metrics import Metrics, metrics
+from tkinter import ttk
+import tkinter as tk
+
+
+class PerformanceWidget(tk.Toplevel):
+    """
+    Window that shows the p50/p95 timing of every instrumented stage (fetch, decode, parse, diff, and draw for each
+    feed) and the feed counters.
+    """
+    def __init__(self, dashboard, stage_metrics: Metrics = None, refresh_ms: int = 1000):
+        """
+        dashboard: main.AlertDashboard instance
+        stage_metrics: debug.metrics.Metrics instance. If None, the shared instance is used.
+        refresh_ms: time between refreshes of the table while the window is shown (milliseconds).
+        """
+        super().__init__(master=dashboard)
+        self.withdraw()
+        self.title("Performance")
+        self.iconbitmap("warningnav.ico")
+        self.metrics = stage_metrics if stage_metrics is not None else metrics
+        self.refresh_ms = refresh_ms
+        
+        columns = ("count", "p50", "p95", "max")
+        self.table = ttk.Treeview(self, columns=columns, height=20)
+        self.table.heading("#0", text="Stage")
+        self.table.column("#0", width=220)
+        for column, heading in zip(columns, ("Count", "p50 (ms)", "p95 (ms)", "Max (ms)")):
+            self.table.heading(column, text=heading)
+            self.table.column(column, width=90, anchor="e")
+        self.table.pack(side="top", fill="both", expand=True)
+        
+        self.counter_label = tk.Label(self, justify="left", anchor="w")
+        self.counter_label.pack(side="bottom", fill="x")
+        
+        self.after(self.refresh_ms, self._refresh)
+    
+    def show(self) -> None:
+        """
+        Shows the window and refreshes the table immediately.
+        """
+        self.deiconify()
+        self._update_table()
+    
+    def destroy(self) -> None:
+        """
+        When closing the window, prevent the instance from being 'destroyed'.
+        """
+        self.withdraw()
+    
+    def _refresh(self) -> None:
+        """
+        Internal method that periodically refreshes the table. The table is not updated while the window is withdrawn.
+        """
+        if self.state() != "withdrawn":
+            self._update_table()
+        self.after(self.refresh_ms, self._refresh)
+    
+    def _update_table(self) -> None:
+        """
+        Internal method that replaces the rows of the table with the latest summary.
+        """
+        self.table.delete(*self.table.get_children())
+        for stage, count, p50, p95, max_ms in self.metrics.summary():
+            self.table.insert("", tk.END, text=stage, values=(count, f"{p50:.1f}", f"{p95:.1f}", f"{max_ms:.1f}"))
+        
+        counters = self.metrics.counters()
+        self.counter_label.configure(text="\n".join(f"{name}: {value}" for name, value in sorted(counters.items())))